@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+"""
+Load test for the auth API.
+
+Runs each scenario against the full Django stack (middleware, DRF, real
+database) using the seeded accounts from seed_auth_fixtures.py:
+
+* login               - POST /api/auth/login/ for a user without MFA
+* login_mfa           - POST /api/auth/login/, then /api/auth/mfa/verify/ with a TOTP code
+* refresh             - POST /api/auth/refresh/ with a fresh refresh token
+* me                  - GET /api/auth/me/
+* mfa_status          - GET /api/auth/mfa/status/
+* registration        - POST /api/auth/register/
+* password_reset      - POST /api/auth/password/reset/
+* password_reset_confirm - POST /api/auth/password/reset/confirm/ with a fresh token
+
+Requests are made in-process through Django's test client, so the numbers
+measure server-side cost without network noise. With --processes N, each
+scenario runs in N forked processes at once. Every iteration uses a different
+seeded user, and tokens are created before its timer starts. Throughput is
+measured over the time the busiest process spent in timed iterations.
+
+For every scenario it reports throughput, p50/p95/p99 latency and queries per
+iteration as JSON. Save a run with --output and pass it to --compare on a
+later commit to see relative changes:
+
+    cd backend/core
+    DATABASE_URL=... python ../benchmarks/auth_load.py --iterations 2000 --output /tmp/before.json
+    git checkout <commit>
+    DATABASE_URL=... python ../benchmarks/auth_load.py --iterations 2000 --compare /tmp/before.json
+
+Compare runs only on the same machine, database and fixture.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / 'core'
+sys.path.insert(0, str(PROJECT_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings.benchmark')
+
+from seed_auth_fixtures import EMAIL_DOMAIN, EMAIL_PREFIX, PASSWORD, TOTP_KEY  # noqa: E402
+
+JSON = 'application/json'
+
+
+class Counter:
+    """connection.execute_wrapper callback that counts queries."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+# Each scenario: (user pool, untimed prepare(user, n), timed run(client, user, prepared))
+
+def _access_token(user, n):
+    from rest_framework_simplejwt.tokens import AccessToken
+    return f"Bearer {AccessToken.for_user(user)}"
+
+
+def _refresh_token(user, n):
+    from rest_framework_simplejwt.tokens import RefreshToken
+    return str(RefreshToken.for_user(user))
+
+
+def _reset_token(user, n):
+    from datetime import timedelta
+    from django.utils import timezone
+    from apps.auth.models import PasswordResetToken
+    from apps.auth.utils.utils import generate_reset_token
+
+    return PasswordResetToken.objects.create(
+        user=user, token=generate_reset_token(), expires_at=timezone.now() + timedelta(hours=1)
+    ).token
+
+
+def _registration_email(user, n):
+    return f"{EMAIL_PREFIX}reg-{uuid.uuid4().hex[:12]}-{n}{EMAIL_DOMAIN}"
+
+
+def run_login(client, user, prepared):
+    return [client.post('/api/auth/login/', {'email': user.email, 'password': PASSWORD}, content_type=JSON)]
+
+
+def run_login_mfa(client, user, prepared):
+    from django_otp.oath import TOTP
+
+    first = client.post('/api/auth/login/', {'email': user.email, 'password': PASSWORD}, content_type=JSON)
+    if first.status_code != 200 or 'mfa_token' not in first.json():
+        return [first]
+    code = f"{TOTP(bytes.fromhex(TOTP_KEY)).token():06d}"
+    second = client.post(
+        '/api/auth/mfa/verify/', {'mfa_token': first.json()['mfa_token'], 'code': code}, content_type=JSON
+    )
+    return [first, second]
+
+
+def run_refresh(client, user, prepared):
+    return [client.post('/api/auth/refresh/', {'refresh': prepared}, content_type=JSON)]
+
+
+def run_me(client, user, prepared):
+    return [client.get('/api/auth/me/', HTTP_AUTHORIZATION=prepared)]
+
+
+def run_mfa_status(client, user, prepared):
+    return [client.get('/api/auth/mfa/status/', HTTP_AUTHORIZATION=prepared)]
+
+
+def run_registration(client, user, prepared):
+    payload = {
+        'email': prepared, 'password': PASSWORD, 'password_confirm': PASSWORD,
+        'first_name': 'Load', 'last_name': 'Test',
+    }
+    return [client.post('/api/auth/register/', payload, content_type=JSON)]
+
+
+def run_password_reset(client, user, prepared):
+    return [client.post('/api/auth/password/reset/', {'email': user.email}, content_type=JSON)]
+
+
+def run_password_reset_confirm(client, user, prepared):
+    payload = {'token': prepared, 'new_password': PASSWORD, 'new_password_confirm': PASSWORD}
+    return [client.post('/api/auth/password/reset/confirm/', payload, content_type=JSON)]
+
+
+SCENARIOS = {
+    'login': ('plain', None, run_login),
+    'login_mfa': ('mfa', None, run_login_mfa),
+    'refresh': ('all', _refresh_token, run_refresh),
+    'me': ('all', _access_token, run_me),
+    'mfa_status': ('all', _access_token, run_mfa_status),
+    'registration': ('all', _registration_email, run_registration),
+    'password_reset': ('all', None, run_password_reset),
+    'password_reset_confirm': ('plain', _reset_token, run_password_reset_confirm),
+}
+
+
+def load_pools(seed):
+    """Return shuffled user-id pools of the seeded fixture."""
+    from apps.auth.models import User
+
+    seeded = User.objects.filter(email__startswith=EMAIL_PREFIX, email__endswith=EMAIL_DOMAIN).exclude(
+        email__startswith=f"{EMAIL_PREFIX}reg-"
+    )
+    pools = {
+        'plain': list(seeded.filter(mfa_enrolled=False).values_list('id', flat=True)),
+        'mfa': list(seeded.filter(mfa_enrolled=True).values_list('id', flat=True)),
+    }
+    pools['all'] = pools['plain'] + pools['mfa']
+    rng = random.Random(seed)
+    for ids in pools.values():
+        ids.sort()
+        rng.shuffle(ids)
+    return pools
+
+
+def run_slice(args):
+    """Run iterations of one scenario over a slice of users; returns raw samples."""
+    name, user_ids, warmup = args
+    from django.db import connections
+    from django.test import Client
+    from apps.auth.models import User
+
+    pool, prepare, run = SCENARIOS[name]
+    client = Client()
+    counter = Counter()
+    latencies, queries, errors = [], [], {}
+
+    for n, user_id in enumerate(user_ids):
+        user = User.objects.get(id=user_id)
+        prepared = prepare(user, n) if prepare else None
+        counter.count = 0
+        with connections['default'].execute_wrapper(counter):
+            started = time.perf_counter()
+            responses = run(client, user, prepared)
+            elapsed = time.perf_counter() - started
+        if n < warmup:
+            continue
+        latencies.append(elapsed * 1000)
+        queries.append(counter.count)
+        for response in responses:
+            if response.status_code >= 300:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+    connections.close_all()
+    return latencies, queries, errors
+
+
+def _percentile(samples, q):
+    return round(samples[min(len(samples) - 1, int(len(samples) * q))], 3)
+
+
+def run_scenario(name, pools, iterations, warmup, processes):
+    from django.db import connections
+
+    pool = pools[SCENARIOS[name][0]]
+    # Every iteration gets its own user: TOTP codes and reset requests cannot be replayed
+    per_process = iterations // processes + warmup
+    if len(pool) < per_process * processes:
+        raise SystemExit(f"{name}: needs {per_process * processes} seeded users, found {len(pool)}")
+    slices = [(name, pool[i * per_process:(i + 1) * per_process], warmup) for i in range(processes)]
+
+    started = time.perf_counter()
+    if processes == 1:
+        results = [run_slice(slices[0])]
+    else:
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(processes) as workers:
+            results = workers.map(run_slice, slices)
+    wall = time.perf_counter() - started
+
+    latencies = sorted(sample for result in results for sample in result[0])
+    queries = [sample for result in results for sample in result[1]]
+    errors = {}
+    for result in results:
+        for code, count in result[2].items():
+            errors[code] = errors.get(code, 0) + count
+    # Throughput over the time the busiest process spent in timed requests,
+    # which leaves out warm-up, fixture lookups and token preparation
+    busy = max(sum(result[0]) for result in results) / 1000
+    return {
+        'iterations': len(latencies),
+        'errors': errors,
+        'wall_seconds': round(wall, 3),
+        'throughput_per_second': round(len(latencies) / busy, 1),
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p95_ms': _percentile(latencies, 0.95),
+        'p99_ms': _percentile(latencies, 0.99),
+        'queries_per_iteration': round(statistics.mean(queries), 2),
+        'max_queries': max(queries),
+    }
+
+
+def compare(results, baseline_path):
+    """Relative change of each scenario metric against a saved run."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    changes = {}
+    for name, current in results['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        changes[name] = {
+            key: f"{(current[key] - before[key]) / before[key] * 100:+.1f}%" if before[key] else None
+            for key in ('throughput_per_second', 'p50_ms', 'p95_ms', 'p99_ms', 'queries_per_iteration')
+        }
+    return {'baseline_commit': baseline.get('commit'), 'changes': changes}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=PROJECT_DIR, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma-separated subset to run')
+    parser.add_argument('--iterations', type=int, default=1000, help='Measured iterations per scenario')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured iterations per process')
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Also write the JSON results to this file')
+    parser.add_argument('--compare', help='Results file of an earlier run to compare against')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.contrib.auth.hashers import get_hasher
+    from django.db import connection
+
+    pools = load_pools(args.seed)
+    results = {
+        'commit': _git_commit(),
+        'settings': os.environ['DJANGO_SETTINGS_MODULE'],
+        'database': connection.vendor,
+        'cache': settings.CACHES['default']['BACKEND'],
+        'password_hasher': get_hasher().algorithm,
+        'seeded_users': len(pools['all']),
+        'processes': args.processes,
+        'scenarios': {},
+    }
+    for name in names:
+        results['scenarios'][name] = run_scenario(name, pools, args.iterations, args.warmup, args.processes)
+
+    if args.compare:
+        results['comparison'] = compare(results, args.compare)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
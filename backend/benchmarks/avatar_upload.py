@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+Request-side cost of an avatar upload: header-only checks vs decoding inline.
+
+For a generated photo-sized JPEG (--width x --height), times per upload:
+
+* request     - what AvatarView does: stream the multipart body through
+                AvatarUploadHandler (temporary file plus SHA-256), read the
+                image header, store the original
+* inline      - the same plus decoding and writing every thumbnail in the
+                request, which generate_avatar_thumbnails now does instead
+* duplicate   - the request path for an image that is already stored
+
+Files go to a temporary MEDIA_ROOT; the database is only used for the
+Avatar rows, inside a transaction that is rolled back.
+
+    cd backend/core
+    DATABASE_URL=... python ../benchmarks/avatar_upload.py --iterations 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / 'core'
+sys.path.insert(0, str(PROJECT_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings.benchmark')
+
+
+def _photo(width, height, seed):
+    """A JPEG with enough detail to compress like a photo."""
+    from PIL import Image
+
+    image = Image.effect_mandelbrot((width, height), (-2.0 + seed / 1000, -1.2, 1.0, 1.2), 100).convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def _multipart(content):
+    boundary = 'BenchBoundary'
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="avatar"; filename="avatar.jpg"\r\n'
+        f'Content-Type: image/jpeg\r\n\r\n'
+    ).encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+def _upload(body, content_type):
+    """Parse a multipart body the way AvatarView does; returns the file."""
+    from django.http.multipartparser import MultiPartParser
+    from apps.auth.services.avatar_service import AvatarUploadHandler
+
+    handler = AvatarUploadHandler()
+    meta = {'CONTENT_TYPE': content_type, 'CONTENT_LENGTH': str(len(body))}
+    _, files = MultiPartParser(meta, BytesIO(body), [handler]).parse()
+    return files['avatar']
+
+
+def run(iterations, width, height):
+    import django
+
+    django.setup()
+
+    from django.db import transaction
+    from django.test import override_settings
+    from apps.auth.services.avatar_service import AvatarService
+
+    bodies = [_multipart(_photo(width, height, n)) for n in range(iterations)]
+    samples = {'request': [], 'inline': [], 'duplicate': []}
+    with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+        with transaction.atomic():
+            for n, (body, content_type) in enumerate(bodies):
+                started = time.perf_counter()
+                with _upload(body, content_type) as uploaded:
+                    avatar, created = AvatarService.store(uploaded)
+                samples['request'].append((time.perf_counter() - started) * 1000)
+                if not created:
+                    raise SystemExit('Generated images were not distinct')
+
+                started = time.perf_counter()
+                with _upload(body, content_type) as uploaded:
+                    AvatarService.store(uploaded)
+                samples['duplicate'].append((time.perf_counter() - started) * 1000)
+
+                # Thumbnail generation as the task runs it, added to the request time
+                started = time.perf_counter()
+                AvatarService.generate_thumbnails(avatar.sha256)
+                samples['inline'].append(samples['request'][n] + (time.perf_counter() - started) * 1000)
+            transaction.set_rollback(True)
+
+    return {
+        'upload_bytes': round(statistics.fmean(len(body) for body, _ in bodies)),
+        **{
+            name: {'p50_ms': round(statistics.median(values), 2), 'max_ms': round(max(values), 2)}
+            for name, values in samples.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=10, help='Distinct images to upload')
+    parser.add_argument('--width', type=int, default=3000)
+    parser.add_argument('--height', type=int, default=2000)
+    parser.add_argument('--output', help='Also write the JSON results to this file')
+    args = parser.parse_args()
+
+    results = {
+        'settings': os.environ['DJANGO_SETTINGS_MODULE'],
+        'results': run(args.iterations, args.width, args.height),
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
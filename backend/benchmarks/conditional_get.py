@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Full responses vs 304 Not Modified for /me/ and the MFA status.
+
+For each scenario it sends the same bearer-token requests through the WSGI
+handler twice, alternating in batches:
+
+* full      - no If-None-Match: the view runs and the payload is rendered
+* revalidate - If-None-Match with the current ETag: answered with a 304
+
+and reports p50/p95/p99 latency, the mean, and the database queries per
+request of each. Requests cycle through --users seeded accounts from
+seed_auth_fixtures.py; keep their snapshots and version tags within the
+size of the 'hot' cache (300 entries for the local-memory fallback), or
+evicted tags turn revalidations into full responses:
+
+    cd backend/core
+    DATABASE_URL=... python ../benchmarks/conditional_get.py --iterations 2000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / 'core'
+sys.path.insert(0, str(PROJECT_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings.benchmark')
+
+from db_pool import _environ, _fresh, _summary  # noqa: E402
+
+PATHS = {'me': '/api/auth/me/', 'mfa_status': '/api/auth/mfa/status/'}
+
+
+def _request(application, environ):
+    """Run one request; returns the status code and the ETag header."""
+    started = []
+    response = application(environ, lambda status, headers, exc_info=None: started.append((status, headers)))
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    status, headers = started[0]
+    return int(status.split()[0]), dict(headers).get('ETag')
+
+
+def run(scenarios, iterations, batch, user_count):
+    import django
+
+    django.setup()
+
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework_simplejwt.tokens import AccessToken
+    from auth_load import load_pools
+    from apps.auth.models import User
+
+    handler = WSGIHandler()
+    users = list(User.objects.filter(id__in=load_pools(42)['plain'][:max(user_count, 1)]))
+    if not users:
+        raise SystemExit('No seeded users found; run seed_auth_fixtures.py first')
+
+    results = {}
+    for scenario in scenarios:
+        full = []
+        revalidate = []
+        for user in users:
+            environ = _environ('GET', PATHS[scenario], authorization=f"Bearer {AccessToken.for_user(user)}")
+            status, etag = _request(handler, _fresh(environ))
+            if status != 200 or etag is None:
+                raise SystemExit(f"{scenario}: expected a 200 with an ETag, got {status}")
+            conditional = dict(environ, HTTP_IF_NONE_MATCH=etag)
+            if _request(handler, _fresh(conditional))[0] != 304:
+                raise SystemExit(f"{scenario}: If-None-Match with the current ETag did not give a 304")
+            full.append(environ)
+            revalidate.append(conditional)
+
+        stacks = {'full': full, 'revalidate': revalidate}
+        samples = {name: [] for name in stacks}
+        queries = {name: 0 for name in stacks}
+        errors = {name: {} for name in stacks}
+        expected = {'full': 200, 'revalidate': 304}
+        order = list(stacks.items())
+        for start in range(0, iterations, batch):
+            order.reverse()
+            for name, environs in order:
+                for n in range(start, min(start + batch, iterations)):
+                    environ = _fresh(environs[n % len(environs)])
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        status = _request(handler, environ)[0]
+                        samples[name].append((time.perf_counter() - started) * 1000)
+                    queries[name] += len(captured)
+                    if status != expected[name]:
+                        errors[name][str(status)] = errors[name].get(str(status), 0) + 1
+
+        results[scenario] = {
+            name: {
+                **_summary(samples[name]),
+                'mean_ms': round(statistics.fmean(samples[name]), 4),
+                'queries_per_request': round(queries[name] / iterations, 2),
+                'unexpected_status': errors[name],
+            }
+            for name in stacks
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default=','.join(PATHS), help='Comma-separated subset to run')
+    parser.add_argument('--iterations', type=int, default=1000, help='Measured requests per scenario and variant')
+    parser.add_argument('--users', type=int, default=50, help='Seeded accounts to cycle through')
+    parser.add_argument('--batch', type=int, default=100, help='Requests per variant before switching to the other')
+    parser.add_argument('--output', help='Also write the JSON results to this file')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(PATHS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = {
+        'settings': os.environ['DJANGO_SETTINGS_MODULE'],
+        'scenarios': run(scenarios, args.iterations, args.batch, args.users),
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
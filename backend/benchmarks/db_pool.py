@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+"""
+Connection handling benchmark: new connection per request vs persistent
+connections vs the psycopg connection pool.
+
+Runs the same requests once per mode, each in a fresh process:
+
+* direct      - CONN_MAX_AGE=0 without a pool: every request connects
+* persistent  - CONN_MAX_AGE=60: one connection per thread, kept open
+* pool        - DB_POOL_* settings (see common/db.py), as in production
+
+Requests go straight to Django's WSGI handler, so connections are opened,
+closed or returned to the pool by the request_started/request_finished
+signals exactly as under gunicorn (the test client disables that). With
+--threads N, N threads share the process like gthread workers; set
+DB_POOL_MAX_SIZE below N to see requests wait for a connection.
+
+For each mode and scenario it reports p50/p95/p99 latency, throughput, the
+time spent acquiring a connection per request and the number of server
+connections opened. Uses the seeded accounts from seed_auth_fixtures.py:
+
+    cd backend/core
+    DATABASE_URL=... python ../benchmarks/db_pool.py --iterations 2000 --threads 8
+
+Connection setup grows with network distance and TLS, so run it against a
+database as far away as production's.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / 'core'
+sys.path.insert(0, str(PROJECT_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings.benchmark')
+
+from seed_auth_fixtures import PASSWORD  # noqa: E402
+
+MODES = ('direct', 'persistent', 'pool')
+SCENARIOS = ('login', 'me')
+
+
+def _percentile(samples, q):
+    return round(samples[min(len(samples) - 1, int(len(samples) * q))], 3)
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {'count': 0}
+    return {
+        'count': len(samples),
+        'p50_ms': round(statistics.median(samples), 3),
+        'p95_ms': _percentile(samples, 0.95),
+        'p99_ms': _percentile(samples, 0.99),
+    }
+
+
+class AcquireTimer:
+    """Times DatabaseWrapper.get_new_connection: a connect, or a pool checkout."""
+
+    def __init__(self, wrapper_class):
+        self.samples = []
+        self.lock = threading.Lock()
+        original = wrapper_class.get_new_connection
+
+        def get_new_connection(wrapper, conn_params):
+            started = time.perf_counter()
+            try:
+                return original(wrapper, conn_params)
+            finally:
+                with self.lock:
+                    self.samples.append((time.perf_counter() - started) * 1000)
+
+        wrapper_class.get_new_connection = get_new_connection
+
+
+def _environ(method, path, body=b'', authorization=None):
+    environ = {
+        'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': '',
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1', 'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': BytesIO(body), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+        'wsgi.version': (1, 0), 'wsgi.multithread': True, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+    }
+    if authorization:
+        environ['HTTP_AUTHORIZATION'] = authorization
+    return environ
+
+
+def _fresh(environ):
+    """Copy of a prepared environ with an unread request body."""
+    return dict(environ, **{'wsgi.input': BytesIO(environ['wsgi.input'].getvalue())})
+
+
+def _request(application, environ):
+    """Run one request through the WSGI handler; returns the status code."""
+    status = []
+    response = application(environ, lambda s, headers, exc_info=None: status.append(s))
+    try:
+        b''.join(response)
+    finally:
+        # Sends request_finished, which closes or returns the connection
+        response.close()
+    return int(status[0].split()[0])
+
+
+def _prepare(scenario, users):
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    if scenario == 'login':
+        return [
+            _environ('POST', '/api/auth/login/', json.dumps({'email': user.email, 'password': PASSWORD}).encode())
+            for user in users
+        ]
+    return [
+        _environ('GET', '/api/auth/me/', authorization=f"Bearer {AccessToken.for_user(user)}")
+        for user in users
+    ]
+
+
+def run_child(mode, scenarios, iterations, warmup, threads):
+    """Measure every scenario in this process with the given connection mode."""
+    os.environ['DB_POOL_ENABLED'] = 'True' if mode == 'pool' else 'False'
+
+    import django
+    from django.conf import settings
+
+    if mode != 'pool':
+        settings.DATABASES['default']['CONN_MAX_AGE'] = 0 if mode == 'direct' else 60
+    django.setup()
+
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connection, connections
+    from auth_load import load_pools
+    from apps.auth.models import User
+
+    application = get_wsgi_application()
+    timer = AcquireTimer(type(connections['default']))
+    opened = {'count': 0}
+    if mode != 'pool':
+        # Without a pool every get_new_connection is a new server connection
+        from django.db.backends.signals import connection_created
+        connection_created.connect(lambda **kwargs: opened.__setitem__('count', opened['count'] + 1), weak=False)
+
+    user_ids = load_pools(42)['plain'][:max(iterations, 1)]
+    users = list(User.objects.filter(id__in=user_ids))
+    if not users:
+        raise SystemExit('No seeded users found; run seed_auth_fixtures.py first')
+    pool = connection.pool if mode == 'pool' else None
+    connections.close_all()
+    if pool is not None:
+        pool.open(wait=True)
+        pool.pop_stats()
+
+    results = {}
+    for scenario in scenarios:
+        environs = _prepare(scenario, users)
+        connections.close_all()
+        for environ in environs[:warmup]:
+            _request(application, _fresh(environ))
+
+        timer.samples.clear()
+        opened['count'] = 0
+        if pool is not None:
+            pool.pop_stats()
+        latencies, errors = [], {}
+        lock = threading.Lock()
+
+        def one(n):
+            environ = _fresh(environs[n % len(environs)])
+            started = time.perf_counter()
+            status = _request(application, environ)
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if status >= 300:
+                    errors[str(status)] = errors.get(str(status), 0) + 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            list(executor.map(one, range(iterations)))
+        wall = time.perf_counter() - started
+
+        result = {
+            **_summary(latencies),
+            'errors': errors,
+            'throughput_per_second': round(len(latencies) / wall, 1),
+            'connection_acquire': _summary(timer.samples),
+        }
+        if pool is not None:
+            stats = pool.pop_stats()
+            result['server_connections_opened'] = stats.get('connections_num', 0)
+            result['pool'] = {
+                key: stats.get(key, 0)
+                for key in ('pool_min', 'pool_max', 'pool_size', 'requests_queued', 'requests_wait_ms', 'requests_errors')
+            }
+        else:
+            result['server_connections_opened'] = opened['count']
+        results[scenario] = result
+    connections.close_all()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated subset to run')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma-separated subset to run')
+    parser.add_argument('--iterations', type=int, default=1000, help='Measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per scenario')
+    parser.add_argument('--threads', type=int, default=1, help='Concurrent request threads per process')
+    parser.add_argument('--output', help='Also write the JSON results to this file')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if args.child:
+        print(json.dumps(run_child(args.child, scenarios, args.iterations, args.warmup, args.threads)))
+        return
+
+    modes = [name.strip() for name in args.modes.split(',') if name.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    results = {'settings': os.environ['DJANGO_SETTINGS_MODULE'], 'threads': args.threads, 'modes': {}}
+    for mode in modes:
+        # A fresh process per mode: the pool is per process and settings are read once
+        completed = subprocess.run(
+            [sys.executable, __file__, '--child', mode, '--scenarios', ','.join(scenarios),
+             '--iterations', str(args.iterations), '--warmup', str(args.warmup), '--threads', str(args.threads)],
+            capture_output=True, text=True, cwd=PROJECT_DIR,
+        )
+        if completed.returncode:
+            sys.stderr.write(completed.stderr)
+            raise SystemExit(f"{mode}: benchmark process failed")
+        results['modes'][mode] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+Transactional email throughput benchmark.
+
+Measures messages per second for a single worker process delivering
+through EmailService (pooled connection, precompiled templates, batches)
+against the naive approach of one send_mail() call - and therefore one
+SMTP connection - per message.
+
+By default a local aiosmtpd sink is started on a free port, so no real mail
+server is needed:
+
+    pip install aiosmtpd
+    python benchmarks/email_throughput.py --messages 2000 --batch-size 50
+
+To benchmark against another SMTP server, pass --smtp-host/--smtp-port.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / 'core'
+sys.path.insert(0, str(PROJECT_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings.testing')
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_smtp_sink():
+    """Start an aiosmtpd server that accepts and discards every message."""
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        sys.exit("aiosmtpd is required for the local SMTP sink: pip install aiosmtpd")
+
+    class SinkHandler:
+        received = 0
+
+        async def handle_DATA(self, server, session, envelope):
+            SinkHandler.received += 1
+            return '250 OK'
+
+    port = _free_port()
+    controller = Controller(SinkHandler(), hostname='127.0.0.1', port=port)
+    controller.start()
+    return controller, SinkHandler, port
+
+
+def bench_pooled(count, batch_size):
+    from apps.auth.services.email_service import EmailService, get_connection_pool
+
+    EmailService.warm_templates()
+    specs = [
+        EmailService.build_message('welcome', f"user{i}@example.com", first_name='Bench')
+        for i in range(count)
+    ]
+    started = time.perf_counter()
+    for start in range(0, count, batch_size):
+        failed = EmailService.send_batch(specs[start:start + batch_size])
+        if failed:
+            raise RuntimeError(f"{len(failed)} messages failed to send")
+    elapsed = time.perf_counter() - started
+    get_connection_pool().close_all()
+    return elapsed
+
+
+def bench_naive(count):
+    from django.core.mail import send_mail
+    from django.template.loader import render_to_string
+
+    started = time.perf_counter()
+    for i in range(count):
+        context = {'site_name': 'Gradvy', 'email': f"user{i}@example.com", 'first_name': 'Bench'}
+        send_mail(
+            'Welcome to Gradvy',
+            render_to_string('gradvy_auth/emails/welcome.txt', context),
+            None,
+            [context['email']],
+            html_message=render_to_string('gradvy_auth/emails/welcome.html', context),
+        )
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--smtp-host', default=None)
+    parser.add_argument('--smtp-port', type=int, default=None)
+    parser.add_argument('--skip-naive', action='store_true', help='Only run the pooled benchmark')
+    args = parser.parse_args()
+
+    controller = sink = None
+    if args.smtp_host:
+        host, port = args.smtp_host, args.smtp_port or 25
+    else:
+        controller, sink, port = start_smtp_sink()
+        host = '127.0.0.1'
+
+    import django
+    from django.conf import settings
+    from django.test.utils import override_settings
+
+    django.setup()
+    overrides = override_settings(
+        EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+        EMAIL_HOST=host,
+        EMAIL_PORT=port,
+        EMAIL_USE_TLS=False,
+        EMAIL_USE_SSL=False,
+        EMAIL_HOST_USER='',
+        EMAIL_HOST_PASSWORD='',
+        EMAIL_BATCH_SIZE=args.batch_size,
+        EMAIL_CONNECTION_MAX_MESSAGES=max(args.messages, getattr(settings, 'EMAIL_CONNECTION_MAX_MESSAGES', 100)),
+    )
+    overrides.enable()
+
+    results = {'messages': args.messages, 'batch_size': args.batch_size, 'smtp': f"{host}:{port}"}
+    try:
+        elapsed = bench_pooled(args.messages, args.batch_size)
+        results['pooled'] = {
+            'seconds': round(elapsed, 3),
+            'messages_per_second': round(args.messages / elapsed, 1),
+        }
+        if not args.skip_naive:
+            elapsed = bench_naive(args.messages)
+            results['naive'] = {
+                'seconds': round(elapsed, 3),
+                'messages_per_second': round(args.messages / elapsed, 1),
+            }
+        if sink is not None:
+            results['received_by_sink'] = sink.received
+    finally:
+        overrides.disable()
+        if controller is not None:
+            controller.stop()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+DRF serializers vs their compiled versions (common/serializers.py).
+
+For the seeded accounts of seed_auth_fixtures.py, checks that
+
+* user        - user_representation(user) == UserSerializer(user).data
+* mfa_status  - mfa_status_representation(status) == MFAStatusSerializer(status).data
+
+for every plain and MFA user, then reports the median time per call over
+--iterations calls, repeated --repeat times. Both user columns include the
+groups query of UserSerializer.get_groups, which the compiled version runs
+unchanged.
+
+    cd backend/core
+    DATABASE_URL=... python ../benchmarks/fast_serializers.py --iterations 20000
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / 'core'
+sys.path.insert(0, str(PROJECT_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings.benchmark')
+
+from json_renderers import _time_per_call  # noqa: E402
+
+
+def _compare(baseline, candidate, iterations, repeat):
+    baseline_us = _time_per_call(baseline, iterations, repeat)
+    candidate_us = _time_per_call(candidate, iterations, repeat)
+    return {
+        'drf_us': baseline_us,
+        'compiled_us': candidate_us,
+        'speedup': round(baseline_us / candidate_us, 2),
+    }
+
+
+def run(iterations, repeat):
+    import django
+
+    django.setup()
+
+    from auth_load import load_pools
+    from apps.auth.api.serializers import (
+        MFAStatusSerializer, UserSerializer, mfa_status_representation, user_representation,
+    )
+    from apps.auth.models import User
+    from apps.auth.services.mfa_service import MFAService
+
+    pools = load_pools(42)
+    if not pools['plain'] or not pools['mfa']:
+        raise SystemExit('No seeded users found; run seed_auth_fixtures.py first')
+    users = list(User.objects.filter(id__in=pools['plain'] + pools['mfa']).select_related('profile'))
+    statuses = [MFAService.get_mfa_status(user) for user in users]
+
+    for user, mfa_status in zip(users, statuses):
+        if user_representation(user) != UserSerializer(user).data:
+            raise SystemExit(f"user {user.id}: compiled UserSerializer output differs")
+        if mfa_status_representation(mfa_status) != MFAStatusSerializer(mfa_status).data:
+            raise SystemExit(f"user {user.id}: compiled MFAStatusSerializer output differs")
+
+    user = users[0]
+    mfa_status = statuses[-1]
+    return {
+        'checked_users': len(users),
+        'user': _compare(lambda: UserSerializer(user).data, lambda: user_representation(user), iterations, repeat),
+        'mfa_status': _compare(
+            lambda: MFAStatusSerializer(mfa_status).data, lambda: mfa_status_representation(mfa_status),
+            iterations, repeat,
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=10000, help='Calls per timed run')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per measurement; the median is reported')
+    parser.add_argument('--output', help='Also write the JSON results to this file')
+    args = parser.parse_args()
+
+    results = {
+        'settings': os.environ['DJANGO_SETTINGS_MODULE'],
+        'results': run(args.iterations, args.repeat),
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
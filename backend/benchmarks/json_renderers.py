@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""
+DRF's JSONRenderer/JSONParser vs the orjson-based ORJSONRenderer/ORJSONParser.
+
+Builds the payloads the auth API actually returns, from the seeded accounts
+of seed_auth_fixtures.py:
+
+* me          - GET /api/auth/me/ (UserSerializer)
+* login       - POST /api/auth/login/ response: tokens plus UserSerializer
+* mfa_status  - GET /api/auth/mfa/status/ for an MFA user (raw datetimes)
+
+and the login request body for the parsers. For each it checks that both
+produce the same output, then reports the median time per call over
+--iterations calls, repeated --repeat times.
+
+    cd backend/core
+    DATABASE_URL=... python ../benchmarks/json_renderers.py --iterations 20000
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / 'core'
+sys.path.insert(0, str(PROJECT_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings.benchmark')
+
+from seed_auth_fixtures import PASSWORD  # noqa: E402
+
+
+def _payloads():
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from auth_load import load_pools
+    from apps.auth.api.serializers import UserSerializer
+    from apps.auth.models import User
+    from apps.auth.services.mfa_service import MFAService
+
+    pools = load_pools(42)
+    if not pools['plain'] or not pools['mfa']:
+        raise SystemExit('No seeded users found; run seed_auth_fixtures.py first')
+    user = User.objects.get(id=pools['plain'][0])
+    mfa_user = User.objects.get(id=pools['mfa'][0])
+    refresh = RefreshToken.for_user(user)
+    me = UserSerializer(user).data
+    return {
+        'me': me,
+        'login': {
+            'message': 'Login successful',
+            'access': str(refresh.access_token),
+            'refresh': str(refresh),
+            'user': me,
+        },
+        'mfa_status': MFAService.get_mfa_status(mfa_user),
+    }, json.dumps({'email': user.email, 'password': PASSWORD, 'remember_me': True}).encode()
+
+
+def _time_per_call(func, iterations, repeat):
+    """Median microseconds per call over ``repeat`` runs of ``iterations`` calls."""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        runs.append((time.perf_counter() - started) / iterations * 1e6)
+    return round(statistics.median(runs), 3)
+
+
+def _compare(baseline, candidate, iterations, repeat):
+    baseline_us = _time_per_call(baseline, iterations, repeat)
+    candidate_us = _time_per_call(candidate, iterations, repeat)
+    return {
+        'drf_us': baseline_us,
+        'orjson_us': candidate_us,
+        'speedup': round(baseline_us / candidate_us, 2),
+    }
+
+
+def run(iterations, repeat):
+    import django
+
+    django.setup()
+
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from common.parsers import ORJSONParser
+    from common.renderers import ORJSONRenderer
+
+    payloads, login_body = _payloads()
+    drf_renderer, orjson_renderer = JSONRenderer(), ORJSONRenderer()
+    results = {}
+    for name, data in payloads.items():
+        expected = drf_renderer.render(data)
+        if orjson_renderer.render(data) != expected:
+            raise SystemExit(f"{name}: ORJSONRenderer output differs from JSONRenderer")
+        results[f"render_{name}"] = {
+            'bytes': len(expected),
+            **_compare(lambda: drf_renderer.render(data), lambda: orjson_renderer.render(data), iterations, repeat),
+        }
+
+    drf_parser, orjson_parser = JSONParser(), ORJSONParser()
+    if orjson_parser.parse(io.BytesIO(login_body)) != drf_parser.parse(io.BytesIO(login_body)):
+        raise SystemExit('login: ORJSONParser output differs from JSONParser')
+    results['parse_login'] = {
+        'bytes': len(login_body),
+        **_compare(
+            lambda: drf_parser.parse(io.BytesIO(login_body)),
+            lambda: orjson_parser.parse(io.BytesIO(login_body)),
+            iterations, repeat,
+        ),
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=10000, help='Calls per timed run')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per measurement; the median is reported')
+    parser.add_argument('--output', help='Also write the JSON results to this file')
+    args = parser.parse_args()
+
+    results = {
+        'settings': os.environ['DJANGO_SETTINGS_MODULE'],
+        'results': run(args.iterations, args.repeat),
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
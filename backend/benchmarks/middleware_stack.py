@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""
+Middleware cost of token API requests: full browser stack vs the lean one.
+
+Builds two WSGI handlers in one process:
+
+* full  - the stock session, CSRF, authentication, OTP and message middleware
+* lean  - settings.MIDDLEWARE, whose common.middleware replacements skip
+          those for bearer-token and cookie-less requests to /api/
+
+and sends the same requests through both, alternating in batches so that
+drift (the machine getting busier) affects both alike. Every request is
+sent once through each stack before measuring, so both see warm caches:
+
+* me          - GET /api/auth/me/ with a bearer token
+* mfa_status  - GET /api/auth/mfa/status/ with a bearer token
+* login       - POST /api/auth/login/ without cookies (dominated by password
+                hashing; run it on its own with fewer --iterations)
+* not_found   - GET /api/auth/missing/ with a bearer token: the middleware,
+                URL resolution and the 404 only, no view
+
+For each scenario and stack it reports mean and p50/p95/p99 latency, and
+the mean saving per request. Uses the seeded accounts from
+seed_auth_fixtures.py:
+
+    cd backend/core
+    DATABASE_URL=... python ../benchmarks/middleware_stack.py --iterations 5000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / 'core'
+sys.path.insert(0, str(PROJECT_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings.benchmark')
+
+from db_pool import _environ, _fresh, _request, _summary  # noqa: E402
+from seed_auth_fixtures import PASSWORD  # noqa: E402
+
+SCENARIOS = ('me', 'mfa_status', 'login', 'not_found')
+DEFAULT_SCENARIOS = ('me', 'mfa_status', 'not_found')
+
+# The lean middleware and the stock classes they replace
+STOCK_MIDDLEWARE = {
+    'common.middleware.SessionMiddleware': 'django.contrib.sessions.middleware.SessionMiddleware',
+    'common.middleware.CsrfViewMiddleware': 'django.middleware.csrf.CsrfViewMiddleware',
+    'common.middleware.AuthenticationMiddleware': 'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'common.middleware.OTPMiddleware': 'django_otp.middleware.OTPMiddleware',
+    'common.middleware.MessageMiddleware': 'django.contrib.messages.middleware.MessageMiddleware',
+}
+
+
+def _handlers():
+    """WSGI handlers with the full and the lean middleware stack."""
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+
+    lean = list(settings.MIDDLEWARE)
+    settings.MIDDLEWARE = [STOCK_MIDDLEWARE.get(path, path) for path in lean]
+    try:
+        full_handler = WSGIHandler()
+    finally:
+        settings.MIDDLEWARE = lean
+    return {'full': full_handler, 'lean': WSGIHandler()}
+
+
+def _prepare(scenario, users):
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    if scenario == 'login':
+        return [
+            _environ('POST', '/api/auth/login/', json.dumps({'email': user.email, 'password': PASSWORD}).encode())
+            for user in users
+        ]
+    path = {'me': '/api/auth/me/', 'mfa_status': '/api/auth/mfa/status/', 'not_found': '/api/auth/missing/'}[scenario]
+    return [_environ('GET', path, authorization=f"Bearer {AccessToken.for_user(user)}") for user in users]
+
+
+def run(scenarios, iterations, batch):
+    import django
+
+    django.setup()
+
+    from auth_load import load_pools
+    from apps.auth.models import User
+
+    handlers = _handlers()
+    user_ids = load_pools(42)['plain'][:max(iterations, 1)]
+    users = list(User.objects.filter(id__in=user_ids))
+    if not users:
+        raise SystemExit('No seeded users found; run seed_auth_fixtures.py first')
+
+    results = {}
+    for scenario in scenarios:
+        environs = _prepare(scenario, users)[:iterations]
+        for handler in handlers.values():
+            for environ in environs:
+                _request(handler, _fresh(environ))
+
+        samples = {name: [] for name in handlers}
+        errors = {name: {} for name in handlers}
+        expected = 404 if scenario == 'not_found' else 300
+        order = list(handlers.items())
+        for start in range(0, iterations, batch):
+            order.reverse()
+            for name, handler in order:
+                for n in range(start, min(start + batch, iterations)):
+                    environ = _fresh(environs[n % len(environs)])
+                    started = time.perf_counter()
+                    status = _request(handler, environ)
+                    samples[name].append((time.perf_counter() - started) * 1000)
+                    if status >= 300 and status != expected:
+                        errors[name][str(status)] = errors[name].get(str(status), 0) + 1
+
+        result = {
+            name: {**_summary(samples[name]), 'mean_ms': round(statistics.fmean(samples[name]), 4), 'errors': errors[name]}
+            for name in handlers
+        }
+        saved = result['full']['mean_ms'] - result['lean']['mean_ms']
+        result['saved_per_request_ms'] = round(saved, 4)
+        result['saved_percent'] = round(100 * saved / result['full']['mean_ms'], 1)
+        results[scenario] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default=','.join(DEFAULT_SCENARIOS), help='Comma-separated subset to run')
+    parser.add_argument('--iterations', type=int, default=2000, help='Measured requests per scenario and stack')
+    parser.add_argument('--batch', type=int, default=100, help='Requests per stack before switching to the other')
+    parser.add_argument('--output', help='Also write the JSON results to this file')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = {
+        'settings': os.environ['DJANGO_SETTINGS_MODULE'],
+        'scenarios': run(scenarios, args.iterations, args.batch),
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
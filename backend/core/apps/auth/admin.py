@@ -1,7 +1,9 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
-from .models import User, UserProfile, BackupCode
+from .models import User, UserProfile, BackupCode, OutboxEvent, AuthEvent
 
 
 @admin.register(User)
@@ -54,3 +56,72 @@ class BackupCodeAdmin(admin.ModelAdmin):
     list_filter = ['used', 'created_at']
     search_fields = ['user__email', 'code']
 
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'event_type', 'user', 'created_at', 'processed_at', 'attempts']
+    list_filter = ['event_type', 'processed_at']
+    search_fields = ['user__email']
+    readonly_fields = ['event_type', 'user', 'payload', 'created_at', 'available_at',
+                       'processed_at', 'handled_by', 'attempts', 'last_error']
+    raw_id_fields = ['user']
+
+
+class CappedCountPaginator(Paginator):
+    """Paginator that stops counting at ``max_count`` rows instead of a full COUNT(*)."""
+    max_count = 10000
+
+    @cached_property
+    def count(self):
+        return self.object_list.values('pk')[:self.max_count].count()
+
+
+class AuthEventTypeFilter(admin.SimpleListFilter):
+    """Event type filter with a fixed list, avoiding a DISTINCT scan of the table."""
+    title = 'event type'
+    parameter_name = 'event_type'
+    event_types = (
+        'login_success', 'login_failed', 'login_mfa_required', 'logout',
+        'mfa_verify', 'mfa_enroll', 'mfa_disable', 'register',
+        'password_change', 'password_reset_requested', 'password_reset_confirmed',
+        'profile_updated', 'user_deactivated', 'audit_export',
+    )
+
+    def lookups(self, request, model_admin):
+        return [(event_type, event_type) for event_type in self.event_types]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(event_type=self.value())
+        return queryset
+
+
+@admin.register(AuthEvent)
+class AuthEventAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'event_type', 'email', 'ip_address', 'success']
+    list_filter = [AuthEventTypeFilter, 'success']
+    search_fields = ['email', 'ip_address']
+    search_help_text = 'Exact email address or IP address'
+    ordering = ['-created_at', '-id']
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+    readonly_fields = ['user', 'email', 'event_type', 'success', 'ip_address',
+                       'user_agent', 'details', 'created_at']
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Exact matches only, so searches use the (email|ip, created_at) indexes
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if '@' in search_term:
+            return queryset.filter(email=User.objects.normalize_email(search_term)), False
+        try:
+            import ipaddress
+            return queryset.filter(ip_address=str(ipaddress.ip_address(search_term))), False
+        except ValueError:
+            return queryset.none(), False
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
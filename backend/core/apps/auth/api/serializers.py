@@ -1,8 +1,32 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
-from rest_framework.validators import UniqueValidator
-from ..models import User, UserProfile
+from django.db import IntegrityError, transaction
+from common.serializers import CompiledSerializer
+from ..models import AuthEvent, User, UserProfile
+
+EMAIL_CONSTRAINT = 'user_email_lower_unique'
+
+
+def is_duplicate_email(error: IntegrityError) -> bool:
+    """
+    Whether an IntegrityError comes from the case-insensitive email constraint.
+    
+    PostgreSQL reports the constraint name in the error diagnostics; SQLite
+    only names it in the message.
+    
+    Args:
+        error: IntegrityError raised while saving a User
+    
+    Returns:
+        bool: True if the email is already taken
+    """
+    diag = getattr(error.__cause__, 'diag', None)
+    name = getattr(diag, 'constraint_name', None)
+    if name:
+        return name == EMAIL_CONSTRAINT
+    return f"'{EMAIL_CONSTRAINT}'" in str(error)
+
 
 class UserSerializer(serializers.ModelSerializer):
     profile = serializers.SerializerMethodField()
@@ -22,7 +46,8 @@ class UserSerializer(serializers.ModelSerializer):
             return {
                 'phone_number': obj.profile.phone_number,
                 'bio': getattr(obj.profile, 'bio', ''),
-                'avatar': getattr(obj.profile, 'avatar', None),
+                # Precomputed URLs by variant ('original', '64', ...), see services/avatar_service.py
+                'avatar': obj.profile.avatar_urls or None,
             }
         return {'phone_number': '', 'bio': '', 'avatar': None}
     
@@ -33,8 +58,28 @@ class UserSerializer(serializers.ModelSerializer):
         return obj.mfa_enrolled
 
 
+# UserSerializer(user).data without per-call field introspection (common/serializers.py)
+user_representation = CompiledSerializer(UserSerializer)
+
+
+class MFAStatusSerializer(serializers.Serializer):
+    """Response of mfa/status: the dict built by MFAService.get_mfa_status"""
+    is_mfa_enabled = serializers.BooleanField()
+    has_totp_device = serializers.BooleanField()
+    totp_device_count = serializers.IntegerField()
+    has_backup_codes = serializers.BooleanField()
+    backup_codes_count = serializers.IntegerField()
+    enrollment_date = serializers.DateTimeField(allow_null=True)
+
+
+mfa_status_representation = CompiledSerializer(MFAStatusSerializer, mapping=True)
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     """Enhanced serializer for user profile updates with comprehensive validation"""
+    # Declared explicitly so ModelSerializer does not add a UniqueValidator;
+    # uniqueness is enforced by the database in update()
+    email = serializers.EmailField(max_length=254, required=False)
     phone = serializers.CharField(
         source='profile.phone_number', 
         max_length=20, 
@@ -47,21 +92,13 @@ class UserProfileSerializer(serializers.ModelSerializer):
         required=False,
         allow_blank=True
     )
-    avatar = serializers.ImageField(
-        source='profile.avatar',
-        required=False,
-        allow_null=True
-    )
-    
     class Meta:
         model = User
-        fields = ['first_name', 'last_name', 'email', 'phone', 'bio', 'avatar']
+        # The avatar is uploaded separately, to me/avatar/ (AvatarView)
+        fields = ['first_name', 'last_name', 'email', 'phone', 'bio']
         
     def validate_email(self, value):
-        user = self.instance
-        if User.objects.filter(email=value).exclude(pk=user.pk).exists():
-            raise serializers.ValidationError("A user with this email already exists.")
-        return value
+        return User.objects.normalize_email(value)
     
     def validate_phone(self, value):
         if value and len(value) > 0:
@@ -87,20 +124,34 @@ class UserProfileSerializer(serializers.ModelSerializer):
         return value.strip()
     
     def update(self, instance, validated_data):
-        # Handle profile data separately
+        # Only the submitted fields are written, with one UPDATE per table.
+        # request.user may come from the cache, so its values are not compared.
+        # The profile comes with request.user (see AuthCacheService.get_user),
+        # so it is not queried again here or when the response is built.
         profile_data = validated_data.pop('profile', {})
         
-        # Update user fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        if validated_data:
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            try:
+                with transaction.atomic():
+                    instance.save(update_fields=list(validated_data))
+            except IntegrityError as e:
+                if not is_duplicate_email(e):
+                    raise
+                raise serializers.ValidationError({'email': ['A user with this email already exists.']})
         
-        # Update or create profile
         if profile_data:
-            profile, created = UserProfile.objects.get_or_create(user=instance)
+            try:
+                profile = instance.profile
+            except UserProfile.DoesNotExist:
+                profile = UserProfile(user=instance)
             for attr, value in profile_data.items():
                 setattr(profile, attr, value)
-            profile.save()
+            if profile._state.adding:
+                profile.save()
+            else:
+                profile.save(update_fields=[*profile_data, *profile.auto_now_fields()])
         
         return instance
 
@@ -149,10 +200,9 @@ class PasswordChangeSerializer(serializers.Serializer):
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """Serializer for user registration"""
-    email = serializers.EmailField(
-        required=True,
-        validators=[UniqueValidator(queryset=User.objects.all())]
-    )
+    # No UniqueValidator: create() attempts the INSERT once and maps the
+    # unique violation to the same validation error
+    email = serializers.EmailField(required=True, max_length=254)
     password = serializers.CharField(
         write_only=True, 
         required=True, 
@@ -171,20 +221,32 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"password": "Password fields didn't match."})
         return attrs
 
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
+
     def create(self, validated_data):
         validated_data.pop('password_confirm')
-        user = User.objects.create_user(**validated_data)
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(**validated_data)
+        except IntegrityError as e:
+            if not is_duplicate_email(e):
+                raise
+            raise serializers.ValidationError({'email': ['A user with this email already exists.']})
         return user
 
 
 class PasswordResetSerializer(serializers.Serializer):
-    """Serializer for password reset request"""
+    """
+    Serializer for password reset request.
+
+    Only the email format is validated here; account lookup happens in the
+    background task so the response never reveals whether the user exists.
+    """
     email = serializers.EmailField()
 
     def validate_email(self, value):
-        if not User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("No user found with this email address.")
-        return value
+        return User.objects.normalize_email(value)
 
 
 class PasswordResetConfirmSerializer(serializers.Serializer):
@@ -203,11 +265,44 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
         # Validate token
         from ..models import PasswordResetToken
         try:
-            token_obj = PasswordResetToken.objects.get(token=attrs['token'])
-            if not token_obj.is_valid():
+            # Only unused tokens can be confirmed; this lookup is served by pw_reset_token_active_idx
+            token_obj = PasswordResetToken.objects.select_related('user').get(
+                token=attrs['token'], used=False
+            )
+            if token_obj.is_expired():
                 raise serializers.ValidationError({"token": "Token is expired or already used."})
             attrs['token_obj'] = token_obj
         except PasswordResetToken.DoesNotExist:
             raise serializers.ValidationError({"token": "Invalid token."})
         
         return attrs
+
+
+class AuthEventSerializer(serializers.ModelSerializer):
+    """Read-only representation of an audit log entry"""
+    class Meta:
+        model = AuthEvent
+        fields = ['id', 'user', 'email', 'event_type', 'success', 'ip_address',
+                  'user_agent', 'details', 'created_at']
+        read_only_fields = fields
+
+
+class AuthEventQuerySerializer(serializers.Serializer):
+    """Validates the query-string filters of the audit event API"""
+    user = serializers.IntegerField(required=False, min_value=1)
+    email = serializers.EmailField(required=False)
+    ip = serializers.IPAddressField(required=False)
+    event_type = serializers.CharField(required=False, max_length=64)
+    success = serializers.BooleanField(required=False, allow_null=True)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
+
+    def validate(self, attrs):
+        if attrs.get('since') and attrs.get('until') and attrs['since'] >= attrs['until']:
+            raise serializers.ValidationError({'until': 'Must be later than since.'})
+        if attrs.get('success') is None:
+            attrs.pop('success', None)
+        return attrs
@@ -25,4 +25,9 @@ urlpatterns = [
     
     # User management
     path('me/', views.UserProfileView.as_view(), name='profile'),
+    path('me/avatar/', views.AvatarView.as_view(), name='avatar'),
+    
+    # Audit log (staff only)
+    path('audit/events/', views.AuthEventListView.as_view(), name='audit_events'),
+    path('audit/events/export/', views.AuthEventExportView.as_view(), name='audit_events_export'),
 ]
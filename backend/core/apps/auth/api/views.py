@@ -1,4 +1,7 @@
-from rest_framework import status, views, permissions
+from rest_framework import generics, status, views, permissions
+from rest_framework.pagination import CursorPagination
+from rest_framework.exceptions import ValidationError as DRFValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
@@ -6,28 +9,40 @@ from django_otp import devices_for_user
 from django_otp.plugins.otp_totp.models import TOTPDevice
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.template.defaultfilters import filesizeformat
 from django.core.exceptions import PermissionDenied, ValidationError
 from axes.exceptions import AxesBackendPermissionDenied
 import logging
-from .serializers import *
+from common.decorators import conditional_get
+from .serializers import (
+    AuthEventQuerySerializer, AuthEventSerializer, LoginSerializer, MFAVerifySerializer,
+    PasswordChangeSerializer, PasswordResetConfirmSerializer, PasswordResetSerializer,
+    UserProfileSerializer, UserRegistrationSerializer,
+    mfa_status_representation, user_representation,
+)
 from ..models import User, PasswordResetToken
-from ..utils.utils import log_auth_event, generate_backup_codes
-import qrcode
+from ..services.audit_service import AuditService
+from ..services.avatar_service import AvatarService, AvatarUploadHandler
+from ..services.cache_service import MFA_STATUS_PAYLOAD, PROFILE_PAYLOAD, AuthCacheService
+from ..services.outbox_service import OutboxService
+from ..utils.utils import log_auth_event, generate_backup_codes, get_client_ip, password_reset_dedup_key
 import base64
-from io import BytesIO
 import os
 from django.utils import timezone
 import jwt
 from django.conf import settings
-from datetime import timedelta
-import secrets
-import string
+from django.core.cache import cache
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+import json
 
 logger = logging.getLogger(__name__)
 
 @method_decorator(csrf_exempt, name='dispatch')
 class LoginView(TokenObtainPairView):
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'login'
     serializer_class = LoginSerializer
 
     def post(self, request, *args, **kwargs):
@@ -69,14 +84,9 @@ class LoginView(TokenObtainPairView):
                 'error_code': 'ACCOUNT_LOCKED'
             }, status=status.HTTP_429_TOO_MANY_REQUESTS)
             
-        except ValidationError as e:
+        except (ValidationError, DRFValidationError) as e:
             # Log failed attempt - axes middleware will handle counting failures
-            email = getattr(request.data, 'get', lambda x, default: default)('email', 'unknown')
-            try:
-                user = User.objects.get(email=email)
-                log_auth_event(user, 'login_failed', request, success=False)
-            except User.DoesNotExist:
-                logger.warning(f"Login attempt with non-existent email: {email}")
+            self._log_failed_login(request)
             
             return Response({
                 'detail': 'Invalid email or password.',
@@ -96,6 +106,16 @@ class LoginView(TokenObtainPairView):
                 'error_code': 'INTERNAL_ERROR'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def _log_failed_login(self, request):
+        """Record a failed login in the audit log"""
+        email = getattr(request.data, 'get', lambda x, default: default)('email', 'unknown')
+        try:
+            user = User.objects.get(email=User.objects.normalize_email(email))
+            log_auth_event(user, 'login_failed', request, success=False)
+        except User.DoesNotExist:
+            logger.warning(f"Login attempt with non-existent email: {email}")
+            log_auth_event(None, 'login_failed', request, success=False, details={'email': str(email)[:254]})
+
     def _complete_login(self, request, user, remember_me=False):
         # Generate tokens with custom expiry for remember_me
         refresh = RefreshToken.for_user(user)
@@ -113,7 +133,7 @@ class LoginView(TokenObtainPairView):
             'message': 'Login successful',
             'access': str(access),
             'refresh': str(refresh),
-            'user': UserSerializer(user).data
+            'user': user_representation(user)
         }
         
         response = Response(response_data, status=status.HTTP_200_OK)
@@ -134,6 +154,7 @@ class LoginView(TokenObtainPairView):
 @method_decorator(csrf_exempt, name='dispatch')
 class MFAVerifyView(views.APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'mfa_verify'
 
     def post(self, request):
         # Get MFA token from request data
@@ -206,7 +227,7 @@ class MFAVerifyView(views.APIView):
             'message': 'Login successful',
             'access': str(access),
             'refresh': str(refresh),
-            'user': UserSerializer(user).data
+            'user': user_representation(user)
         }
         
         response = Response(response_data, status=status.HTTP_200_OK)
@@ -229,10 +250,10 @@ class UserProfileView(views.APIView):
     """Enhanced user profile view with comprehensive update support"""
     permission_classes = [permissions.IsAuthenticated]
 
+    @conditional_get(lambda request: AuthCacheService.get_version(PROFILE_PAYLOAD, request.user.pk))
     def get(self, request):
         """Get current user profile data"""
-        serializer = UserSerializer(request.user)
-        return Response(serializer.data)
+        return Response(user_representation(request.user))
 
     def put(self, request):
         """Full profile update (replace all fields)"""
@@ -240,10 +261,9 @@ class UserProfileView(views.APIView):
         if serializer.is_valid():
             user = serializer.save()
             # Return updated user data
-            response_serializer = UserSerializer(user)
             log_auth_event(user, 'profile_updated', request, success=True, 
                          details={'updated_fields': list(request.data.keys())})
-            return Response(response_serializer.data)
+            return Response(user_representation(user))
         
         log_auth_event(request.user, 'profile_update_failed', request, success=False, 
                       details={'errors': serializer.errors})
@@ -255,10 +275,9 @@ class UserProfileView(views.APIView):
         if serializer.is_valid():
             user = serializer.save()
             # Return updated user data
-            response_serializer = UserSerializer(user)
             log_auth_event(user, 'profile_updated', request, success=True, 
                          details={'updated_fields': list(request.data.keys())})
-            return Response(response_serializer.data)
+            return Response(user_representation(user))
         
         log_auth_event(request.user, 'profile_update_failed', request, success=False, 
                       details={'errors': serializer.errors})
@@ -272,13 +291,12 @@ class PasswordChangeView(views.APIView):
         serializer = PasswordChangeSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             user = request.user
-            user.set_password(serializer.validated_data['new_password'])
-            user.must_change_password = False
-            user.last_password_change = timezone.now()
-            user.save()
-
-            # Log password change
-            log_auth_event(user, 'password_change', request, success=True)
+            with transaction.atomic():
+                user.set_password(serializer.validated_data['new_password'])
+                user.must_change_password = False
+                user.last_password_change = timezone.now()
+                user.save()
+                OutboxService.publish('password.changed', user, ip_address=get_client_ip(request))
 
             return Response({'message': 'Password changed successfully'})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -306,7 +324,9 @@ class MFAEnrollmentView(views.APIView):
             confirmed=False
         )
 
-        # Generate QR code
+        # Generate QR code (imported here so qrcode and PIL are only loaded when someone enrolls)
+        import qrcode
+        from io import BytesIO
         qr = qrcode.QRCode(version=1, box_size=10, border=5)
         qr.add_data(f"otpauth://totp/{user.email}?secret={base32_secret}&issuer=Gradvy")
         qr.make(fit=True)
@@ -343,14 +363,13 @@ class MFAEnrollmentView(views.APIView):
         is_valid = device.verify_token(code)
 
         if is_valid:
-            device.confirmed = True
-            device.save()
+            with transaction.atomic():
+                device.confirmed = True
+                device.save()
 
-            request.user.mfa_enrolled = True
-            request.user.save()
-            
-            # Log MFA enrollment
-            log_auth_event(request.user, 'mfa_enroll', request, success=True)
+                request.user.mfa_enrolled = True
+                request.user.save()
+                OutboxService.publish('mfa.enabled', request.user, ip_address=get_client_ip(request))
 
             return Response({'message': 'MFA enrolled successfully'})
 
@@ -378,27 +397,19 @@ class MFADisableView(views.APIView):
     def post(self, request):
         user = request.user
         try:
-            # Delete all confirmed TOTP devices for the user
-            TOTPDevice.objects.filter(user=user, confirmed=True).delete()
-            
-            # Set mfa_enrolled to False
-            user.mfa_enrolled = False
-            user.save()
+            with transaction.atomic():
+                # Delete all confirmed TOTP devices for the user
+                TOTPDevice.objects.filter(user=user, confirmed=True).delete()
+                
+                # Set mfa_enrolled to False
+                user.mfa_enrolled = False
+                user.save()
 
-            # Trigger background task to clean up all MFA-related data
-            from ..tasks.tasks import cleanup_user_mfa_data
-            
-            # Check if cleanup should be immediate or delayed
-            cleanup_immediate = getattr(settings, 'MFA_CLEANUP_ON_DISABLE_IMMEDIATE', True)
-            if cleanup_immediate:
-                # Run cleanup immediately
-                cleanup_user_mfa_data.delay(user.id)
-            else:
-                # Delay cleanup by 5 minutes to allow for any recovery actions
-                cleanup_user_mfa_data.apply_async(args=[user.id], countdown=300)
-
-            # Log MFA disable event
-            log_auth_event(user, 'mfa_disable', request, success=True)
+                OutboxService.publish('mfa.disabled', user, ip_address=get_client_ip(request))
+                # Backup codes and unconfirmed devices are cleaned up by the outbox
+                # worker, either right away or after 5 minutes to allow for recovery
+                cleanup_immediate = getattr(settings, 'MFA_CLEANUP_ON_DISABLE_IMMEDIATE', True)
+                OutboxService.publish('mfa.cleanup', user, delay_seconds=0 if cleanup_immediate else 300)
 
             return Response({'message': 'MFA disabled successfully'}, status=status.HTTP_200_OK)
         except Exception as e:
@@ -470,30 +481,60 @@ class MFABackupCodesView(views.APIView):
             return Response({'error': 'Failed to regenerate backup codes'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@method_decorator(csrf_exempt, name='dispatch')
+class AvatarView(views.APIView):
+    """Upload (multipart field 'avatar') or remove the current user's avatar"""
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def initialize_request(self, request, *args, **kwargs):
+        # Before authentication: SessionAuthentication's CSRF check parses the body
+        self.upload_handler = AvatarUploadHandler(request)
+        request.upload_handlers = [self.upload_handler]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def post(self, request):
+        """Store the image and make it the avatar; thumbnails follow in the background"""
+        upload = request.FILES.get('avatar')
+        if self.upload_handler.too_large:
+            return Response({
+                'detail': f"Avatar must be at most {filesizeformat(self.upload_handler.max_bytes)}",
+                'error_code': 'AVATAR_TOO_LARGE'
+            }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if upload is None:
+            return Response({
+                'detail': 'No avatar file provided',
+                'error_code': 'AVATAR_REQUIRED'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            avatar_urls = AvatarService.set_avatar(request.user, upload)
+        except ValueError as e:
+            return Response({'detail': str(e), 'error_code': 'INVALID_AVATAR'}, status=status.HTTP_400_BAD_REQUEST)
+
+        log_auth_event(request.user, 'profile_updated', request, success=True, details={'updated_fields': ['avatar']})
+        return Response({'avatar': avatar_urls}, status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        """Remove the avatar"""
+        AvatarService.remove_avatar(request.user)
+        log_auth_event(request.user, 'profile_updated', request, success=True, details={'updated_fields': ['avatar']})
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class MFAStatusView(views.APIView):
     """Get current MFA status and settings for the user"""
     permission_classes = [permissions.IsAuthenticated]
 
+    @conditional_get(lambda request: AuthCacheService.get_version(MFA_STATUS_PAYLOAD, request.user.pk))
     def get(self, request):
         """Get comprehensive MFA status"""
         user = request.user
         
         try:
-            # Check for active TOTP devices
-            totp_devices = TOTPDevice.objects.filter(user=user, confirmed=True)
-            unused_backup_codes = user.backup_codes.filter(used=False)
-            
-            status_data = {
-                'is_mfa_enabled': user.mfa_enrolled,
-                'has_totp_device': totp_devices.exists(),
-                'totp_device_count': totp_devices.count(),
-                'has_backup_codes': unused_backup_codes.exists(),
-                'backup_codes_count': unused_backup_codes.count(),
-                'enrollment_date': totp_devices.first().created_at if totp_devices.exists() else None,
-            }
-            
-            return Response(status_data, status=status.HTTP_200_OK)
+            status_data = AuthCacheService.get_mfa_status(user)
+            return Response(mfa_status_representation(status_data), status=status.HTTP_200_OK)
             
         except Exception as e:
             logger.error(f"Error getting MFA status for user {user.email}: {str(e)}")
@@ -503,12 +544,18 @@ class MFAStatusView(views.APIView):
 class UserRegistrationView(views.APIView):
     """User registration endpoint"""
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'register'
 
     def post(self, request):
         serializer = UserRegistrationSerializer(data=request.data)
         
         if serializer.is_valid():
-            user = serializer.save()
+            with transaction.atomic():
+                user = serializer.save()
+                OutboxService.publish(
+                    'user.registered', user,
+                    first_name=user.first_name, ip_address=get_client_ip(request),
+                )
             
             # Generate tokens for immediate login after registration
             refresh = RefreshToken.for_user(user)
@@ -516,7 +563,7 @@ class UserRegistrationView(views.APIView):
             refresh_token = str(refresh)
             
             # Get user data
-            user_data = UserSerializer(user).data
+            user_data = user_representation(user)
             
             response_data = {
                 'message': 'Registration successful',
@@ -537,9 +584,6 @@ class UserRegistrationView(views.APIView):
                 samesite='Lax'
             )
             
-            # Log successful registration
-            log_auth_event(user, 'register', request, success=True)
-            
             return response
         
         return Response({
@@ -549,8 +593,17 @@ class UserRegistrationView(views.APIView):
 
 
 class PasswordResetView(views.APIView):
-    """Password reset request endpoint - creates reset tokens"""
+    """
+    Password reset request endpoint.
+
+    Validates the email format and hands the request to a background task
+    that does the user lookup, token creation and email delivery. The
+    response is identical (and equally fast) whether or not the account
+    exists, and repeated requests for the same email within
+    ``PASSWORD_RESET_REQUEST_DEDUP_SECONDS`` are collapsed into one job.
+    """
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'password_reset'
 
     def post(self, request):
         serializer = PasswordResetSerializer(data=request.data)
@@ -558,56 +611,39 @@ class PasswordResetView(views.APIView):
         if serializer.is_valid():
             email = serializer.validated_data['email']
             
-            try:
-                user = User.objects.get(email=email)
-                
-                # Clean up any existing tokens for this user
-                PasswordResetToken.objects.filter(user=user).delete()
-                
-                # Generate secure token
-                token = self._generate_reset_token()
-                
-                # Create new reset token
-                reset_token = PasswordResetToken.objects.create(
-                    user=user,
-                    token=token,
-                    expires_at=timezone.now() + timedelta(hours=1)  # Token expires in 1 hour
-                )
-                
-                # Log the reset request
-                log_auth_event(user, 'password_reset_requested', request, success=True)
-                
-                # TODO: Send email with token - for now return token for development
-                # In production, this would send an email with a link containing the token
-                return Response({
-                    'message': f'Password reset instructions have been sent to {email}',
-                    'token': token,  # Remove this in production - only for development testing
-                    'expires_at': reset_token.expires_at,
-                    'note': 'Email functionality will be implemented. Token provided for development testing.'
-                }, status=status.HTTP_200_OK)
-                
-            except User.DoesNotExist:
-                # Don't reveal if user exists - return same message
-                return Response({
-                    'message': f'Password reset instructions have been sent to {email}',
-                    'note': 'If this email exists in our system, you will receive reset instructions.'
-                }, status=status.HTTP_200_OK)
+            if self._claim_request_slot(email):
+                from ..tasks.tasks import process_password_reset_request
+                try:
+                    process_password_reset_request.delay(email)
+                except Exception as e:
+                    # Never surface broker problems (or their timing) to the caller
+                    logger.error(f"Failed to enqueue password reset request: {str(e)}")
+            
+            return Response({
+                'message': 'If an account exists for this email, password reset instructions have been sent.'
+            }, status=status.HTTP_200_OK)
         
         return Response({
             'message': 'Password reset failed',
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    def _generate_reset_token(self):
-        """Generate a secure random token for password reset"""
-        # Generate a secure random token (64 characters)
-        alphabet = string.ascii_letters + string.digits
-        return ''.join(secrets.choice(alphabet) for _ in range(64))
+    def _claim_request_slot(self, email):
+        """Return True if no reset was requested for this email within the dedup window"""
+        window = getattr(settings, 'PASSWORD_RESET_REQUEST_DEDUP_SECONDS', 300)
+        if window <= 0:
+            return True
+        try:
+            return cache.add(password_reset_dedup_key(email), True, timeout=window)
+        except Exception as e:
+            logger.warning(f"Password reset dedup check failed: {str(e)}")
+            return True
 
 
 class PasswordResetConfirmView(views.APIView):
     """Password reset confirmation endpoint - resets password using token"""
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'password_reset'
 
     def post(self, request):
         serializer = PasswordResetConfirmSerializer(data=request.data)
@@ -618,20 +654,23 @@ class PasswordResetConfirmView(views.APIView):
             user = token_obj.user
             
             try:
-                # Update user password
-                user.set_password(new_password)
-                user.must_change_password = False
-                user.last_password_change = timezone.now()
-                user.save()
-                
-                # Mark token as used
-                token_obj.mark_as_used()
-                
-                # Log successful password reset
-                log_auth_event(user, 'password_reset_confirmed', request, success=True)
-                
-                # Clean up any other reset tokens for this user
-                PasswordResetToken.objects.filter(user=user, used=False).delete()
+                with transaction.atomic():
+                    # Update user password
+                    user.set_password(new_password)
+                    user.must_change_password = False
+                    user.last_password_change = timezone.now()
+                    user.save()
+                    
+                    # Mark token as used
+                    token_obj.mark_as_used()
+                    
+                    # Clean up any other reset tokens for this user
+                    PasswordResetToken.objects.filter(user=user, used=False).delete()
+                    
+                    OutboxService.publish(
+                        'password.changed', user,
+                        audit_event='password_reset_confirmed', ip_address=get_client_ip(request),
+                    )
                 
                 return Response({
                     'message': 'Password has been reset successfully. You can now login with your new password.',
@@ -649,4 +688,59 @@ class PasswordResetConfirmView(views.APIView):
         return Response({
             'message': 'Password reset failed',
             'errors': serializer.errors
-        }, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AuthEventCursorPagination(CursorPagination):
+    """
+    Keyset pagination for audit events.
+
+    Pages continue from the last created_at seen instead of using OFFSET, and
+    no COUNT(*) is run, so page cost stays flat however large the table is.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class AuthEventListView(generics.ListAPIView):
+    """
+    Staff-only audit event search.
+
+    Filters (all optional): user, email, ip, event_type, success, since, until.
+    Without ``since`` only the last AUDIT_QUERY_DEFAULT_DAYS days are searched.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    serializer_class = AuthEventSerializer
+    pagination_class = AuthEventCursorPagination
+
+    def get_queryset(self):
+        params = AuthEventQuerySerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        return AuditService.query(**params.validated_data)
+
+
+class AuthEventExportView(views.APIView):
+    """
+    Staff-only NDJSON export of audit events.
+
+    Accepts the same filters as AuthEventListView and streams one JSON object
+    per line from a server-side cursor, so memory use does not grow with the
+    size of the export.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    fields = ('id', 'user_id', 'email', 'event_type', 'success', 'ip_address',
+              'user_agent', 'details', 'created_at')
+
+    def get(self, request):
+        params = AuthEventQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        queryset = AuditService.query(**params.validated_data).values(*self.fields)
+
+        log_auth_event(request.user, 'audit_export', request, success=True, details=params.validated_data)
+
+        rows = (json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in queryset.iterator(chunk_size=2000))
+        response = StreamingHttpResponse(rows, content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="auth-events.ndjson"'
+        return response
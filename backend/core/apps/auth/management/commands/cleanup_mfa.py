@@ -41,7 +41,7 @@ class Command(BaseCommand):
                 
         elif user_email:
             try:
-                user = User.objects.get(email=user_email)
+                user = User.objects.get(email=User.objects.normalize_email(user_email))
                 self.stdout.write(f"Cleaning up MFA data for user: {user.email}")
                 result = cleanup_user_mfa_data(user.id)
                 self.stdout.write(self.style.SUCCESS(f"Success: {result}"))
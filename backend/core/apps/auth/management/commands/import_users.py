@@ -0,0 +1,249 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import DatabaseError, IntegrityError, transaction
+from apps.auth.models import UserProfile
+from apps.auth.services.user_service import UserService
+
+USER_FIELDS = ('first_name', 'last_name')
+PROFILE_FIELDS = ('phone_number', 'bio', 'language', 'timezone')
+BOOLEAN_FIELDS = ('is_active', 'must_change_password')
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+
+
+def _init_hashing_worker():
+    """Make sure Django is configured in pool processes started with 'spawn'."""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _hash_password(raw_password):
+    """Hash one password; rows without a password get an unusable one."""
+    return make_password(raw_password or None)
+
+
+def _check_length(model, field, value):
+    """Reject a value longer than the model field allows."""
+    max_length = model._meta.get_field(field).max_length
+    if max_length is not None and len(value) > max_length:
+        raise ValueError(f"{field} must be at most {max_length} characters")
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk import users from a CSV or JSONL file. Passwords are hashed across a '
+        'process pool and users/profiles are inserted with bulk_create in batches.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='CSV (with header row) or JSONL file to import')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            help='Input format (default: detected from the file extension)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per INSERT batch and transaction (default: 1000)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processes used for password hashing (default: CPU count)',
+        )
+        parser.add_argument(
+            '--send-welcome',
+            action='store_true',
+            help='Queue a welcome email for every imported user',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate and hash every row without writing to the database',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"File not found: {path}")
+
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        batch_size = max(1, options['batch_size'])
+        workers = max(1, options['workers'])
+        self.dry_run = options['dry_run']
+        self.send_welcome = options['send_welcome']
+
+        self.created = 0
+        self.failed = 0
+        self.seen_emails = set()
+        processed = 0
+        started = time.perf_counter()
+
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_hashing_worker) if workers > 1 else None
+        try:
+            rows = self._read_rows(path, fmt)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                self._import_batch(batch, executor, workers)
+                processed += len(batch)
+
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"Processed {processed} rows: {self.created} created, {self.failed} failed "
+                    f"({processed / elapsed:.0f} rows/s)"
+                )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        elapsed = time.perf_counter() - started
+        summary = (
+            f"{'Validated' if self.dry_run else 'Imported'} {self.created} users from {processed} rows "
+            f"in {elapsed:.2f}s ({processed / elapsed if elapsed else 0:.0f} rows/s), {self.failed} failed"
+        )
+        style = self.style.SUCCESS if not self.failed else self.style.WARNING
+        self.stdout.write(style(summary))
+
+    def _read_rows(self, path, fmt):
+        """Yield (line_number, row_dict) without loading the whole file."""
+        with open(path, newline='', encoding='utf-8') as handle:
+            if fmt == 'csv':
+                reader = csv.DictReader(handle)
+                for row in reader:
+                    yield reader.line_num, row
+            else:
+                for line_no, line in enumerate(handle, start=1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield line_no, {'__error__': f"Invalid JSON: {e}"}
+                        continue
+                    if not isinstance(row, dict):
+                        row = {'__error__': 'Each line must be a JSON object'}
+                    yield line_no, row
+
+    def _import_batch(self, batch, executor, workers):
+        User = get_user_model()
+        pending = []
+        for line_no, row in batch:
+            try:
+                data, raw_password = self._clean_row(row)
+            except ValueError as e:
+                self._report(line_no, row.get('email'), str(e))
+                continue
+            if data['email'] in self.seen_emails:
+                self._report(line_no, data['email'], 'Duplicate email in input file')
+                continue
+            self.seen_emails.add(data['email'])
+            pending.append((line_no, data, raw_password))
+
+        if not pending:
+            return
+
+        existing = set(
+            User.objects.filter(email__in=[data['email'] for _, data, _ in pending])
+            .values_list('email', flat=True)
+        )
+        if existing:
+            for line_no, data, _ in pending:
+                if data['email'] in existing:
+                    self._report(line_no, data['email'], 'A user with this email already exists')
+            pending = [item for item in pending if item[1]['email'] not in existing]
+
+        raw_passwords = [raw_password for _, _, raw_password in pending]
+        if executor is not None:
+            chunksize = max(1, len(raw_passwords) // (workers * 4))
+            hashed = list(executor.map(_hash_password, raw_passwords, chunksize=chunksize))
+        else:
+            hashed = [_hash_password(raw_password) for raw_password in raw_passwords]
+        for (_, data, _), password in zip(pending, hashed):
+            data['password'] = password
+
+        if self.dry_run:
+            self.created += len(pending)
+            return
+
+        users = self._insert(pending)
+        if users and self.send_welcome:
+            from apps.auth.services.email_service import EmailService
+            EmailService.queue([
+                EmailService.build_message('welcome', user.email, first_name=user.first_name)
+                for user in users
+            ])
+
+    def _insert(self, pending):
+        """Insert a batch in one transaction, isolating bad rows if it fails."""
+        try:
+            users = UserService.bulk_create_users([data for _, data, _ in pending])
+            self.created += len(users)
+            return users
+        except DatabaseError:
+            pass
+
+        # Something in the batch conflicts (e.g. a concurrent signup) or is
+        # rejected by the database; retry row by row
+        users = []
+        for line_no, data, _ in pending:
+            try:
+                with transaction.atomic():
+                    users.extend(UserService.bulk_create_users([data]))
+                self.created += 1
+            except DatabaseError as e:
+                self._report(line_no, data['email'], f"Database error: {e}")
+        return users
+
+    def _clean_row(self, row):
+        """Validate one input row and split it into user data and raw password."""
+        if '__error__' in row:
+            raise ValueError(row['__error__'])
+
+        User = get_user_model()
+        email = (row.get('email') or '').strip()
+        if not email:
+            raise ValueError('Missing email')
+        try:
+            validate_email(email)
+        except ValidationError:
+            raise ValueError('Invalid email address')
+
+        data = {'email': User.objects.normalize_email(email)}
+        for field in USER_FIELDS:
+            value = (row.get(field) or '').strip()
+            _check_length(User, field, value)
+            data[field] = value
+        for field in BOOLEAN_FIELDS:
+            value = row.get(field)
+            if value not in (None, ''):
+                data[field] = value if isinstance(value, bool) else str(value).strip().lower() in TRUE_VALUES
+
+        profile = {}
+        for field in PROFILE_FIELDS:
+            value = row.get(field)
+            if value not in (None, ''):
+                profile[field] = str(value).strip()
+                _check_length(UserProfile, field, profile[field])
+        data['profile'] = profile
+
+        return data, row.get('password') or None
+
+    def _report(self, line_no, email, reason):
+        self.failed += 1
+        self.stderr.write(f"Line {line_no}: {email or '<no email>'}: {reason}")
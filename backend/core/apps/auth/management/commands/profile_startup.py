@@ -0,0 +1,143 @@
+import json
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter started with -X importtime. Phase markers go to
+# stderr so they interleave with the import-time lines in order.
+CHILD_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+method, path, host = sys.argv[1:4]
+def mark(phase):
+    sys.stderr.write(f"# phase: {phase}\\n")
+    sys.stderr.flush()
+mark('wsgi')
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+loaded = time.perf_counter()
+mark('first_request')
+from io import BytesIO
+environ = {
+    'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': '',
+    'SERVER_NAME': host, 'SERVER_PORT': '80', 'HTTP_HOST': host, 'REMOTE_ADDR': '127.0.0.1',
+    'wsgi.input': BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+    'wsgi.version': (1, 0), 'wsgi.multithread': False, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+}
+status = []
+body = b''.join(application(environ, lambda s, h, e=None: status.append(s)))
+answered = time.perf_counter()
+mark('end')
+print(json.dumps({
+    'wsgi_ms': (loaded - started) * 1000,
+    'first_request_ms': (answered - loaded) * 1000,
+    'status': status[0] if status else None,
+}))
+"""
+
+
+def parse_importtime(lines):
+    """
+    Build import trees from ``-X importtime`` output, grouped by phase.
+
+    Returns:
+        dict: phase name -> list of root nodes, where each node is a dict
+        with name, self_ms, total_ms and children
+    """
+    phases = {}
+    phase = 'interpreter'
+    pending = {}
+    for line in lines:
+        if line.startswith('# phase: '):
+            phases[phase] = pending.get(0, [])
+            phase, pending = line[len('# phase: '):].strip(), {}
+            continue
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, total_us, raw_name = line.split(':', 1)[1].split('|', 2)
+        stripped = raw_name.lstrip(' ')
+        level = (len(raw_name) - len(stripped) - 1) // 2
+        # Children are printed before their parent, one level deeper
+        node = {
+            'name': stripped.strip(),
+            'self_ms': int(self_us) / 1000,
+            'total_ms': int(total_us) / 1000,
+            'children': pending.pop(level + 1, []),
+        }
+        pending.setdefault(level, []).append(node)
+    phases[phase] = pending.get(0, [])
+    return phases
+
+
+class Command(BaseCommand):
+    help = 'Profile process start: import-time tree, app loading and the first request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/auth/mfa/status/', help='Path of the first request')
+        parser.add_argument('--method', default='GET')
+        parser.add_argument('--host', default='localhost', help='Host header (must be in ALLOWED_HOSTS)')
+        parser.add_argument('--min-ms', type=float, default=5.0, help='Hide imports cheaper than this')
+        parser.add_argument('--depth', type=int, default=3, help='Levels of the import tree to show')
+        parser.add_argument('--runs', type=int, default=3, help='Report the fastest of this many runs')
+        parser.add_argument(
+            '--budget-ms', type=float, default=getattr(settings, 'STARTUP_BUDGET_MS', None),
+            help='Fail if app loading plus the first request takes longer (default: STARTUP_BUDGET_MS)',
+        )
+        parser.add_argument('--json', action='store_true', help='Print the full result as JSON')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings'))
+
+        best = None
+        for _ in range(max(1, options['runs'])):
+            proc = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT, options['method'], options['path'], options['host']],
+                capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+            )
+            if proc.returncode != 0:
+                raise CommandError(f"Profiled process failed:\n{proc.stderr[-2000:]}")
+            timings = json.loads(proc.stdout.strip().splitlines()[-1])
+            timings['total_ms'] = timings['wsgi_ms'] + timings['first_request_ms']
+            if best is None or timings['total_ms'] < best[0]['total_ms']:
+                best = (timings, proc.stderr.splitlines())
+
+        timings, stderr = best
+        phases = parse_importtime(stderr)
+        result = {
+            'settings': env['DJANGO_SETTINGS_MODULE'],
+            'path': options['path'],
+            **{key: round(value, 1) if isinstance(value, float) else value for key, value in timings.items()},
+            'imports_ms': {
+                phase: round(sum(node['total_ms'] for node in roots), 1) for phase, roots in phases.items()
+            },
+        }
+
+        if options['json']:
+            result['import_tree'] = phases
+            self.stdout.write(json.dumps(result, indent=2))
+        else:
+            self.stdout.write(
+                f"App loading (get_wsgi_application): {result['wsgi_ms']} ms\n"
+                f"First request {options['method']} {options['path']} ({result['status']}): "
+                f"{result['first_request_ms']} ms\n"
+                f"Total: {result['total_ms']} ms"
+            )
+            for phase in ('wsgi', 'first_request'):
+                roots = sorted(phases.get(phase, []), key=lambda node: -node['total_ms'])
+                self.stdout.write(f"\nImports during {phase} ({result['imports_ms'].get(phase, 0)} ms):")
+                self._write_tree(roots, options['min_ms'], options['depth'], 1)
+
+        budget = options['budget_ms']
+        if budget is not None and timings['total_ms'] > budget:
+            raise CommandError(f"Startup took {timings['total_ms']:.1f} ms, over the {budget:.0f} ms budget")
+
+    def _write_tree(self, nodes, min_ms, depth, level):
+        for node in nodes:
+            if node['total_ms'] < min_ms:
+                continue
+            self.stdout.write(f"{'  ' * level}{node['total_ms']:8.1f} ms  {node['name']}")
+            if level < depth:
+                children = sorted(node['children'], key=lambda child: -child['total_ms'])
+                self._write_tree(children, min_ms, depth, level + 1)
@@ -14,6 +14,27 @@ class UserManager(BaseUserManager):
     Provides methods to create users and superusers with email as the unique identifier
     instead of username.
     """
+    @classmethod
+    def normalize_email(cls, email: Optional[str]) -> str:
+        """
+        Normalize an email address for storage and lookups.
+        
+        The whole address is stripped and lowercased, so exact lookups match
+        regardless of how the address was typed and agree with the
+        lower(email) unique constraint on User.
+        
+        Args:
+            email (Optional[str]): Email address as entered
+            
+        Returns:
+            str: Normalized email address ('' for None)
+        """
+        return super().normalize_email(email or '').strip().lower()
+    
+    def get_by_natural_key(self, username: str) -> 'User':
+        """Look up a user by email, ignoring case (used by ModelBackend)."""
+        return self.get(**{self.model.USERNAME_FIELD: self.normalize_email(username)})
+    
     def create_user(self, email: str, password: Optional[str] = None, **extra_fields: Any) -> 'User':
         """
         Create and return a regular user with the given email and password.
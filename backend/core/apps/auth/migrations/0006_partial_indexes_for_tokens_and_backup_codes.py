@@ -0,0 +1,66 @@
+# Replaces redundant indexes on BackupCode and PasswordResetToken with partial
+# indexes that match the real query patterns. On PostgreSQL indexes are built
+# and dropped with CREATE/DROP INDEX CONCURRENTLY so the tables stay writable
+# while the migration runs, which is why the migration is non-atomic. Other
+# databases get plain CREATE/DROP INDEX.
+
+from django.db import migrations, models
+
+# New indexes first, so the old ones are only dropped once a replacement exists
+NEW_INDEXES = [
+    ('backupcode', models.Index(condition=models.Q(('used', False)), fields=['user'], include=('code',), name='backup_code_unused_idx')),
+    ('backupcode', models.Index(condition=models.Q(('used', True)), fields=['used_at'], name='backup_code_used_at_idx')),
+    ('passwordresettoken', models.Index(condition=models.Q(('used', False)), fields=['token'], include=('user', 'expires_at'), name='pw_reset_token_active_idx')),
+]
+
+OLD_INDEXES = [
+    # (user, used) is superseded by the FK index plus backup_code_unused_idx
+    ('backupcode', models.Index(fields=['user', 'used'], name='accounts_ba_user_id_d89e44_idx')),
+    # Duplicates the unique constraint on code
+    ('backupcode', models.Index(fields=['code'], name='accounts_ba_code_1ef65d_idx')),
+    # Duplicates the FK index on user_id
+    ('passwordresettoken', models.Index(fields=['user'], name='accounts_pa_user_id_842a67_idx')),
+    # Duplicates the unique constraint on token
+    ('passwordresettoken', models.Index(fields=['token'], name='accounts_pa_token_3e0820_idx')),
+]
+
+
+def _index_options(schema_editor):
+    return {'concurrently': True} if schema_editor.connection.vendor == 'postgresql' else {}
+
+
+def swap_indexes(apps, schema_editor):
+    options = _index_options(schema_editor)
+    for model_name, index in NEW_INDEXES:
+        schema_editor.add_index(apps.get_model('gradvy_auth', model_name), index, **options)
+    for model_name, index in OLD_INDEXES:
+        schema_editor.remove_index(apps.get_model('gradvy_auth', model_name), index, **options)
+
+
+def restore_indexes(apps, schema_editor):
+    options = _index_options(schema_editor)
+    for model_name, index in OLD_INDEXES:
+        schema_editor.add_index(apps.get_model('gradvy_auth', model_name), index, **options)
+    for model_name, index in reversed(NEW_INDEXES):
+        schema_editor.remove_index(apps.get_model('gradvy_auth', model_name), index, **options)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('gradvy_auth', '0005_userprofile_bio'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                *(migrations.AddIndex(model_name=model_name, index=index.clone()) for model_name, index in NEW_INDEXES),
+                *(migrations.RemoveIndex(model_name=model_name, name=index.name) for model_name, index in OLD_INDEXES),
+            ],
+            database_operations=[
+                migrations.RunPython(swap_indexes, restore_indexes),
+            ],
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.3 on 2026-10-19 02:18
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def lowercase_emails(apps, schema_editor):
+    """Lowercase stored emails so they match UserManager.normalize_email()."""
+    User = apps.get_model('gradvy_auth', 'User')
+    conflicts = list(
+        User.objects.annotate(email_lower=Lower('email'))
+        .values('email_lower')
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+        .values_list('email_lower', flat=True)
+    )
+    if conflicts:
+        raise RuntimeError(
+            "Cannot add the case-insensitive email constraint: these addresses belong to "
+            f"more than one user and must be merged first: {', '.join(conflicts)}"
+        )
+    User.objects.exclude(email=Lower('email')).update(email=Lower('email'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('gradvy_auth', '0006_partial_indexes_for_tokens_and_backup_codes'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='user_email_lower_unique', violation_error_message='A user with this email already exists.'),
+        ),
+        # The constraint above makes the column's own UNIQUE redundant
+        migrations.AlterField(
+            model_name='user',
+            name='email',
+            field=models.EmailField(db_index=True, max_length=254, verbose_name='Email Address'),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Creates the audit table. On PostgreSQL it is declared PARTITION BY RANGE
+# (created_at) with a DEFAULT partition; monthly partitions are created ahead
+# of time and dropped after the retention window by the
+# maintain_audit_partitions task. Other databases get a plain table.
+# The primary key is (id, created_at) because PostgreSQL requires the
+# partition key in every unique constraint; id alone is still unique since it
+# comes from one sequence.
+
+import datetime
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+PARTITIONED_TABLE_SQL = """
+CREATE TABLE accounts_auth_event (
+    id bigserial NOT NULL,
+    user_id bigint NULL,
+    email varchar(254) NOT NULL,
+    event_type varchar(64) NOT NULL,
+    success boolean NOT NULL,
+    ip_address inet NULL,
+    user_agent varchar(255) NOT NULL,
+    details jsonb NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+CREATE TABLE accounts_auth_event_default PARTITION OF accounts_auth_event DEFAULT;
+"""
+
+# Partitions created with the table; later ones come from the maintenance task
+INITIAL_PARTITION_MONTHS = 3
+
+
+def create_initial_partitions(schema_editor):
+    # Kept local so the migration does not depend on application code
+    month = django.utils.timezone.now().date().replace(day=1)
+    for _ in range(INITIAL_PARTITION_MONTHS):
+        next_month = (month.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        schema_editor.execute(
+            f"CREATE TABLE accounts_auth_event_y{month.year}m{month.month:02d} "
+            f"PARTITION OF accounts_auth_event FOR VALUES FROM (%s) TO (%s)",
+            params=[month, next_month],
+        )
+        month = next_month
+
+
+def create_auth_event_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.create_model(apps.get_model('gradvy_auth', 'AuthEvent'))
+        return
+    schema_editor.execute(PARTITIONED_TABLE_SQL)
+    create_initial_partitions(schema_editor)
+
+
+def drop_auth_event_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.delete_model(apps.get_model('gradvy_auth', 'AuthEvent'))
+        return
+    # Dropping the parent drops every partition
+    schema_editor.execute("DROP TABLE accounts_auth_event")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gradvy_auth', '0008_outboxevent'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='AuthEvent',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('email', models.CharField(blank=True, max_length=254)),
+                        ('event_type', models.CharField(max_length=64)),
+                        ('success', models.BooleanField(default=True)),
+                        ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                        ('user_agent', models.CharField(blank=True, max_length=255)),
+                        ('details', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                        ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                        ('user', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='auth_events', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'verbose_name': 'Auth Event',
+                        'verbose_name_plural': 'Auth Events',
+                        'db_table': 'accounts_auth_event',
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_auth_event_table, drop_auth_event_table),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.3 on 2026-10-19 02:24
+
+# On PostgreSQL accounts_auth_event is partitioned, and CREATE INDEX on the
+# parent builds the index on every partition (CONCURRENTLY is not supported
+# there). That is fine right after 0009; on a table that already holds a lot
+# of events, build each partition's index CONCURRENTLY first and the parent
+# CREATE INDEX will attach them instead of rebuilding.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gradvy_auth', '0009_authevent'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='authevent',
+            index=models.Index(fields=['user', '-created_at'], name='auth_event_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='authevent',
+            index=models.Index(fields=['email', '-created_at'], name='auth_event_email_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='authevent',
+            index=models.Index(fields=['ip_address', '-created_at'], name='auth_event_ip_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='authevent',
+            index=models.Index(fields=['event_type', '-created_at'], name='auth_event_type_time_idx'),
+        ),
+    ]
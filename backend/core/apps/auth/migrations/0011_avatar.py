@@ -0,0 +1,43 @@
+# Generated by Django 5.1.3 on 2026-10-19 03:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gradvy_auth', '0010_auth_event_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Avatar',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('format', models.CharField(max_length=10)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('size', models.PositiveIntegerField()),
+                ('files', models.JSONField(default=dict)),
+                ('urls', models.JSONField(default=dict)),
+                ('thumbnails_ready', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Avatar',
+                'verbose_name_plural': 'Avatars',
+                'db_table': 'accounts_avatar',
+            },
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='avatar_urls',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='avatar',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='profiles', to='gradvy_auth.avatar'),
+        ),
+    ]
@@ -7,12 +7,41 @@ for the authentication system with MFA support.
 
 from typing import Optional
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
+from common.mixins import DirtyFieldsMixin
 from .managers import UserManager
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+def delete_in_batches(queryset, batch_size: int = 5000) -> int:
+    """
+    Delete the rows matched by ``queryset`` in chunks of ``batch_size``.
+    
+    Each chunk is a short DELETE ... WHERE id IN (...) statement, so purging
+    a large backlog never holds long row locks or builds one huge transaction.
+    
+    Args:
+        queryset (QuerySet): Rows to delete
+        batch_size (int): Maximum number of rows deleted per statement
+        
+    Returns:
+        int: Total number of rows deleted
+    """
+    model = queryset.model
+    total = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return total
+        deleted, _ = model.objects.filter(pk__in=pks).delete()
+        total += deleted
+        if len(pks) < batch_size:
+            return total
+
+
+class User(DirtyFieldsMixin, AbstractBaseUser, PermissionsMixin):
     """
     Custom user model for Gradvy authentication system.
     
@@ -35,7 +64,8 @@ class User(AbstractBaseUser, PermissionsMixin):
         last_login (datetime): When user last logged in
     """
     # Core fields
-    email = models.EmailField(unique=True, verbose_name="Email Address")
+    # Unique case-insensitively through user_email_lower_unique (Meta.constraints)
+    email = models.EmailField(db_index=True, verbose_name="Email Address")
     first_name = models.CharField(max_length=150, blank=True)
     last_name = models.CharField(max_length=150, blank=True)
     
@@ -66,11 +96,25 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name = "User"
         verbose_name_plural = "Users"
         db_table = "auth_user"
+        constraints = [
+            # Emails are stored lowercased by UserManager.normalize_email();
+            # this guards against rows written around the manager.
+            models.UniqueConstraint(
+                Lower('email'),
+                name='user_email_lower_unique',
+                violation_error_message='A user with this email already exists.',
+            ),
+        ]
     
     def __str__(self) -> str:
         """Return string representation of the user."""
         return self.email
     
+    def clean(self) -> None:
+        """Normalize the email the same way UserManager does (used by model forms)."""
+        super().clean()
+        self.email = self.__class__.objects.normalize_email(self.email)
+    
     def get_full_name(self) -> str:
         """
         Return the user's full name.
@@ -101,7 +145,7 @@ class User(AbstractBaseUser, PermissionsMixin):
             return True
         return False
 
-class UserProfile(models.Model):
+class UserProfile(DirtyFieldsMixin, models.Model):
     """
     Extended user profile information.
     
@@ -116,6 +160,9 @@ class UserProfile(models.Model):
         backup_codes_remaining (int): Number of unused backup codes remaining
         language (str): User's preferred language code
         timezone (str): User's preferred timezone
+        avatar (Avatar): Current avatar image, if any
+        avatar_urls (dict): The avatar's URLs, copied from Avatar.urls so
+            the /me/ payload needs no join
         created_at (datetime): When the profile was created
         updated_at (datetime): When the profile was last updated
     """
@@ -133,6 +180,16 @@ class UserProfile(models.Model):
     language = models.CharField(max_length=10, default='en', help_text="User's preferred language code")
     timezone = models.CharField(max_length=50, default='UTC', help_text="User's preferred timezone")
     
+    # Avatar (services/avatar_service.py)
+    avatar = models.ForeignKey(
+        'Avatar',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='profiles',
+    )
+    avatar_urls = models.JSONField(default=dict, blank=True)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -146,6 +203,47 @@ class UserProfile(models.Model):
         """Return string representation of the user profile."""
         return f"Profile for {self.user.email}"
 
+class Avatar(models.Model):
+    """
+    Avatar image, stored once per distinct content.
+    
+    Files are named after the SHA-256 of the uploaded bytes, so users who
+    upload the same image share one row and one set of files. The upload
+    request only stores the original; the generate_avatar_thumbnails task
+    writes the thumbnails and adds their URLs (see
+    services/avatar_service.py).
+    
+    Attributes:
+        sha256 (str): Hex digest of the original file
+        format (str): Image format reported by Pillow, e.g. 'JPEG'
+        width (int): Width of the original in pixels
+        height (int): Height of the original in pixels
+        size (int): Size of the original in bytes
+        files (dict): Storage names by variant: 'original' and one per thumbnail size
+        urls (dict): Public URLs by variant, with the same keys as files
+        thumbnails_ready (bool): Whether the thumbnails have been generated
+        created_at (datetime): When the image was first uploaded
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    format = models.CharField(max_length=10)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    files = models.JSONField(default=dict)
+    urls = models.JSONField(default=dict)
+    thumbnails_ready = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = "accounts_avatar"
+        verbose_name = "Avatar"
+        verbose_name_plural = "Avatars"
+    
+    def __str__(self) -> str:
+        """Return string representation of the avatar."""
+        return f"Avatar {self.sha256[:12]} ({self.width}x{self.height} {self.format})"
+
+
 # Note: Using standard django-otp TOTPDevice model instead of custom model
 # to avoid circular dependencies in migrations
 
@@ -174,9 +272,20 @@ class BackupCode(models.Model):
         db_table = "accounts_backup_code"
         verbose_name = "Backup Code"
         verbose_name_plural = "Backup Codes"
+        # user_id and code are already indexed by the FK and the unique
+        # constraint; these partial indexes match the list/count and purge paths.
         indexes = [
-            models.Index(fields=['user', 'used']),
-            models.Index(fields=['code']),
+            models.Index(
+                fields=['user'],
+                include=['code'],
+                condition=models.Q(used=False),
+                name='backup_code_unused_idx',
+            ),
+            models.Index(
+                fields=['used_at'],
+                condition=models.Q(used=True),
+                name='backup_code_used_at_idx',
+            ),
         ]
     
     def __str__(self) -> str:
@@ -193,6 +302,20 @@ class BackupCode(models.Model):
         self.used = True
         self.used_at = timezone.now()
         self.save(update_fields=['used', 'used_at'])
+    
+    @classmethod
+    def cleanup_used(cls, older_than, batch_size: int = 5000) -> int:
+        """
+        Remove backup codes that were used before ``older_than`` in chunks.
+        
+        Args:
+            older_than (datetime): Used codes with an earlier used_at are deleted
+            batch_size (int): Maximum number of rows deleted per statement
+            
+        Returns:
+            int: Number of backup codes deleted
+        """
+        return delete_in_batches(cls.objects.filter(used=True, used_at__lt=older_than), batch_size)
 
 
 class PasswordResetToken(models.Model):
@@ -221,9 +344,16 @@ class PasswordResetToken(models.Model):
         db_table = "accounts_password_reset_token"
         verbose_name = "Password Reset Token"
         verbose_name_plural = "Password Reset Tokens"
+        # user_id and token are already indexed by the FK and the unique
+        # constraint. The partial covering index serves the confirm path,
+        # which only ever looks up unused tokens.
         indexes = [
-            models.Index(fields=['user']),
-            models.Index(fields=['token']),
+            models.Index(
+                fields=['token'],
+                include=['user', 'expires_at'],
+                condition=models.Q(used=False),
+                name='pw_reset_token_active_idx',
+            ),
             models.Index(fields=['expires_at']),
         ]
     
@@ -251,7 +381,145 @@ class PasswordResetToken(models.Model):
         self.save(update_fields=['used', 'used_at'])
     
     @classmethod
-    def cleanup_expired(cls):
-        """Remove expired tokens from the database."""
-        cls.objects.filter(expires_at__lt=timezone.now()).delete()
+    def cleanup_expired(cls, batch_size: int = 5000) -> int:
+        """
+        Remove expired tokens from the database in chunks.
+        
+        Args:
+            batch_size (int): Maximum number of rows deleted per statement
+            
+        Returns:
+            int: Number of tokens deleted
+        """
+        return delete_in_batches(cls.objects.filter(expires_at__lt=timezone.now()), batch_size)
+
 
+
+class OutboxEvent(models.Model):
+    """
+    User lifecycle event recorded in the same transaction as the state change.
+    
+    Views write an event with OutboxService.publish() instead of calling the
+    broker or side-effect code directly. The drain_outbox task later picks up
+    pending events in batches and runs the consumers registered for each
+    event type (see services/outbox_service.py).
+    
+    Attributes:
+        event_type (str): Event name, e.g. 'user.registered'
+        user (User): User the event is about (kept null if the user is deleted)
+        payload (dict): JSON data the consumers need
+        created_at (datetime): When the event was recorded
+        available_at (datetime): Earliest time the event may be processed
+        processed_at (datetime): When every consumer finished (null while pending)
+        handled_by (list): Consumers that already succeeded, so retries skip them
+        attempts (int): Number of failed processing attempts
+        last_error (str): Error from the most recent failed attempt
+    """
+    event_type = models.CharField(max_length=64)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='outbox_events',
+    )
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    handled_by = models.JSONField(default=list, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    
+    class Meta:
+        db_table = "accounts_outbox_event"
+        verbose_name = "Outbox Event"
+        verbose_name_plural = "Outbox Events"
+        indexes = [
+            # The drain query only ever looks at pending rows
+            models.Index(
+                fields=['available_at'],
+                condition=models.Q(processed_at__isnull=True),
+                name='outbox_event_pending_idx',
+            ),
+            models.Index(
+                fields=['processed_at'],
+                condition=models.Q(processed_at__isnull=False),
+                name='outbox_event_processed_idx',
+            ),
+        ]
+    
+    def __str__(self) -> str:
+        """Return string representation of the outbox event."""
+        status = "processed" if self.processed_at else "pending"
+        return f"{self.event_type} #{self.pk} ({status})"
+    
+    @classmethod
+    def cleanup_processed(cls, older_than, batch_size: int = 5000) -> int:
+        """
+        Remove processed events older than the given cutoff in chunks.
+        
+        Args:
+            older_than (datetime): Events processed before this are deleted
+            batch_size (int): Maximum number of rows deleted per statement
+            
+        Returns:
+            int: Number of events deleted
+        """
+        return delete_in_batches(cls.objects.filter(processed_at__lt=older_than), batch_size)
+
+
+class AuthEvent(models.Model):
+    """
+    Audit trail entry for an authentication event.
+    
+    Rows are written in batches by AuditService (services/audit_service.py),
+    never one INSERT per request. On PostgreSQL the table is range-partitioned
+    by month on created_at (see migration 0009), so old months can be dropped
+    cheaply and time-range scans only touch the partitions they need.
+    
+    Attributes:
+        user (User): User the event is about (no FK constraint; may be null)
+        email (str): Email the event refers to, also kept for unknown users
+        event_type (str): Event name, e.g. 'login_success', 'mfa_disable'
+        success (bool): Whether the action succeeded
+        ip_address (str): Client IP address, if known
+        user_agent (str): Client user agent (truncated)
+        details (dict): Extra JSON data supplied by the caller
+        created_at (datetime): When the event happened
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        null=True,
+        blank=True,
+        related_name='auth_events',
+    )
+    email = models.CharField(max_length=254, blank=True)
+    event_type = models.CharField(max_length=64)
+    success = models.BooleanField(default=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.CharField(max_length=255, blank=True)
+    details = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = "accounts_auth_event"
+        verbose_name = "Auth Event"
+        verbose_name_plural = "Auth Events"
+        # One index per lookup key the audit API filters on, each followed by
+        # created_at so a filtered, newest-first page is a single index range
+        # scan (and the keyset cursor continues it without an OFFSET).
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='auth_event_user_time_idx'),
+            models.Index(fields=['email', '-created_at'], name='auth_event_email_time_idx'),
+            models.Index(fields=['ip_address', '-created_at'], name='auth_event_ip_time_idx'),
+            models.Index(fields=['event_type', '-created_at'], name='auth_event_type_time_idx'),
+        ]
+    
+    def __str__(self) -> str:
+        """Return string representation of the auth event."""
+        status = "success" if self.success else "failure"
+        return f"{self.event_type} for {self.email or 'unknown'} ({status})"
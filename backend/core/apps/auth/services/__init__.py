@@ -2,11 +2,16 @@
 Authentication services module.
 
 This module contains business logic and service layer implementations
-for authentication, MFA, and user management operations.
+for authentication, MFA, user management, email delivery, outbox
+events, audit logging and cached lookups.
 """
 
+from .audit_service import AuditService
 from .auth_service import AuthenticationService
+from .cache_service import AuthCacheService
+from .email_service import EmailService
 from .mfa_service import MFAService
+from .outbox_service import OutboxService
 from .user_service import UserService
 
-__all__ = ['AuthenticationService', 'MFAService', 'UserService']
\ No newline at end of file
+__all__ = ['AuditService', 'AuthCacheService', 'AuthenticationService', 'EmailService', 'MFAService', 'OutboxService', 'UserService']
\ No newline at end of file
@@ -0,0 +1,368 @@
+"""
+Buffered audit logging for authentication events.
+
+log_auth_event() only appends a tuple to a bounded in-process queue; a
+daemon thread drains the queue and writes the events in batches (COPY on
+PostgreSQL, bulk_create elsewhere). Recording an event never touches the
+database on the request thread, so a slow or unavailable audit table cannot
+add latency to authentication. When the queue is full, new events are
+dropped and counted rather than blocking the caller.
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+import atexit
+import ipaddress
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection as default_connection, transaction
+from django.utils import timezone
+from ..models import AuthEvent
+
+logger = logging.getLogger(__name__)
+
+AUDIT_TABLE = AuthEvent._meta.db_table
+AUDIT_COLUMNS = (
+    'user_id', 'email', 'event_type', 'success', 'ip_address', 'user_agent', 'details', 'created_at',
+)
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return day.replace(year=day.year + month // 12, month=month % 12 + 1, day=1)
+
+
+def audit_partition_name(month: date) -> str:
+    """Name of the partition holding events of the given month."""
+    return f"{AUDIT_TABLE}_y{month.year}m{month.month:02d}"
+
+
+def ensure_audit_partitions(months_ahead: Optional[int] = None, connection=None) -> List[str]:
+    """
+    Create monthly partitions from the current month up to ``months_ahead``.
+
+    If the DEFAULT partition already holds rows for a month being created
+    (because maintenance did not run in time), those rows are moved into
+    the new partition in the same transaction.
+
+    Args:
+        months_ahead: Future months to create (default AUDIT_PARTITION_MONTHS_AHEAD)
+        connection: Database connection (default: the default connection)
+
+    Returns:
+        List[str]: Names of the partitions that were created
+    """
+    connection = connection or default_connection
+    if connection.vendor != 'postgresql':
+        return []
+    if months_ahead is None:
+        months_ahead = getattr(settings, 'AUDIT_PARTITION_MONTHS_AHEAD', 2)
+
+    created = []
+    current = _month_start(timezone.now().date())
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            start, end = _add_months(current, offset), _add_months(current, offset + 1)
+            name = audit_partition_name(start)
+            cursor.execute("SELECT to_regclass(%s)", [name])
+            if cursor.fetchone()[0] is not None:
+                continue
+
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {AUDIT_TABLE}_default "
+                f"WHERE created_at >= %s AND created_at < %s)",
+                [start, end],
+            )
+            if not cursor.fetchone()[0]:
+                cursor.execute(
+                    f"CREATE TABLE {name} PARTITION OF {AUDIT_TABLE} FOR VALUES FROM (%s) TO (%s)",
+                    [start, end],
+                )
+            else:
+                _move_default_rows_into_partition(cursor, connection, name, start, end)
+            created.append(name)
+    return created
+
+
+def _move_default_rows_into_partition(cursor, connection, name: str, start: date, end: date) -> None:
+    """Create a partition for rows that already landed in the DEFAULT partition."""
+    with transaction.atomic(using=connection.alias):
+        cursor.execute(f"ALTER TABLE {AUDIT_TABLE} DETACH PARTITION {AUDIT_TABLE}_default")
+        cursor.execute(
+            f"CREATE TABLE {name} PARTITION OF {AUDIT_TABLE} FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {AUDIT_TABLE}_default "
+            f"WHERE created_at >= %s AND created_at < %s RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved",
+            [start, end],
+        )
+        cursor.execute(f"ALTER TABLE {AUDIT_TABLE} ATTACH PARTITION {AUDIT_TABLE}_default DEFAULT")
+
+
+def drop_expired_audit_partitions(retention_months: Optional[int] = None, connection=None) -> List[str]:
+    """
+    Drop monthly partitions entirely older than the retention window.
+
+    Args:
+        retention_months: Months of events to keep (default AUDIT_RETENTION_MONTHS)
+        connection: Database connection (default: the default connection)
+
+    Returns:
+        List[str]: Names of the partitions that were dropped
+    """
+    connection = connection or default_connection
+    if connection.vendor != 'postgresql':
+        return []
+    if retention_months is None:
+        retention_months = getattr(settings, 'AUDIT_RETENTION_MONTHS', 12)
+
+    oldest_kept = audit_partition_name(_add_months(_month_start(timezone.now().date()), -retention_months))
+    dropped = []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [AUDIT_TABLE],
+        )
+        for (name,) in cursor.fetchall():
+            # Names sort chronologically: <table>_yYYYYmMM
+            if name != f"{AUDIT_TABLE}_default" and name < oldest_kept:
+                cursor.execute(f"ALTER TABLE {AUDIT_TABLE} DETACH PARTITION {name}")
+                cursor.execute(f"DROP TABLE {name}")
+                dropped.append(name)
+    return dropped
+
+
+class AuditBuffer:
+    """
+    Bounded queue of audit rows plus the daemon thread that flushes it.
+
+    The thread writes a batch as soon as ``batch_size`` rows are queued, or
+    at least every ``flush_interval`` seconds. ``dropped`` counts events
+    rejected because the queue was full.
+    """
+
+    def __init__(self, max_size: int = 10000, batch_size: int = 500, flush_interval: float = 1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def put(self, row: tuple) -> bool:
+        """Queue a row without blocking; returns False if it was dropped."""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Audit buffer full, {self.dropped} events dropped so far")
+            return False
+
+    def flush(self) -> int:
+        """Write everything currently queued; returns the number of rows written."""
+        written = 0
+        while True:
+            rows = []
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not rows:
+                return written
+            written += write_audit_rows(rows)
+
+    def _ensure_thread(self) -> None:
+        # Forked worker processes inherit the object but not the thread
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='audit-log-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        from django.db import connection
+
+        while True:
+            try:
+                rows = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            # Collect up to a full batch, but never hold the first row longer than flush_interval
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    rows.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if not write_audit_rows(rows):
+                # Start the next batch on a fresh connection
+                connection.close()
+
+
+def write_audit_rows(rows: List[tuple]) -> int:
+    """
+    Insert audit rows (tuples in AUDIT_COLUMNS order) in one statement.
+
+    Uses COPY on PostgreSQL and bulk_create on other databases. A batch that
+    fails is logged and discarded so the flusher never stalls.
+
+    Returns:
+        int: Number of rows written
+    """
+    from django.db import connection
+
+    try:
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                columns = ', '.join(AUDIT_COLUMNS)
+                with cursor.cursor.copy(f"COPY {AUDIT_TABLE} ({columns}) FROM STDIN") as copy:
+                    for row in rows:
+                        copy.write_row(row)
+        else:
+            AuthEvent.objects.bulk_create([
+                AuthEvent(**dict(zip(AUDIT_COLUMNS, row[:6] + (json.loads(row[6]),) + row[7:])))
+                for row in rows
+            ])
+    except Exception as e:
+        logger.error(f"Discarding {len(rows)} audit events that could not be written: {e}")
+        return 0
+    return len(rows)
+
+
+_buffer: Optional[AuditBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+def get_audit_buffer() -> AuditBuffer:
+    """Return the process-wide audit buffer, creating it on first use."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = AuditBuffer(
+                    max_size=getattr(settings, 'AUDIT_BUFFER_SIZE', 10000),
+                    batch_size=getattr(settings, 'AUDIT_FLUSH_BATCH_SIZE', 500),
+                    flush_interval=getattr(settings, 'AUDIT_FLUSH_INTERVAL_SECONDS', 1.0),
+                )
+                atexit.register(_buffer.flush)
+    return _buffer
+
+
+class AuditService:
+    """Service for recording authentication audit events."""
+
+    @staticmethod
+    def record(user, event_type: str, request=None, success: bool = True,
+               details: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Record an audit event without blocking on the database.
+
+        Args:
+            user: User the event is about (may be None or AnonymousUser)
+            event_type: Event name, e.g. 'login_failed'
+            request: Current request, used for IP and user agent (may be None)
+            success: Whether the action succeeded
+            details: Extra JSON-serializable data; 'ip_address' and 'email'
+                are used when there is no request or user
+
+        Returns:
+            bool: False if the event was dropped (disabled, or buffer full)
+        """
+        if not getattr(settings, 'AUDIT_LOG_ENABLED', True):
+            return False
+        from ..utils.utils import get_client_ip
+
+        details = dict(details or {})
+        user_id = getattr(user, 'pk', None)
+        email = getattr(user, 'email', None) or details.get('email') or ''
+        if request is not None:
+            ip_address = get_client_ip(request)
+            user_agent = request.META.get('HTTP_USER_AGENT', '')[:255]
+        else:
+            ip_address = details.get('ip_address')
+            user_agent = ''
+
+        if ip_address:
+            try:
+                ip_address = str(ipaddress.ip_address(ip_address))
+            except ValueError:
+                # A malformed X-Forwarded-For would otherwise fail the whole batch
+                details.setdefault('raw_ip_address', str(ip_address)[:64])
+                ip_address = None
+
+        row = (
+            user_id,
+            email[:254],
+            event_type[:64],
+            bool(success),
+            ip_address or None,
+            user_agent,
+            json.dumps(details, cls=DjangoJSONEncoder),
+            timezone.now(),
+        )
+        if not getattr(settings, 'AUDIT_LOG_ASYNC', True):
+            return write_audit_rows([row]) == 1
+        return get_audit_buffer().put(row)
+
+    @staticmethod
+    def flush() -> int:
+        """Write all buffered events now (e.g. before a worker exits)."""
+        if _buffer is None:
+            return 0
+        return _buffer.flush()
+
+    @staticmethod
+    def query(user: Optional[int] = None, email: Optional[str] = None, ip: Optional[str] = None,
+              event_type: Optional[str] = None, success: Optional[bool] = None,
+              since=None, until=None):
+        """
+        Build a queryset of audit events for the staff audit API.
+
+        Every query is bounded in time (AUDIT_QUERY_DEFAULT_DAYS back when
+        ``since`` is not given) so PostgreSQL only scans the partitions in
+        range, and each filter maps onto one of the (key, created_at)
+        indexes on AuthEvent.
+
+        Returns:
+            QuerySet: Matching events, newest first
+        """
+        if since is None:
+            since = timezone.now() - timedelta(days=getattr(settings, 'AUDIT_QUERY_DEFAULT_DAYS', 7))
+        queryset = AuthEvent.objects.filter(created_at__gte=since)
+        if until is not None:
+            queryset = queryset.filter(created_at__lt=until)
+        if user is not None:
+            queryset = queryset.filter(user_id=user)
+        if email:
+            queryset = queryset.filter(email=email)
+        if ip:
+            queryset = queryset.filter(ip_address=ip)
+        if event_type:
+            queryset = queryset.filter(event_type=event_type)
+        if success is not None:
+            queryset = queryset.filter(success=success)
+        return queryset.order_by('-created_at', '-id')
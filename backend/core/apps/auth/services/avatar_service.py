@@ -0,0 +1,284 @@
+"""
+Avatar storage and thumbnails.
+
+An upload is streamed by AvatarUploadHandler into a temporary file while
+its SHA-256 is computed, and is cut off once it exceeds AVATAR_MAX_BYTES.
+The request then only reads the image header (format and dimensions) and
+stores the original under a name derived from its digest; identical
+uploads share one Avatar row and one set of files. Decoding and resizing
+happen in the generate_avatar_thumbnails task.
+
+/me/ returns UserProfile.avatar_urls, the URLs copied from the Avatar, so
+serving it needs neither the storage backend nor a join.
+"""
+
+from datetime import timedelta
+from io import BytesIO
+from typing import Dict, Tuple
+import hashlib
+import logging
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import SkipFile, StopUpload, TemporaryFileUploadHandler
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+from ..models import Avatar, UserProfile
+from .cache_service import AuthCacheService
+
+logger = logging.getLogger(__name__)
+
+AVATAR_FIELD = 'avatar'
+
+# Accepted formats and the extension of the stored original
+AVATAR_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+
+# Room for the multipart boundaries and headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def _max_bytes():
+    return getattr(settings, 'AVATAR_MAX_BYTES', 5 * 1024 * 1024)
+
+
+def _file_name(sha256, variant, extension):
+    suffix = '' if variant == 'original' else f'-{variant}'
+    return f'avatars/{sha256[:2]}/{sha256}{suffix}.{extension}'
+
+
+def _lock_unused(sha256):
+    """
+    Queryset locking the avatar ``sha256`` if no profile uses it.
+
+    Only the avatar row is locked: PostgreSQL refuses FOR UPDATE on the
+    nullable side of an outer join, which ``profiles__isnull=True`` would
+    produce. Assigning the avatar to a profile takes a key-share lock on the
+    row, so it waits for the purge to finish.
+    """
+    in_use = UserProfile.objects.filter(avatar_id=OuterRef('pk'))
+    return Avatar.objects.select_for_update().filter(~Exists(in_use), pk=sha256)
+
+
+class AvatarUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream the ``avatar`` file of a multipart request to a temporary file.
+
+    Other files are skipped. Uploads over AVATAR_MAX_BYTES stop the parse
+    without reading the rest of the body and set ``too_large``. The
+    completed file has a ``sha256`` attribute with the digest of its content.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_bytes = _max_bytes()
+        self.too_large = False
+        self.received = 0
+        self.digest = None
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Refuse a body declared too large before streaming any of it
+        if content_length > self.max_bytes + MULTIPART_OVERHEAD:
+            self.too_large = True
+
+    def new_file(self, field_name, *args, **kwargs):
+        if self.too_large:
+            raise StopUpload(connection_reset=True)
+        if field_name != AVATAR_FIELD:
+            raise SkipFile()
+        super().new_file(field_name, *args, **kwargs)
+        self.received = 0
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            self.too_large = True
+            raise StopUpload(connection_reset=True)
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        uploaded.sha256 = self.digest.hexdigest()
+        return uploaded
+
+
+class AvatarService:
+    """Service for storing avatars and generating their thumbnails."""
+
+    @staticmethod
+    def set_avatar(user, uploaded) -> Dict:
+        """
+        Make an uploaded image the user's avatar.
+
+        Args:
+            user: User instance
+            uploaded: File from AvatarUploadHandler (any file object works,
+                it is hashed here if it has no ``sha256``)
+
+        Returns:
+            Dict: The avatar URLs now in the user's /me/ payload
+
+        Raises:
+            ValueError: If the file is not an accepted image
+        """
+        avatar, _ = AvatarService.store(uploaded)
+        try:
+            profile = user.profile
+        except UserProfile.DoesNotExist:
+            profile = UserProfile.objects.create(user=user)
+        profile.avatar = avatar
+        profile.avatar_urls = avatar.urls
+        profile.save(update_fields=['avatar', 'avatar_urls', *profile.auto_now_fields()])
+        if not avatar.thumbnails_ready:
+            from ..tasks.tasks import generate_avatar_thumbnails
+            transaction.on_commit(lambda: generate_avatar_thumbnails.delay(avatar.sha256))
+        return avatar.urls
+
+    @staticmethod
+    def remove_avatar(user) -> None:
+        """
+        Clear the user's avatar; the files stay while other users share them.
+
+        Args:
+            user: User instance
+        """
+        try:
+            profile = user.profile
+        except UserProfile.DoesNotExist:
+            return
+        if profile.avatar_id is None:
+            return
+        profile.avatar = None
+        profile.avatar_urls = {}
+        profile.save(update_fields=['avatar', 'avatar_urls', *profile.auto_now_fields()])
+
+    @staticmethod
+    def store(uploaded) -> Tuple[Avatar, bool]:
+        """
+        Store the original of an uploaded image, unless it is already stored.
+
+        Only the image header is read; the pixels are not decoded.
+
+        Args:
+            uploaded: Uploaded file
+
+        Returns:
+            Tuple[Avatar, bool]: The avatar and whether it was created
+
+        Raises:
+            ValueError: If the file is not an accepted image
+        """
+        sha256 = getattr(uploaded, 'sha256', None)
+        if sha256 is None:
+            digest = hashlib.sha256()
+            for chunk in uploaded.chunks():
+                digest.update(chunk)
+            sha256 = digest.hexdigest()
+
+        avatar = Avatar.objects.filter(pk=sha256).first()
+        if avatar is not None:
+            return avatar, False
+
+        uploaded.seek(0)
+        try:
+            with Image.open(uploaded) as image:
+                image_format, (width, height) = image.format, image.size
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+            raise ValueError("The file is not a supported image.")
+        if image_format not in AVATAR_FORMATS:
+            raise ValueError(f"Unsupported image format; use one of {', '.join(AVATAR_FORMATS)}.")
+        if width * height > getattr(settings, 'AVATAR_MAX_PIXELS', 25_000_000):
+            raise ValueError("The image has too many pixels.")
+
+        name = _file_name(sha256, 'original', AVATAR_FORMATS[image_format])
+        if not default_storage.exists(name):
+            uploaded.seek(0)
+            # Storage returns a different name if another upload got there first
+            name = default_storage.save(name, uploaded)
+        return Avatar.objects.get_or_create(
+            sha256=sha256,
+            defaults={
+                'format': image_format,
+                'width': width,
+                'height': height,
+                'size': uploaded.size,
+                'files': {'original': name},
+                'urls': {'original': default_storage.url(name)},
+            },
+        )
+
+    @staticmethod
+    def generate_thumbnails(sha256) -> None:
+        """
+        Write the square WebP thumbnails of an avatar and publish their URLs.
+
+        Args:
+            sha256: Avatar primary key
+        """
+        avatar = Avatar.objects.filter(pk=sha256).first()
+        if avatar is None or avatar.thumbnails_ready:
+            return
+        sizes = getattr(settings, 'AVATAR_THUMBNAIL_SIZES', [64, 128, 256])
+
+        with default_storage.open(avatar.files['original'], 'rb') as original, Image.open(original) as image:
+            # JPEG decoders can scale down while decoding
+            image.draft('RGB', (max(sizes), max(sizes)))
+            image = ImageOps.exif_transpose(image)
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+            files = dict(avatar.files)
+            urls = dict(avatar.urls)
+            for size in sizes:
+                name = _file_name(sha256, size, 'webp')
+                if not default_storage.exists(name):
+                    buffer = BytesIO()
+                    ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS).save(buffer, 'WEBP', quality=85)
+                    name = default_storage.save(name, ContentFile(buffer.getvalue()))
+                files[str(size)] = name
+                urls[str(size)] = default_storage.url(name)
+
+        with transaction.atomic():
+            Avatar.objects.filter(pk=sha256).update(files=files, urls=urls, thumbnails_ready=True)
+            # update() sends no signals; the /me/ payload versions change here
+            user_ids = list(UserProfile.objects.filter(avatar_id=sha256).values_list('user_id', flat=True))
+            UserProfile.objects.filter(avatar_id=sha256).update(avatar_urls=urls, updated_at=timezone.now())
+            for user_id in user_ids:
+                AuthCacheService.invalidate_profile(user_id)
+        logger.info(f"Generated {len(sizes)} thumbnails for avatar {sha256[:12]}")
+
+    @staticmethod
+    def purge_unused() -> int:
+        """
+        Delete avatars no profile uses, with their files.
+
+        Only avatars older than AVATAR_UNUSED_RETENTION_HOURS are deleted, so
+        one stored by an upload that has not yet been assigned stays.
+
+        Returns:
+            int: Number of avatars deleted
+        """
+        retention = timedelta(hours=getattr(settings, 'AVATAR_UNUSED_RETENTION_HOURS', 24))
+        unused = Avatar.objects.filter(profiles__isnull=True, created_at__lt=timezone.now() - retention)
+        deleted = 0
+        for avatar in unused.iterator():
+            with transaction.atomic():
+                # Skip it if someone picked the same image in the meantime
+                if not _lock_unused(avatar.pk).exists():
+                    continue
+                avatar.delete()
+                names = list(avatar.files.values())
+                transaction.on_commit(lambda names=names: AvatarService._delete_files(names))
+            deleted += 1
+        if deleted:
+            logger.info(f"Purged {deleted} unused avatars")
+        return deleted
+
+    @staticmethod
+    def _delete_files(names) -> None:
+        for name in names:
+            try:
+                default_storage.delete(name)
+            except Exception as e:
+                logger.warning(f"Could not delete avatar file {name}: {e}")
@@ -0,0 +1,151 @@
+"""
+Cached lookups for data read on most authenticated requests.
+
+User snapshots (used by JWT authentication) and MFA status live in the
+'hot' cache, a two-tier local + Redis cache in production, or in the
+default cache where no 'hot' cache is configured. The signal handlers in
+tasks/signals.py invalidate them once the changing transaction commits.
+
+The cache also holds a version tag for each user's /me/ and MFA status
+payloads, used as their ETag. Invalidation deletes the tag and the next
+read stores a new random one, so a tag never comes back after a change,
+even when the key was evicted in between.
+"""
+
+from typing import Dict, Optional
+import logging
+import uuid
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+USER_KEY = 'auth:user:{}'
+MFA_STATUS_KEY = 'auth:mfa_status:{}'
+VERSION_KEY = 'auth:version:{}:{}'  # payload name, user id
+
+# Payloads with a version tag
+PROFILE_PAYLOAD = 'me'
+MFA_STATUS_PAYLOAD = 'mfa_status'
+
+
+def _hot_cache():
+    alias = getattr(settings, 'AUTH_HOT_CACHE_ALIAS', 'hot')
+    return caches[alias if alias in settings.CACHES else 'default']
+
+
+class AuthCacheService:
+    """Service for cached user and MFA status lookups."""
+
+    @staticmethod
+    def get_user(user_id) -> Optional[User]:
+        """
+        Get a user by primary key, from the cache when possible.
+
+        Args:
+            user_id: User primary key
+
+        Returns:
+            User: User instance, or None if no such user exists
+        """
+        key = USER_KEY.format(user_id)
+        user = _hot_cache().get(key)
+        if user is not None:
+            return user
+        try:
+            # The profile is cached with the user: /me/ and profile updates use it
+            user = User.objects.select_related('profile').get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        AuthCacheService._store(key, user)
+        return user
+
+    @staticmethod
+    def get_mfa_status(user) -> Dict:
+        """
+        Get the MFA status payload of a user, from the cache when possible.
+
+        Args:
+            user: User instance
+
+        Returns:
+            Dict: Payload built by MFAService.get_mfa_status
+        """
+        from .mfa_service import MFAService
+
+        key = MFA_STATUS_KEY.format(user.pk)
+        status = _hot_cache().get(key)
+        if status is None:
+            status = MFAService.get_mfa_status(user)
+            AuthCacheService._store(key, status)
+        return status
+
+    @staticmethod
+    def get_version(payload, user_id) -> Optional[str]:
+        """
+        Get the version tag of a user's payload, creating it if needed.
+
+        Args:
+            payload: PROFILE_PAYLOAD or MFA_STATUS_PAYLOAD
+            user_id: User primary key
+
+        Returns:
+            str: Tag that changes whenever the payload may have changed, or
+            None if the cache is unavailable
+        """
+        key = VERSION_KEY.format(payload, user_id)
+        cache = _hot_cache()
+        try:
+            version = cache.get(key)
+            if version is None:
+                version = uuid.uuid4().hex
+                # Another request may have created it first; theirs wins
+                if not cache.add(key, version, getattr(settings, 'AUTH_VERSION_TIMEOUT', 86400)):
+                    version = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Could not read {key}: {e}")
+            return None
+        return version
+
+    @staticmethod
+    def invalidate_user(user_id) -> None:
+        """Drop the cached snapshot, MFA status and payload versions of a user after commit."""
+        AuthCacheService._invalidate([
+            USER_KEY.format(user_id),
+            MFA_STATUS_KEY.format(user_id),
+            VERSION_KEY.format(PROFILE_PAYLOAD, user_id),
+            VERSION_KEY.format(MFA_STATUS_PAYLOAD, user_id),
+        ])
+
+    @staticmethod
+    def invalidate_mfa_status(user_id) -> None:
+        """Drop the cached MFA status of a user and its version after commit."""
+        AuthCacheService._invalidate([MFA_STATUS_KEY.format(user_id), VERSION_KEY.format(MFA_STATUS_PAYLOAD, user_id)])
+
+    @staticmethod
+    def invalidate_profile(user_id) -> None:
+        """Drop the cached snapshot (it carries the profile) and /me/ payload version of a user after commit."""
+        AuthCacheService._invalidate([USER_KEY.format(user_id), VERSION_KEY.format(PROFILE_PAYLOAD, user_id)])
+
+    @staticmethod
+    def _store(key, value) -> None:
+        # Inside a transaction the value may include uncommitted changes
+        if connection.in_atomic_block:
+            return
+        try:
+            _hot_cache().set(key, value, getattr(settings, 'AUTH_HOT_CACHE_TIMEOUT', 300))
+        except Exception as e:
+            logger.warning(f"Could not cache {key}: {e}")
+
+    @staticmethod
+    def _invalidate(keys) -> None:
+        def delete():
+            try:
+                _hot_cache().delete_many(keys)
+            except Exception as e:
+                logger.error(f"Could not invalidate cached {keys}: {e}")
+
+        transaction.on_commit(delete)
@@ -0,0 +1,296 @@
+"""
+Transactional email service layer.
+
+Renders and delivers the account emails (welcome, password reset, MFA
+changes, lockout notices) from Celery workers. SMTP connections are pooled
+and reused across messages and tasks, templates are compiled once per
+worker process, and messages are sent in batches so a single task can
+deliver many emails over one connection.
+"""
+
+from typing import Dict, List, Optional
+import logging
+import queue
+import random
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import get_template
+
+logger = logging.getLogger(__name__)
+
+
+# kind -> (subject, template base name); each kind has a .txt and .html template
+EMAIL_TEMPLATES = {
+    'welcome': ('Welcome to Gradvy', 'gradvy_auth/emails/welcome'),
+    'password_reset': ('Reset your Gradvy password', 'gradvy_auth/emails/password_reset'),
+    'mfa_enabled': ('Two-factor authentication enabled', 'gradvy_auth/emails/mfa_enabled'),
+    'mfa_disabled': ('Two-factor authentication disabled', 'gradvy_auth/emails/mfa_disabled'),
+    'account_locked': ('Your Gradvy account has been locked', 'gradvy_auth/emails/account_locked'),
+}
+
+def is_transient_email_error(error: Exception) -> bool:
+    """
+    Whether a delivery error is worth retrying.
+
+    SMTP replies are transient only with a 4xx code; a 5xx reply rejects
+    the message for good. Other socket errors and dropped connections are
+    network problems and are retried.
+
+    Args:
+        error: Exception raised while connecting or sending
+
+    Returns:
+        bool: True if the send should be retried later
+    """
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    # smtplib.SMTPException subclasses OSError
+    return isinstance(error, OSError)
+
+
+class _PooledConnection:
+    """An open email backend connection plus its usage counters."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.opened_at = time.monotonic()
+        self.sent = 0
+
+
+class EmailConnectionPool:
+    """
+    Bounded pool of open email backend connections.
+
+    Connections are opened lazily, handed out LIFO so the warmest one is
+    reused first, and recycled after ``max_messages`` sends or ``max_age``
+    seconds. A connection that raised during use is closed and dropped
+    instead of being returned to the pool.
+    """
+
+    def __init__(self, size: int = 2, max_messages: int = 100, max_age: int = 300):
+        self.size = size
+        self.max_messages = max_messages
+        self.max_age = max_age
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of the block."""
+        self._slots.acquire()
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn
+        except Exception:
+            if conn is not None:
+                self._close(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._checkin(conn)
+            self._slots.release()
+
+    def close_all(self) -> None:
+        """Close every idle connection (called on worker shutdown)."""
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if self._is_stale(conn):
+                self._close(conn)
+                continue
+            return conn
+
+        backend = get_connection(fail_silently=False)
+        backend.open()
+        return _PooledConnection(backend)
+
+    def _checkin(self, conn: _PooledConnection) -> None:
+        if self._is_stale(conn):
+            self._close(conn)
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._close(conn)
+
+    def _is_stale(self, conn: _PooledConnection) -> bool:
+        return (
+            conn.sent >= self.max_messages
+            or time.monotonic() - conn.opened_at >= self.max_age
+        )
+
+    @staticmethod
+    def _close(conn: _PooledConnection) -> None:
+        try:
+            conn.backend.close()
+        except Exception as e:
+            logger.debug(f"Error closing email connection: {e}")
+
+
+_pool: Optional[EmailConnectionPool] = None
+_pool_lock = threading.Lock()
+_compiled_templates: Dict[str, tuple] = {}
+
+
+def get_connection_pool() -> EmailConnectionPool:
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = EmailConnectionPool(
+                    size=getattr(settings, 'EMAIL_POOL_SIZE', 2),
+                    max_messages=getattr(settings, 'EMAIL_CONNECTION_MAX_MESSAGES', 100),
+                    max_age=getattr(settings, 'EMAIL_CONNECTION_MAX_AGE', 300),
+                )
+    return _pool
+
+
+class EmailService:
+    """Service for rendering and delivering transactional emails."""
+
+    @staticmethod
+    def build_message(kind: str, to: str, **context) -> Dict:
+        """
+        Build a JSON-serializable message spec for the delivery task.
+
+        Args:
+            kind: One of the keys of EMAIL_TEMPLATES
+            to: Recipient email address
+            **context: Template context (must be JSON-serializable)
+
+        Returns:
+            Dict: Message spec accepted by send_batch()
+        """
+        if kind not in EMAIL_TEMPLATES:
+            raise ValueError(f"Unknown email kind: {kind}")
+        return {'kind': kind, 'to': to, 'context': context}
+
+    @staticmethod
+    def queue(messages: List[Dict]) -> bool:
+        """
+        Enqueue message specs for delivery, split into EMAIL_BATCH_SIZE chunks.
+
+        Broker errors are logged rather than raised so that a notification
+        email can never fail the request that triggered it.
+
+        Returns:
+            bool: True if every batch was enqueued
+        """
+        from ..tasks.tasks import send_transactional_emails
+
+        batch_size = getattr(settings, 'EMAIL_BATCH_SIZE', 50)
+        try:
+            for start in range(0, len(messages), batch_size):
+                send_transactional_emails.delay(messages[start:start + batch_size])
+        except Exception as e:
+            logger.error(f"Failed to enqueue transactional emails: {e}")
+            return False
+        return True
+
+    @staticmethod
+    def warm_templates() -> None:
+        """Compile every email template once; called when a worker process starts."""
+        for kind in EMAIL_TEMPLATES:
+            EmailService._get_templates(kind)
+
+    @staticmethod
+    def _get_templates(kind: str) -> tuple:
+        compiled = _compiled_templates.get(kind)
+        if compiled is None:
+            subject, base_name = EMAIL_TEMPLATES[kind]
+            compiled = (
+                subject,
+                get_template(f"{base_name}.txt"),
+                get_template(f"{base_name}.html"),
+            )
+            _compiled_templates[kind] = compiled
+        return compiled
+
+    @staticmethod
+    def render(spec: Dict) -> EmailMultiAlternatives:
+        """Render a message spec into a multipart email."""
+        subject, text_template, html_template = EmailService._get_templates(spec['kind'])
+        context = {'site_name': 'Gradvy', 'email': spec['to']}
+        context.update(spec.get('context') or {})
+
+        message = EmailMultiAlternatives(
+            subject=subject,
+            body=text_template.render(context),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[spec['to']],
+        )
+        message.attach_alternative(html_template.render(context), 'text/html')
+        return message
+
+    @staticmethod
+    def send_batch(specs: List[Dict]) -> List[Dict]:
+        """
+        Render and send a batch of message specs over one pooled connection.
+
+        Messages that cannot be rendered or that the server permanently
+        rejects (5xx) are logged and dropped. If the connection fails or the
+        server replies 4xx, the unsent remainder is returned so the caller
+        can retry it.
+
+        Args:
+            specs: Message specs from build_message()
+
+        Returns:
+            List[Dict]: Specs that were not delivered and should be retried
+        """
+        rendered = []
+        for spec in specs:
+            try:
+                rendered.append((spec, EmailService.render(spec)))
+            except Exception as e:
+                logger.error(f"Dropping {spec.get('kind')} email that failed to render: {e}")
+
+        if not rendered:
+            return []
+
+        sent = 0
+        try:
+            with get_connection_pool().connection() as conn:
+                for spec, message in rendered:
+                    try:
+                        conn.backend.send_messages([message])
+                    except smtplib.SMTPRecipientsRefused:
+                        logger.warning(f"Recipient refused for {spec['kind']} email")
+                    except smtplib.SMTPResponseException as e:
+                        if is_transient_email_error(e):
+                            raise
+                        logger.error(f"Server rejected {spec['kind']} email: {e.smtp_code} {e.smtp_error!r}")
+                    conn.sent += 1
+                    sent += 1
+        except OSError as e:
+            if not is_transient_email_error(e):
+                raise
+            logger.warning(f"Email batch interrupted after {sent} of {len(rendered)} messages: {e}")
+            return [spec for spec, _ in rendered[sent:]]
+
+        logger.info(f"Delivered {sent} transactional emails")
+        return []
+
+    @staticmethod
+    def retry_countdown(retries: int) -> int:
+        """Exponential backoff with jitter for retrying failed batches."""
+        base = getattr(settings, 'EMAIL_RETRY_BACKOFF_SECONDS', 30)
+        cap = getattr(settings, 'EMAIL_RETRY_BACKOFF_MAX_SECONDS', 3600)
+        delay = min(cap, base * (2 ** retries))
+        return int(delay / 2 + random.uniform(0, delay / 2))
@@ -8,14 +8,14 @@ QR code generation, and backup code operations.
 from typing import List, Dict, Optional, Tuple
 import os
 import base64
-import qrcode
 import logging
-from io import BytesIO
 from django_otp import devices_for_user
 from django_otp.plugins.otp_totp.models import TOTPDevice
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Min
 from ..models import BackupCode
 from ..utils.utils import generate_backup_codes
+from .cache_service import AuthCacheService
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -51,6 +51,10 @@ class MFAService:
         Returns:
             str: Base64 encoded QR code image
         """
+        # Imported here so qrcode and PIL are only loaded when someone enrolls
+        import qrcode
+        from io import BytesIO
+
         qr = qrcode.QRCode(version=1, box_size=10, border=5)
         qr.add_data(f"otpauth://totp/{user_email}?secret={secret}&issuer={issuer}")
         qr.make(fit=True)
@@ -146,6 +150,31 @@ class MFAService:
             logger.error(f"Failed to disable MFA for user {user.id}: {e}")
             return False
     
+    @staticmethod
+    def cleanup_user_data(user_id) -> Tuple[int, int]:
+        """
+        Delete a user's backup codes and unconfirmed TOTP devices after MFA is disabled.
+        
+        Errors are raised, so callers that retry (the outbox) try again.
+        Deleting is idempotent.
+        
+        Args:
+            user_id: User primary key
+            
+        Returns:
+            Tuple[int, int]: Backup codes and unconfirmed TOTP devices deleted
+        """
+        backup_codes_deleted, _ = BackupCode.objects.filter(user_id=user_id).delete()
+        unconfirmed_totp_deleted, _ = TOTPDevice.objects.filter(user_id=user_id, confirmed=False).delete()
+        AuthCacheService.invalidate_mfa_status(user_id)
+        
+        logger.info(
+            f"MFA cleanup completed for user {user_id}: "
+            f"Deleted {backup_codes_deleted} backup codes, "
+            f"{unconfirmed_totp_deleted} unconfirmed TOTP devices"
+        )
+        return backup_codes_deleted, unconfirmed_totp_deleted
+    
     @staticmethod
     def get_user_totp_devices(user) -> List[TOTPDevice]:
         """Get all confirmed TOTP devices for user."""
@@ -154,4 +183,31 @@ class MFAService:
     @staticmethod
     def has_mfa_enabled(user) -> bool:
         """Check if user has MFA enabled."""
-        return user.mfa_enrolled and len(MFAService.get_user_totp_devices(user)) > 0
\ No newline at end of file
+        return user.mfa_enrolled and len(MFAService.get_user_totp_devices(user)) > 0
+    
+    @staticmethod
+    def get_mfa_status(user) -> Dict:
+        """
+        Build the MFA status payload served by the mfa/status endpoint.
+        
+        Args:
+            user: User instance
+            
+        Returns:
+            Dict: MFA flags, device and backup code counts, enrollment date
+        """
+        # Two queries: device count with the first device's date, and unused codes
+        totp = TOTPDevice.objects.filter(user=user, confirmed=True).aggregate(
+            count=Count('pk'), enrolled_at=Min('created_at'),
+        )
+        totp_count = totp['count']
+        backup_count = user.backup_codes.filter(used=False).count()
+        
+        return {
+            'is_mfa_enabled': user.mfa_enrolled,
+            'has_totp_device': totp_count > 0,
+            'totp_device_count': totp_count,
+            'has_backup_codes': backup_count > 0,
+            'backup_codes_count': backup_count,
+            'enrollment_date': totp['enrolled_at'],
+        }
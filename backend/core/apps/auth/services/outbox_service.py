@@ -0,0 +1,222 @@
+"""
+Transactional outbox for user lifecycle events.
+
+State-changing views record an OutboxEvent in the same database transaction
+as the change itself, so a request never talks to the broker and an event
+exists if and only if the change was committed. The drain_outbox Celery task
+claims pending events in batches and runs the consumers registered for each
+event type. Consumers work on a whole batch at once (e.g. one email publish
+for every welcome message in the batch) and must be idempotent: a consumer
+that succeeded is recorded in ``handled_by`` and skipped on retry, but a
+crash between the side effect and that record can still repeat it.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from ..models import OutboxEvent, User
+
+logger = logging.getLogger(__name__)
+
+
+# event type -> email kind sent by the 'email' consumer
+EVENT_EMAILS = {
+    'user.registered': 'welcome',
+    'mfa.enabled': 'mfa_enabled',
+    'mfa.disabled': 'mfa_disabled',
+}
+
+# event type -> audit event name written by the 'audit' consumer
+EVENT_AUDIT_NAMES = {
+    'user.registered': 'register',
+    'user.deactivated': 'user_deactivated',
+    'mfa.enabled': 'mfa_enroll',
+    'mfa.disabled': 'mfa_disable',
+    'password.changed': 'password_change',
+}
+
+# event type -> consumers that must handle it, in order
+EVENT_CONSUMERS = {
+    'user.registered': ('email', 'audit'),
+    'user.deactivated': ('sessions', 'cache', 'audit'),
+    'mfa.enabled': ('email', 'cache', 'audit'),
+    'mfa.disabled': ('email', 'cache', 'audit'),
+    'mfa.cleanup': ('mfa_cleanup',),
+    'password.changed': ('cache', 'audit'),
+}
+
+
+def _consume_email(events: List[OutboxEvent]) -> None:
+    from .email_service import EmailService
+
+    messages = []
+    for event in events:
+        email = event.payload.get('email')
+        if not email:
+            continue
+        context = {}
+        if event.payload.get('first_name'):
+            context['first_name'] = event.payload['first_name']
+        messages.append(EmailService.build_message(EVENT_EMAILS[event.event_type], email, **context))
+    if messages and not EmailService.queue(messages):
+        raise RuntimeError("Could not enqueue transactional emails")
+
+
+def _consume_audit(events: List[OutboxEvent]) -> None:
+    from ..utils.utils import log_auth_event
+
+    for event in events:
+        event_name = event.payload.get('audit_event') or EVENT_AUDIT_NAMES[event.event_type]
+        log_auth_event(event.user, event_name, None, success=True, details=event.payload)
+
+
+def _consume_cache(events: List[OutboxEvent]) -> None:
+    from .cache_service import AuthCacheService
+
+    # Snapshot, MFA status and payload versions in the hot cache
+    for user_id in {event.user_id for event in events if event.user_id}:
+        AuthCacheService.invalidate_user(user_id)
+
+
+def _consume_sessions(events: List[OutboxEvent]) -> None:
+    from ..utils.utils import revoke_user_sessions
+
+    for event in events:
+        if event.user is not None:
+            revoke_user_sessions(event.user)
+
+
+def _consume_mfa_cleanup(events: List[OutboxEvent]) -> None:
+    from .mfa_service import MFAService
+
+    for event in events:
+        if event.user_id:
+            # Raises on failure so the batch is retried; deleting is idempotent
+            MFAService.cleanup_user_data(event.user_id)
+
+
+CONSUMERS: Dict[str, Callable[[List[OutboxEvent]], None]] = {
+    'email': _consume_email,
+    'audit': _consume_audit,
+    'cache': _consume_cache,
+    'sessions': _consume_sessions,
+    'mfa_cleanup': _consume_mfa_cleanup,
+}
+
+
+class OutboxService:
+    """Service for recording and draining outbox events."""
+
+    @staticmethod
+    def publish(event_type: str, user: Optional[User] = None, delay_seconds: int = 0, **payload) -> OutboxEvent:
+        """
+        Record an event in the current transaction.
+
+        Call this inside the same ``transaction.atomic()`` block as the state
+        change so the event is committed (or rolled back) together with it.
+
+        Args:
+            event_type: One of the keys of EVENT_CONSUMERS
+            user: User the event is about
+            delay_seconds: Do not process the event before this many seconds
+            **payload: JSON-serializable data for the consumers
+
+        Returns:
+            OutboxEvent: The created event
+        """
+        if event_type not in EVENT_CONSUMERS:
+            raise ValueError(f"Unknown outbox event type: {event_type}")
+        if user is not None:
+            payload.setdefault('email', user.email)
+        return OutboxEvent.objects.create(
+            event_type=event_type,
+            user=user,
+            payload=payload,
+            available_at=timezone.now() + timedelta(seconds=delay_seconds),
+        )
+
+    @staticmethod
+    def drain(batch_size: Optional[int] = None, max_batches: Optional[int] = None) -> int:
+        """
+        Process pending events in batches until none are left.
+
+        Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several
+        workers can drain concurrently without handling the same event.
+
+        Args:
+            batch_size: Events claimed per transaction (default OUTBOX_BATCH_SIZE)
+            max_batches: Stop after this many batches (default OUTBOX_MAX_BATCHES_PER_RUN)
+
+        Returns:
+            int: Number of events fully processed
+        """
+        batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+        max_batches = max_batches or getattr(settings, 'OUTBOX_MAX_BATCHES_PER_RUN', 10)
+
+        processed = 0
+        for _ in range(max_batches):
+            claimed, done = OutboxService._drain_batch(batch_size)
+            processed += done
+            if claimed < batch_size:
+                break
+        return processed
+
+    @staticmethod
+    @transaction.atomic
+    def _drain_batch(batch_size: int):
+        max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 10)
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('user')
+            .filter(processed_at__isnull=True, available_at__lte=timezone.now(), attempts__lt=max_attempts)
+            .order_by('available_at', 'id')[:batch_size]
+        )
+        if not events:
+            return 0, 0
+
+        # consumer -> events that still need it, keeping consumer order per event
+        pending = defaultdict(list)
+        for event in events:
+            for consumer in EVENT_CONSUMERS.get(event.event_type, ()):
+                if consumer not in event.handled_by:
+                    pending[consumer].append(event)
+
+        errors = {}
+        for consumer, consumer_events in pending.items():
+            try:
+                with transaction.atomic():
+                    CONSUMERS[consumer](consumer_events)
+            except Exception as e:
+                logger.error(f"Outbox consumer '{consumer}' failed for {len(consumer_events)} events: {e}")
+                for event in consumer_events:
+                    errors[event.pk] = f"{consumer}: {e}"
+                continue
+            for event in consumer_events:
+                event.handled_by = event.handled_by + [consumer]
+
+        now = timezone.now()
+        done = 0
+        for event in events:
+            if event.pk in errors:
+                event.attempts += 1
+                event.last_error = errors[event.pk]
+                event.available_at = now + OutboxService.retry_delay(event.attempts)
+                if event.attempts >= max_attempts:
+                    logger.error(f"Giving up on outbox event {event.pk} ({event.event_type}) after {event.attempts} attempts")
+            else:
+                event.processed_at = now
+                done += 1
+        OutboxEvent.objects.bulk_update(
+            events, ['handled_by', 'attempts', 'last_error', 'available_at', 'processed_at']
+        )
+        return len(events), done
+
+    @staticmethod
+    def retry_delay(attempts: int) -> timedelta:
+        """Exponential backoff before a failed event is picked up again."""
+        cap = getattr(settings, 'OUTBOX_RETRY_MAX_SECONDS', 600)
+        return timedelta(seconds=min(cap, 2 ** attempts))
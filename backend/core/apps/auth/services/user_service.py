@@ -4,7 +4,7 @@ User management service layer.
 Handles user creation, profile management, and user-related operations.
 """
 
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import logging
 from django.contrib.auth import get_user_model
 from django.db import transaction
@@ -65,11 +65,44 @@ class UserService:
         logger.info(f"Superuser created: {user.email}")
         return user
     
+    @staticmethod
+    @transaction.atomic
+    def bulk_create_users(users_data: List[Dict]) -> List[User]:
+        """
+        Create many users and their profiles with two INSERT statements.
+        
+        Unlike create_user(), this bypasses the post_save receivers in
+        tasks/signals.py, so profiles are created here explicitly.
+        Passwords must already be hashed (see make_password()).
+        
+        Args:
+            users_data: One dict per user with 'email', 'password' (hashed),
+                optional User fields and an optional 'profile' dict
+            
+        Returns:
+            List[User]: Created user instances with primary keys set
+        """
+        users = []
+        profiles_data = []
+        for data in users_data:
+            data = dict(data)
+            profiles_data.append(data.pop('profile', None) or {})
+            users.append(User(**data))
+        
+        users = User.objects.bulk_create(users)
+        UserProfile.objects.bulk_create([
+            UserProfile(user=user, **profile_data)
+            for user, profile_data in zip(users, profiles_data)
+        ])
+        
+        logger.info(f"Bulk created {len(users)} users")
+        return users
+    
     @staticmethod
     def get_user_by_email(email: str) -> Optional[User]:
         """Get user by email address."""
         try:
-            return User.objects.get(email=email)
+            return User.objects.get(email=User.objects.normalize_email(email))
         except User.DoesNotExist:
             return None
     
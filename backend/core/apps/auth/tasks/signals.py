@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save
+from django.apps import apps
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from ..models import UserProfile
+from django_otp.plugins.otp_totp.models import TOTPDevice
+from ..models import BackupCode, UserProfile
+from ..services.cache_service import AuthCacheService
 
 User = get_user_model()
 
@@ -12,21 +15,81 @@ def create_user_profile(sender, instance, created, **kwargs):
         UserProfile.objects.create(user=instance)
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """Save user profile when user is saved"""
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
+def save_user_profile(sender, instance, created, **kwargs):
+    """Save the cached user profile if it has unsaved changes"""
+    # Only a profile already loaded on this instance can have been modified;
+    # hasattr(instance, 'profile') would cost a query on every user save.
+    if created or not User.profile.is_cached(instance):
+        return
+    profile = instance.profile
+    if profile.is_dirty:
+        profile.save()
 
 @receiver(post_save, sender=User)
-def handle_user_status_change(sender, instance, **kwargs):
+def handle_user_status_change(sender, instance, created, update_fields=None, **kwargs):
     """Handle user status changes (activation, deactivation)"""
-    if instance.pk:  # Not a new user
-        try:
-            old_instance = User.objects.get(pk=instance.pk)
-            if old_instance.is_active != instance.is_active:
-                if not instance.is_active:
-                    # User deactivated - revoke sessions
-                    from ..utils.utils import revoke_user_sessions
-                    revoke_user_sessions(instance)
-        except User.DoesNotExist:
-            pass  # New user
+    if created:
+        return
+    if update_fields is not None and 'is_active' not in update_fields:
+        return
+    if instance.is_tracking_changes:
+        # The snapshot is refreshed after post_save, so it still holds the
+        # value this save replaced.
+        if 'is_active' not in instance.get_dirty_fields():
+            return
+    elif instance.is_active:
+        # No snapshot to compare against; only deactivation needs handling
+        return
+    if not instance.is_active:
+        # User deactivated - sessions are revoked by the outbox worker. Saves
+        # made inside transaction.atomic() commit the event with the change.
+        from ..services.outbox_service import OutboxService
+        OutboxService.publish('user.deactivated', instance)
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop the cached snapshot and MFA status of a changed user"""
+    AuthCacheService.invalidate_user(instance.pk)
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_cached_profile(sender, instance, created, **kwargs):
+    """Change the /me/ payload version when the profile changes"""
+    if not created:
+        AuthCacheService.invalidate_profile(instance.user_id)
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_cached_groups(sender, instance, action, reverse, pk_set, **kwargs):
+    """Change the /me/ payload version of users added to or removed from groups"""
+    if action == 'pre_clear' and reverse:
+        # group.user_set.clear(): the members are only known before the clear
+        user_ids = list(instance.user_set.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        user_ids = pk_set if reverse else [instance.pk]
+    elif action == 'post_clear' and not reverse:
+        user_ids = [instance.pk]
+    else:
+        return
+    for user_id in user_ids:
+        AuthCacheService.invalidate_profile(user_id)
+
+# post_save only: a post_delete receiver would turn every bulk delete of
+# devices or codes into a SELECT plus a DELETE. Code that deletes them also
+# saves the user or invalidates the status itself.
+@receiver(post_save, sender=TOTPDevice)
+@receiver(post_save, sender=BackupCode)
+def invalidate_cached_mfa_status(sender, instance, **kwargs):
+    """Drop the cached MFA status when a device or backup code changes"""
+    AuthCacheService.invalidate_mfa_status(instance.user_id)
+
+if apps.is_installed('axes'):  # axes is removed from INSTALLED_APPS in testing settings
+    from axes.signals import user_locked_out
+
+    @receiver(user_locked_out)
+    def send_lockout_notice(sender, request, username, ip_address, **kwargs):
+        """Email the account owner when django-axes locks them out"""
+        if not username or not User.objects.filter(email=User.objects.normalize_email(username)).exists():
+            return
+        from ..services.email_service import EmailService
+        EmailService.queue([
+            EmailService.build_message('account_locked', username, ip_address=ip_address)
+        ])
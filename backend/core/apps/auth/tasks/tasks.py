@@ -1,19 +1,102 @@
 from celery import shared_task
+from celery.signals import worker_process_init, worker_process_shutdown
 
-@shared_task
-def send_welcome_email(user_email):
+
+@worker_process_init.connect
+def warm_email_templates(**kwargs):
+    """Compile email templates once per worker process instead of per message."""
+    from ..services.email_service import EmailService
+    EmailService.warm_templates()
+
+
+@worker_process_shutdown.connect
+def close_email_connections(**kwargs):
+    """Close pooled SMTP connections when a worker process exits."""
+    from ..services.email_service import get_connection_pool
+    get_connection_pool().close_all()
+
+
+@worker_process_shutdown.connect
+def flush_audit_events(**kwargs):
+    """Write buffered audit events before a worker process exits."""
+    from ..services.audit_service import AuditService
+    AuditService.flush()
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=5)
+def send_transactional_emails(self, messages):
+    """
+    Deliver a batch of transactional emails over a pooled SMTP connection.
+
+    ``messages`` is a list of specs built by EmailService.build_message().
+    If the connection fails part-way, only the undelivered remainder is
+    retried, with exponential backoff.
+    """
+    from ..services.email_service import EmailService
+
+    failed = EmailService.send_batch(messages)
+    if failed:
+        raise self.retry(
+            args=[failed],
+            countdown=EmailService.retry_countdown(self.request.retries),
+        )
+    return len(messages)
+
+@shared_task(ignore_result=True)
+def process_password_reset_request(email):
     """
-    Send welcome email to new user.
-    TODO: Implement actual email sending logic.
+    Issue a password reset token for the given email and send the reset email.
+
+    Called from PasswordResetView so that the user lookup, token rotation and
+    mail delivery never run on the request path. Unknown emails are a silent
+    no-op.
     """
     import logging
+    from datetime import timedelta
+    from django.conf import settings
+    from django.db import transaction
+    from django.utils import timezone
+    from ..models import User, PasswordResetToken
+    from ..services.email_service import EmailService
+    from ..utils.utils import generate_reset_token, log_auth_event
+
     logger = logging.getLogger(__name__)
-    
-    logger.info(f"Sending welcome email to {user_email}")
-    # TODO: Replace with actual email service implementation
-    # Example: send_email_service.send(to=user_email, template='welcome')
-    
-    return f"Welcome email queued for {user_email}"
+
+    try:
+        user = User.objects.get(email=User.objects.normalize_email(email))
+    except User.DoesNotExist:
+        logger.info("Password reset requested for an unknown email; nothing to do")
+        return "No matching account"
+
+    lifetime_hours = getattr(settings, 'PASSWORD_RESET_TOKEN_LIFETIME_HOURS', 1)
+    token = generate_reset_token()
+
+    with transaction.atomic():
+        # Only the most recent token is ever valid
+        PasswordResetToken.objects.filter(user=user).delete()
+        PasswordResetToken.objects.create(
+            user=user,
+            token=token,
+            expires_at=timezone.now() + timedelta(hours=lifetime_hours)
+        )
+
+    reset_url = getattr(
+        settings, 'PASSWORD_RESET_URL', 'http://localhost:3000/reset-password?token={token}'
+    ).format(token=token)
+    message = EmailService.build_message(
+        'password_reset', user.email, reset_url=reset_url, lifetime_hours=lifetime_hours
+    )
+    # Already on a worker: try to deliver right away, hand off to the retrying task on failure
+    failed = EmailService.send_batch([message])
+    if failed:
+        send_transactional_emails.apply_async(
+            args=[failed], countdown=EmailService.retry_countdown(0)
+        )
+
+    log_auth_event(user, 'password_reset_requested', None, success=True)
+    logger.info(f"Password reset token issued for user ID: {user.id}")
+
+    return f"Password reset token issued for user {user.id}"
 
 @shared_task
 def process_user_data(user_id):
@@ -33,42 +116,12 @@ def process_user_data(user_id):
 def cleanup_user_mfa_data(user_id):
     """
     Clean up all MFA-related data for a specific user when MFA is disabled.
-    This includes backup codes, unconfirmed TOTP devices, and other MFA artifacts.
+    This includes backup codes and unconfirmed TOTP devices.
     """
-    import logging
-    from django.contrib.auth import get_user_model
-    from django_otp.plugins.otp_totp.models import TOTPDevice
-    from ..models import BackupCode
+    from ..services.mfa_service import MFAService
 
-    logger = logging.getLogger(__name__)
-    User = get_user_model()
-    print("here in the task ")
-    try:
-        user = User.objects.get(id=user_id)
-        
-        # Delete all backup codes (used and unused) for this user
-        backup_codes_deleted, _ = BackupCode.objects.filter(user=user).delete()
-        
-        # Delete any remaining unconfirmed TOTP devices for this user
-        unconfirmed_totp_deleted, _ = TOTPDevice.objects.filter(
-            user=user, 
-            confirmed=False
-        ).delete()
-        
-        logger.info(
-            f"MFA cleanup completed for user {user.email}: "
-            f"Deleted {backup_codes_deleted} backup codes, "
-            f"{unconfirmed_totp_deleted} unconfirmed TOTP devices"
-        )
-        
-        return f"MFA cleanup completed for user {user_id}: {backup_codes_deleted} backup codes, {unconfirmed_totp_deleted} TOTP devices deleted"
-        
-    except User.DoesNotExist:
-        logger.error(f"User with ID {user_id} not found during MFA cleanup")
-        return f"User {user_id} not found"
-    except Exception as e:
-        logger.error(f"Error during MFA cleanup for user {user_id}: {str(e)}")
-        return f"Error during MFA cleanup for user {user_id}: {str(e)}"
+    backup_codes_deleted, unconfirmed_totp_deleted = MFAService.cleanup_user_data(user_id)
+    return f"MFA cleanup completed for user {user_id}: {backup_codes_deleted} backup codes, {unconfirmed_totp_deleted} TOTP devices deleted"
 
 @shared_task
 def clean_mfa_data():
@@ -96,11 +149,109 @@ def clean_mfa_data():
     # Clean up used backup codes
     used_backup_code_retention_days = getattr(settings, 'USED_BACKUP_CODE_RETENTION_DAYS', 90)
     backup_code_cutoff_time = timezone.now() - timedelta(days=used_backup_code_retention_days)
-    deleted_backup_count, _ = BackupCode.objects.filter(
-        used=True,
-        used_at__lt=backup_code_cutoff_time
-    ).delete()
+    deleted_backup_count = BackupCode.cleanup_used(
+        backup_code_cutoff_time,
+        batch_size=getattr(settings, 'AUTH_PURGE_BATCH_SIZE', 5000)
+    )
     logger.info(f"Cleaned up {deleted_backup_count} used backup codes")
 
     return f"MFA data cleanup complete. Deleted {deleted_totp_count} TOTP devices and {deleted_backup_count} backup codes."
 
+@shared_task
+def purge_expired_password_reset_tokens():
+    """
+    Delete expired password reset tokens in chunks.
+    """
+    import logging
+    from django.conf import settings
+    from ..models import PasswordResetToken
+
+    logger = logging.getLogger(__name__)
+
+    deleted_count = PasswordResetToken.cleanup_expired(
+        batch_size=getattr(settings, 'AUTH_PURGE_BATCH_SIZE', 5000)
+    )
+    logger.info(f"Purged {deleted_count} expired password reset tokens")
+
+    return f"Purged {deleted_count} expired password reset tokens."
+
+@shared_task(ignore_result=True)
+def drain_outbox():
+    """
+    Run the consumers for pending outbox events in batches.
+
+    Scheduled by Celery Beat every OUTBOX_DRAIN_INTERVAL_SECONDS; safe to run
+    on several workers at once.
+    """
+    import logging
+    from ..services.outbox_service import OutboxService
+
+    logger = logging.getLogger(__name__)
+
+    processed = OutboxService.drain()
+    if processed:
+        logger.info(f"Processed {processed} outbox events")
+    return processed
+
+@shared_task
+def purge_processed_outbox_events():
+    """
+    Delete processed outbox events past the retention window in chunks.
+    """
+    import logging
+    from datetime import timedelta
+    from django.conf import settings
+    from django.utils import timezone
+    from ..models import OutboxEvent
+
+    logger = logging.getLogger(__name__)
+
+    cutoff = timezone.now() - timedelta(days=getattr(settings, 'OUTBOX_RETENTION_DAYS', 7))
+    deleted_count = OutboxEvent.cleanup_processed(
+        cutoff,
+        batch_size=getattr(settings, 'AUTH_PURGE_BATCH_SIZE', 5000)
+    )
+    logger.info(f"Purged {deleted_count} processed outbox events")
+
+    return f"Purged {deleted_count} processed outbox events."
+
+@shared_task
+def maintain_audit_partitions():
+    """
+    Create upcoming monthly audit partitions and drop expired ones.
+    """
+    import logging
+    from ..services.audit_service import drop_expired_audit_partitions, ensure_audit_partitions
+
+    logger = logging.getLogger(__name__)
+
+    created = ensure_audit_partitions()
+    dropped = drop_expired_audit_partitions()
+    logger.info(f"Audit partitions: created {created or 'none'}, dropped {dropped or 'none'}")
+
+    return f"Created {len(created)} and dropped {len(dropped)} audit partitions."
+
+@shared_task(bind=True, ignore_result=True, max_retries=3)
+def generate_avatar_thumbnails(self, sha256):
+    """
+    Write the thumbnails of a newly uploaded avatar and publish their URLs.
+
+    Queued by AvatarService.set_avatar once the upload commits.
+    """
+    from ..services.avatar_service import AvatarService
+
+    try:
+        AvatarService.generate_thumbnails(sha256)
+    except OSError as exc:
+        # Storage errors are usually transient; a corrupt image fails every retry
+        raise self.retry(exc=exc, countdown=30 * 2 ** self.request.retries)
+
+@shared_task
+def purge_unused_avatars():
+    """
+    Delete avatar images and files that no profile uses any more.
+    """
+    from ..services.avatar_service import AvatarService
+
+    deleted_count = AvatarService.purge_unused()
+    return f"Purged {deleted_count} unused avatars."
@@ -0,0 +1,60 @@
+"""
+Tests for the avatar purge (AvatarService.purge_unused).
+
+    cd backend/core
+    python manage.py test apps.auth.tests.test_avatars --settings=settings.testing
+"""
+
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.auth.models import Avatar, User
+from apps.auth.services.avatar_service import AvatarService, _lock_unused
+
+
+class PurgeUnusedAvatarsTests(TestCase):
+    """Unused avatars past the retention window are deleted with their files."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root, AVATAR_UNUSED_RETENTION_HOURS=24))
+
+    def make_avatar(self, sha256, age_hours):
+        name = default_storage.save(f'avatars/{sha256[:2]}/{sha256}.png', ContentFile(b'png'))
+        avatar = Avatar.objects.create(
+            sha256=sha256, format='PNG', width=1, height=1, size=3,
+            files={'original': name}, urls={'original': default_storage.url(name)},
+        )
+        Avatar.objects.filter(pk=sha256).update(created_at=timezone.now() - timedelta(hours=age_hours))
+        return avatar
+
+    def test_purges_only_old_unused_avatars(self):
+        unused = self.make_avatar('a' * 64, age_hours=48)
+        recent = self.make_avatar('b' * 64, age_hours=1)
+        used = self.make_avatar('c' * 64, age_hours=48)
+        user = User.objects.create_user(email='avatar@example.com', password='Avatar-Passw0rd!')
+        user.profile.avatar = used
+        user.profile.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted = AvatarService.purge_unused()
+
+        self.assertEqual(deleted, 1)
+        self.assertEqual(set(Avatar.objects.values_list('pk', flat=True)), {recent.pk, used.pk})
+        self.assertFalse(default_storage.exists(unused.files['original']))
+        self.assertTrue(default_storage.exists(used.files['original']))
+
+    def test_lock_query_has_no_outer_join(self):
+        # PostgreSQL rejects FOR UPDATE on the nullable side of an outer join
+        sql = str(_lock_unused('a' * 64).query)
+        self.assertNotIn('JOIN', sql)
+        self.assertIn('EXISTS', sql)
@@ -0,0 +1,37 @@
+"""
+Tests for DirtyFieldsMixin (common/mixins.py) on the auth models.
+
+    cd backend/core
+    python manage.py test apps.auth.tests.test_dirty_fields --settings=settings.testing
+"""
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.auth.models import User, UserProfile
+
+
+class DirtyFieldsTests(TestCase):
+    """save() writes only what changed, including JSONField values changed in place."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='dirty@example.com', password='Dirty-Passw0rd!')
+        UserProfile.objects.filter(user=cls.user).update(avatar_urls={'original': '/media/a.png'})
+
+    def test_in_place_json_change_is_saved(self):
+        profile = UserProfile.objects.get(user=self.user)
+        profile.avatar_urls['64'] = '/media/a-64.webp'
+        self.assertEqual(set(profile.get_dirty_fields()), {'avatar_urls'})
+
+        profile.save()
+
+        self.assertEqual(UserProfile.objects.get(pk=profile.pk).avatar_urls['64'], '/media/a-64.webp')
+        self.assertFalse(profile.is_dirty)
+
+    def test_unchanged_instance_is_not_written(self):
+        profile = UserProfile.objects.get(user=self.user)
+        with CaptureQueriesContext(connection) as captured:
+            profile.save()
+        self.assertEqual(len(captured), 0)
@@ -0,0 +1,66 @@
+"""
+Tests for retrying transactional email (EmailService.send_batch).
+
+    cd backend/core
+    python manage.py test apps.auth.tests.test_email_service --settings=settings.testing
+"""
+
+import smtplib
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from apps.auth.services import email_service
+from apps.auth.services.email_service import EmailConnectionPool, EmailService, is_transient_email_error
+
+
+class FakeBackend:
+    """Email backend whose sends raise the scripted errors in turn (None sends)."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.delivered = 0
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        error = self.errors.pop(0) if self.errors else None
+        if error is not None:
+            raise error
+        self.delivered += len(messages)
+        return len(messages)
+
+
+class SendBatchTests(SimpleTestCase):
+    """Only 4xx replies and network errors leave messages to retry."""
+
+    def send(self, *errors):
+        backend = FakeBackend(errors)
+        specs = [EmailService.build_message('welcome', f"user{n}@example.com") for n in range(3)]
+        with mock.patch.object(email_service, 'get_connection', return_value=backend), \
+                mock.patch.object(email_service, 'get_connection_pool', return_value=EmailConnectionPool(size=1)):
+            return EmailService.send_batch(specs), backend
+
+    def test_permanent_rejection_is_dropped(self):
+        failed, backend = self.send(smtplib.SMTPDataError(550, b'Message rejected'))
+        self.assertEqual(failed, [])
+        self.assertEqual(backend.delivered, 2)
+
+    def test_temporary_rejection_is_retried(self):
+        failed, backend = self.send(None, smtplib.SMTPDataError(451, b'Try again later'))
+        self.assertEqual([spec['to'] for spec in failed], ['user1@example.com', 'user2@example.com'])
+        self.assertEqual(backend.delivered, 1)
+
+    def test_disconnect_is_retried(self):
+        failed, _ = self.send(smtplib.SMTPServerDisconnected('gone'))
+        self.assertEqual(len(failed), 3)
+
+    def test_classification(self):
+        self.assertTrue(is_transient_email_error(smtplib.SMTPSenderRefused(421, b'Busy', 'from@example.com')))
+        self.assertFalse(is_transient_email_error(smtplib.SMTPSenderRefused(553, b'Denied', 'from@example.com')))
+        self.assertTrue(is_transient_email_error(ConnectionResetError()))
+        self.assertFalse(is_transient_email_error(ValueError()))
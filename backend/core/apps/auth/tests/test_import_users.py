@@ -0,0 +1,55 @@
+"""
+Tests for the import_users management command.
+
+    cd backend/core
+    python manage.py test apps.auth.tests.test_import_users --settings=settings.testing
+"""
+
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DataError
+from django.test import TestCase
+
+from apps.auth.models import User
+from apps.auth.services.user_service import UserService
+
+HEADER = 'email,first_name,last_name,timezone\n'
+
+
+class ImportUsersTests(TestCase):
+    """Bad rows are reported and the rest of the file is still imported."""
+
+    def import_csv(self, rows):
+        handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        self.addCleanup(os.unlink, handle.name)
+        with handle:
+            handle.write(HEADER + rows)
+        stderr = StringIO()
+        call_command('import_users', handle.name, workers=1, stdout=StringIO(), stderr=stderr)
+        return stderr.getvalue()
+
+    def test_over_long_timezone_is_reported(self):
+        errors = self.import_csv(
+            f"good@example.com,Good,User,Europe/Paris\n"
+            f"long@example.com,Long,User,{'X' * 51}\n"
+        )
+        self.assertIn('long@example.com: timezone must be at most 50 characters', errors)
+        self.assertEqual(list(User.objects.values_list('email', flat=True)), ['good@example.com'])
+        self.assertEqual(User.objects.get().profile.timezone, 'Europe/Paris')
+
+    def test_database_error_fails_only_its_row(self):
+        bulk_create_users = UserService.bulk_create_users
+
+        def reject_bad(rows):
+            if any(row['email'] == 'bad@example.com' for row in rows):
+                raise DataError('value too long')
+            return bulk_create_users(rows)
+
+        with mock.patch.object(UserService, 'bulk_create_users', side_effect=reject_bad):
+            errors = self.import_csv('bad@example.com,Bad,User,UTC\nok@example.com,Ok,User,UTC\n')
+        self.assertIn('bad@example.com: Database error: value too long', errors)
+        self.assertEqual(list(User.objects.values_list('email', flat=True)), ['ok@example.com'])
@@ -0,0 +1,41 @@
+"""
+Tests for the outbox mfa_cleanup consumer (OutboxService.drain).
+
+    cd backend/core
+    python manage.py test apps.auth.tests.test_outbox --settings=settings.testing
+"""
+
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase
+
+from apps.auth.models import BackupCode, OutboxEvent, User
+from apps.auth.services.mfa_service import MFAService
+from apps.auth.services.outbox_service import OutboxService
+
+
+class MFACleanupConsumerTests(TestCase):
+    """A failed cleanup leaves the event pending so it is retried."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='cleanup@example.com', password='Cleanup-Passw0rd!')
+        BackupCode.objects.bulk_create(BackupCode(user=cls.user, code=f"CLEANUP{n}") for n in range(3))
+
+    def test_cleanup_deletes_backup_codes(self):
+        event = OutboxService.publish('mfa.cleanup', user=self.user)
+        self.assertEqual(OutboxService.drain(), 1)
+        self.assertFalse(BackupCode.objects.filter(user=self.user).exists())
+        event.refresh_from_db()
+        self.assertIsNotNone(event.processed_at)
+
+    def test_failed_cleanup_is_retried(self):
+        event = OutboxService.publish('mfa.cleanup', user=self.user)
+        with mock.patch.object(MFAService, 'cleanup_user_data', side_effect=DatabaseError('down')):
+            self.assertEqual(OutboxService.drain(), 0)
+        event.refresh_from_db()
+        self.assertIsNone(event.processed_at)
+        self.assertEqual(event.attempts, 1)
+        self.assertIn('mfa_cleanup: down', event.last_error)
+        self.assertEqual(BackupCode.objects.filter(user=self.user).count(), 3)
@@ -0,0 +1,275 @@
+"""
+Query-count regression harness for the auth API.
+
+Every route in apps/auth/api/urls.py is called with a representative request,
+and the SQL it runs is recorded. Literals are normalized away, so only the
+shape of each query is compared. The committed baseline
+(query_counts.json) holds the query count and shapes per case. A case fails
+when its queries differ from the baseline: more or fewer of them, or a
+different query in place of one, and the failure shows a diff of the
+queries. Fewer means the baseline should be lowered with the change that
+saved them.
+
+    cd backend/core
+    python manage.py test apps.auth.tests.test_query_counts --settings=settings.testing
+
+After an intended change in queries, rewrite the baseline and commit it with
+the change:
+
+    UPDATE_QUERY_BASELINE=1 python manage.py test apps.auth.tests.test_query_counts --settings=settings.testing
+"""
+
+import difflib
+import json
+import os
+import re
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django_otp.oath import TOTP
+from django_otp.plugins.otp_totp.models import TOTPDevice
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from apps.auth.api import urls as api_urls
+from apps.auth.models import AuthEvent, BackupCode, PasswordResetToken, User
+from apps.auth.services.cache_service import USER_KEY
+
+BASELINE_PATH = Path(__file__).with_name('query_counts.json')
+PASSWORD = 'Harness-Passw0rd!'
+TOTP_KEY = '3132333435363738393031323334353637383930'
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), '%s'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '%s'),
+    (re.compile(r'\b(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT) "?\w+"?'), r'\1 %s'),
+    (re.compile(r'\bIN \((?:%s, )*%s\)'), 'IN (...)'),
+    (re.compile(r'VALUES (\([^()]*\))(?:, \([^()]*\))+'), r'VALUES \1, ...'),
+]
+
+
+def query_shape(sql):
+    """Return sql with literals, IN lists and multi-row VALUES collapsed."""
+    for pattern, replacement in _LITERALS:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+def _totp_code():
+    return f"{TOTP(bytes.fromhex(TOTP_KEY)).token():06d}"
+
+
+class Case:
+    """
+    One request against one route.
+
+    Args:
+        route: URL name in apps/auth/api/urls.py
+        method: HTTP method
+        user: 'user', 'mfa_user', 'staff' or None (anonymous)
+        data: Request body, or a callable taking the test case and returning it
+        status: Expected response status
+        format: Request body encoding, 'json' or 'multipart'
+        headers: Extra request headers (WSGI names), or a callable taking the
+            test case and returning them; called before queries are captured
+    """
+
+    def __init__(self, name, route, method, user=None, data=None, status=200, format='json', headers=None):
+        self.name = name
+        self.route = route
+        self.method = method
+        self.user = user
+        self.data = data
+        self.status = status
+        self.format = format
+        self.headers = headers
+
+
+def _login_mfa_token(test):
+    response = test.client.post(reverse('accounts:login'), {'email': test.mfa_user.email, 'password': PASSWORD}, format='json')
+    return response.json()['mfa_token']
+
+
+def _pending_device(test):
+    device = TOTPDevice.objects.create(user=test.user, name='pending', key=TOTP_KEY, confirmed=False)
+    return {'device_id': device.id, 'code': _totp_code()}
+
+
+def _reset_token(test):
+    token = PasswordResetToken.objects.create(
+        user=test.user, token='harness-reset-token', expires_at=timezone.now() + timedelta(hours=1)
+    )
+    return {'token': token.token, 'new_password': PASSWORD, 'new_password_confirm': PASSWORD}
+
+
+def _if_none_match(route, user):
+    """Headers revalidating the current ETag of a GET route, with a warm cache."""
+    def headers(test):
+        user_id = getattr(test, user).pk
+        token = AccessToken.for_user(getattr(test, user))
+        response = test.client.get(reverse(f"accounts:{route}"), HTTP_AUTHORIZATION=f"Bearer {token}")
+        # AuthCacheService does not cache inside a transaction, and every test
+        # runs in one; store the user as a committed earlier request would
+        cache.set(USER_KEY.format(user_id), User.objects.select_related('profile').get(pk=user_id))
+        return {'HTTP_IF_NONE_MATCH': response['ETag']}
+    return headers
+
+
+def _avatar_file(test):
+    image = BytesIO()
+    Image.new('RGB', (32, 32), 'teal').save(image, 'PNG')
+    image.name = 'avatar.png'
+    image.seek(0)
+    return {'avatar': image}
+
+
+CASES = [
+    Case('register', 'register', 'post', data={
+        'email': 'new.user@example.com', 'password': PASSWORD, 'password_confirm': PASSWORD,
+        'first_name': 'New', 'last_name': 'User',
+    }, status=201),
+    Case('login', 'login', 'post', data=lambda test: {'email': test.user.email, 'password': PASSWORD}),
+    Case('login_mfa_required', 'login', 'post', data=lambda test: {'email': test.mfa_user.email, 'password': PASSWORD}),
+    Case('login_failed', 'login', 'post', data=lambda test: {'email': test.user.email, 'password': 'wrong'}, status=401),
+    Case('logout', 'logout', 'post', user='user', data=lambda test: {'refresh': str(RefreshToken.for_user(test.user))}),
+    Case('token_refresh', 'token_refresh', 'post', data=lambda test: {'refresh': str(RefreshToken.for_user(test.user))}),
+    Case('password_reset', 'password_reset', 'post', data=lambda test: {'email': test.user.email}),
+    Case('password_reset_confirm', 'password_reset_confirm', 'post', data=_reset_token),
+    Case('password_change', 'password_change', 'post', user='user',
+         data={'current_password': PASSWORD, 'new_password': 'Changed-Passw0rd!'}),
+    Case('mfa_verify', 'mfa_verify', 'post', data=lambda test: {'mfa_token': _login_mfa_token(test), 'code': _totp_code()}),
+    Case('mfa_enroll_start', 'mfa_enroll', 'post', user='user'),
+    Case('mfa_enroll_confirm', 'mfa_enroll', 'put', user='user', data=_pending_device),
+    Case('mfa_disable', 'mfa_disable', 'post', user='mfa_user'),
+    Case('mfa_status', 'mfa_status', 'get', user='mfa_user'),
+    Case('mfa_status_not_modified', 'mfa_status', 'get', user='mfa_user', status=304,
+         headers=_if_none_match('mfa_status', 'mfa_user')),
+    Case('mfa_backup_codes', 'mfa_backup_codes', 'get', user='mfa_user'),
+    Case('mfa_backup_codes_regenerate', 'mfa_backup_codes', 'post', user='mfa_user'),
+    Case('profile', 'profile', 'get', user='user'),
+    Case('profile_not_modified', 'profile', 'get', user='user', status=304,
+         headers=_if_none_match('profile', 'user')),
+    Case('profile_put', 'profile', 'put', user='user', data={
+        'first_name': 'Put', 'last_name': 'User', 'email': 'user@example.com', 'bio': 'Updated',
+    }),
+    Case('profile_patch', 'profile', 'patch', user='user', data={'first_name': 'Patched'}),
+    Case('avatar_upload', 'avatar', 'post', user='user', data=_avatar_file, format='multipart'),
+    Case('avatar_delete', 'avatar', 'delete', user='user', status=204),
+    Case('audit_events', 'audit_events', 'get', user='staff', data={'email': 'user@example.com'}),
+    Case('audit_events_export', 'audit_events_export', 'get', user='staff', data={'email': 'user@example.com'}),
+]
+
+
+@override_settings(AUTHENTICATION_BACKENDS=['django.contrib.auth.backends.ModelBackend'])
+class QueryCountTests(TestCase):
+    """Fails when an endpoint's queries differ from its committed baseline."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com', password=PASSWORD, first_name='Plain', last_name='User',
+            must_change_password=False,
+        )
+        cls.mfa_user = User.objects.create_user(
+            email='mfa.user@example.com', password=PASSWORD, first_name='Mfa', last_name='User',
+            must_change_password=False, mfa_enrolled=True,
+        )
+        TOTPDevice.objects.create(user=cls.mfa_user, name='default', key=TOTP_KEY, confirmed=True)
+        BackupCode.objects.bulk_create(BackupCode(user=cls.mfa_user, code=f"HARNESS{n}") for n in range(10))
+        cls.staff = User.objects.create_user(
+            email='staff@example.com', password=PASSWORD, is_staff=True, must_change_password=False,
+        )
+        AuthEvent.objects.bulk_create(
+            AuthEvent(user=cls.user, email=cls.user.email, event_type='login_success', ip_address='192.0.2.1')
+            for _ in range(5)
+        )
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Avatar uploads write files; 304 responses need versions that persist
+        # between requests, which the testing DummyCache does not keep
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        cls.enterClassContext(override_settings(
+            MEDIA_ROOT=media_root,
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'query-counts'}},
+        ))
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def run_case(self, case):
+        """Run one case and return the normalized shapes of the queries it executed."""
+        self.client.credentials()
+        # Each case starts with a cold cache
+        cache.clear()
+        if case.user:
+            token = AccessToken.for_user(getattr(self, case.user))
+            self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        data = case.data(self) if callable(case.data) else case.data
+        headers = (case.headers(self) if callable(case.headers) else case.headers) or {}
+        url = reverse(f"accounts:{case.route}")
+        request = getattr(self.client, case.method)
+
+        with CaptureQueriesContext(connection) as captured:
+            if case.method == 'get':
+                response = request(url, data, **headers)
+            else:
+                response = request(url, data, format=case.format, **headers)
+            if response.streaming:
+                b''.join(response.streaming_content)
+
+        self.assertEqual(
+            response.status_code, case.status,
+            f"{case.name}: expected {case.status}, got {response.status_code}: {getattr(response, 'data', '')}",
+        )
+        return [query_shape(query['sql']) for query in captured.captured_queries]
+
+    def test_every_route_has_a_case(self):
+        routes = {pattern.name for pattern in api_urls.urlpatterns}
+        missing = routes - {case.route for case in CASES}
+        self.assertFalse(missing, f"Add a Case for: {', '.join(sorted(missing))}")
+
+    def test_query_counts(self):
+        recorded = {}
+        for case in CASES:
+            # Each case starts from the same data
+            with transaction.atomic():
+                recorded[case.name] = self.run_case(case)
+                transaction.set_rollback(True)
+
+        if os.environ.get('UPDATE_QUERY_BASELINE'):
+            baseline = {name: {'count': len(shapes), 'queries': shapes} for name, shapes in recorded.items()}
+            BASELINE_PATH.write_text(json.dumps(baseline, indent=2) + '\n')
+            return
+
+        baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        failures = []
+        for name, shapes in recorded.items():
+            if name not in baseline:
+                failures.append(f"{name}: no baseline ({len(shapes)} queries)")
+                continue
+            expected = baseline[name]
+            if shapes != expected['queries']:
+                diff = difflib.unified_diff(
+                    expected['queries'], shapes, fromfile=f"{name} (baseline)", tofile=f"{name} (now)", lineterm='',
+                )
+                failures.append(
+                    f"{name}: {len(shapes)} queries, baseline {expected['count']}\n" + '\n'.join(diff)
+                )
+        if failures:
+            self.fail(
+                "Queries changed. If this is intended, rerun with UPDATE_QUERY_BASELINE=1 "
+                "and commit query_counts.json.\n\n" + '\n\n'.join(failures)
+            )
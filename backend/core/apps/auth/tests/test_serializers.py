@@ -0,0 +1,111 @@
+"""
+Tests for the auth serializers: compiled serializers (common/serializers.py)
+must return what DRF returns, and only email conflicts become email errors.
+
+    cd backend/core
+    python manage.py test apps.auth.tests.test_serializers --settings=settings.testing
+"""
+
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django_otp.plugins.otp_totp.models import TOTPDevice
+from rest_framework import serializers
+
+from apps.auth.api.serializers import (
+    MFAStatusSerializer, UserRegistrationSerializer, UserSerializer, mfa_status_representation,
+    user_representation,
+)
+from apps.auth.models import BackupCode, User, UserProfile
+from apps.auth.services.mfa_service import MFAService
+from common.serializers import CompiledSerializer
+
+PASSWORD = 'Serializer-Passw0rd!'
+
+
+class CompiledSerializerTests(TestCase):
+    """CompiledSerializer output equals ``serializer_class(instance).data``."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='plain@example.com', password=PASSWORD, first_name='Plain')
+        cls.mfa_user = User.objects.create_user(
+            email='mfa@example.com', password=PASSWORD, first_name='Mfa', last_name='User', mfa_enrolled=True,
+        )
+        TOTPDevice.objects.create(user=cls.mfa_user, name='default', confirmed=True)
+        BackupCode.objects.bulk_create(BackupCode(user=cls.mfa_user, code=f"SERIAL{n}") for n in range(3))
+
+    def fresh(self, user):
+        return User.objects.get(pk=user.pk)
+
+    def assertSameUser(self, user):
+        self.assertEqual(user_representation(user), UserSerializer(user).data)
+
+    def test_user_with_profile(self):
+        UserProfile.objects.filter(user=self.user).update(
+            phone_number='+15550100', bio='Hello', avatar_urls={'original': '/media/a.png'},
+        )
+        User.objects.filter(pk=self.user.pk).update(last_login=timezone.now())
+        user = self.fresh(self.user)
+        self.assertSameUser(user)
+        self.assertEqual(user_representation(user)['profile']['avatar'], {'original': '/media/a.png'})
+
+    def test_user_without_profile(self):
+        UserProfile.objects.filter(user=self.user).delete()
+        user = self.fresh(self.user)
+        self.assertSameUser(user)
+        self.assertEqual(user_representation(user)['profile'], {'phone_number': '', 'bio': '', 'avatar': None})
+
+    def test_user_with_groups(self):
+        self.user.groups.add(Group.objects.create(name='teachers'), Group.objects.create(name='students'))
+        user = self.fresh(self.user)
+        self.assertSameUser(user)
+        self.assertCountEqual(user_representation(user)['groups'], ['teachers', 'students'])
+
+    def test_mfa_user(self):
+        self.assertSameUser(self.fresh(self.mfa_user))
+
+    def test_mfa_status_enabled(self):
+        status = MFAService.get_mfa_status(self.mfa_user)
+        self.assertIsNotNone(status['enrollment_date'])
+        self.assertEqual(mfa_status_representation(status), MFAStatusSerializer(status).data)
+
+    def test_mfa_status_disabled(self):
+        status = MFAService.get_mfa_status(self.user)
+        self.assertIsNone(status['enrollment_date'])
+        self.assertEqual(mfa_status_representation(status), MFAStatusSerializer(status).data)
+
+    @override_settings(FAST_SERIALIZERS_ENABLED=False)
+    def test_disabled_uses_drf(self):
+        compiled = CompiledSerializer(UserSerializer)
+        user = self.fresh(self.mfa_user)
+        with mock.patch.object(CompiledSerializer, '_compile', side_effect=AssertionError('compiled')):
+            self.assertEqual(compiled(user), UserSerializer(user).data)
+        self.assertIsNone(compiled.source)
+
+
+class RegistrationConflictTests(TestCase):
+    """UserRegistrationSerializer.create maps only email conflicts to a validation error."""
+
+    def register(self, email):
+        serializer = UserRegistrationSerializer(data={
+            'email': email, 'password': PASSWORD, 'password_confirm': PASSWORD,
+            'first_name': 'Reg', 'last_name': 'User',
+        })
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_duplicate_email(self):
+        self.register('taken@example.com')
+        with self.assertRaises(serializers.ValidationError) as ctx:
+            self.register('Taken@Example.com')
+        self.assertIn('email', ctx.exception.detail)
+
+    def test_other_integrity_errors_are_raised(self):
+        error = IntegrityError('NOT NULL constraint failed: auth_user.first_name')
+        with mock.patch.object(User.objects, 'create_user', side_effect=error):
+            with self.assertRaises(IntegrityError):
+                self.register('new@example.com')
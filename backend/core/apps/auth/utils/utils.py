@@ -1,3 +1,4 @@
+import hashlib
 import secrets
 import string
 import logging
@@ -6,14 +7,19 @@ from ..models import BackupCode
 logger = logging.getLogger(__name__)
 
 def log_auth_event(user, event_type, request, success=True, details=None):
-    """No-op function - audit logging has been removed for clean authentication."""
-    pass
+    """Record an audit event; buffered and written in batches by AuditService"""
+    from ..services.audit_service import AuditService
+    try:
+        AuditService.record(user, event_type, request, success=success, details=details)
+    except Exception as e:
+        # Auditing must never break the request that triggered it
+        logger.error(f"Failed to record auth event {event_type}: {e}")
 
 def get_client_ip(request):
     """Get client IP address from request"""
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
     if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
+        ip = x_forwarded_for.split(',')[0].strip()
     else:
         ip = request.META.get('REMOTE_ADDR')
     return ip
@@ -27,6 +33,16 @@ def generate_backup_codes(user, count=10):
         codes.append(code)
     return codes
 
+def generate_reset_token(length=64):
+    """Generate a secure random token for password reset"""
+    alphabet = string.ascii_letters + string.digits
+    return ''.join(secrets.choice(alphabet) for _ in range(length))
+
+def password_reset_dedup_key(email):
+    """Cache key used to collapse repeated reset requests for one email"""
+    digest = hashlib.sha256(email.strip().lower().encode('utf-8')).hexdigest()
+    return f"password_reset:requested:{digest}"
+
 def revoke_user_sessions(user):
     """Revoke all active sessions for a user"""
     # This would invalidate JWT refresh tokens and clear sessions
@@ -0,0 +1,135 @@
+"""
+Worker warm-up.
+
+A freshly started worker pays for a number of one-off costs on its first
+requests: the first database and cache connections, building the URL
+resolver and DRF serializer fields, loading the common-password list and
+importing the views. warm_up() pays them before the worker accepts
+traffic. gunicorn.conf.py calls it from the post_worker_init hook.
+
+Every step is best effort: a failing step is logged and skipped, so a
+database or cache outage never keeps a worker from starting.
+"""
+
+import inspect
+import logging
+import time
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# TEST-NET address: keeps warm-up requests out of the throttle buckets of real clients
+WARMUP_REMOTE_ADDR = '192.0.2.1'
+
+
+def _open_database_connections():
+    from django.db import connections
+
+    for alias in connections:
+        connection = connections[alias]
+        pool = getattr(connection, 'pool', None)
+        if pool is not None:
+            # Fill the pool up to its configured min_size
+            pool.open(wait=True)
+        connection.ensure_connection()
+    if getattr(settings, 'DATABASE_REPLICAS', None):
+        from common.replicas import replica_monitor
+        # Check replica lag now rather than on the first read
+        replica_monitor.refresh()
+
+
+def _open_cache_connections():
+    from django.core.cache import caches
+
+    for alias in settings.CACHES:
+        caches[alias].get('warmup:ping')
+
+
+def _build_url_resolver():
+    from django.urls import get_resolver, reverse
+    from .api import urls as api_urls
+
+    for pattern in api_urls.urlpatterns:
+        reverse(f"{api_urls.app_name}:{pattern.name}")
+    # reverse() populates the reverse lookup tables; resolving needs the compiled patterns
+    get_resolver().resolve(reverse(f"{api_urls.app_name}:login"))
+
+
+def _build_serializers():
+    from rest_framework.serializers import BaseSerializer
+    from .api import serializers
+
+    for _, cls in inspect.getmembers(serializers, inspect.isclass):
+        if issubclass(cls, BaseSerializer) and cls.__module__ == serializers.__name__:
+            cls().fields
+
+
+def _load_password_validators():
+    from django.contrib.auth.password_validation import get_default_password_validators
+
+    # Cached for the life of the process; CommonPasswordValidator reads its word list here
+    get_default_password_validators()
+
+
+def _prime_password_hasher():
+    from django.contrib.auth.hashers import get_hasher
+
+    # Loads the hasher's library (argon2, bcrypt) and runs one full hash
+    get_hasher().encode('warm-up password', get_hasher().salt())
+
+
+def _run_requests():
+    from django.test import Client
+    from django.urls import reverse
+    from .api import urls as api_urls
+
+    # OPTIONS goes through the middleware, authentication and the view's
+    # dispatch without touching data or writing audit events
+    client = Client(REMOTE_ADDR=WARMUP_REMOTE_ADDR, HTTP_HOST=_warmup_host())
+    for pattern in api_urls.urlpatterns:
+        client.options(reverse(f"{api_urls.app_name}:{pattern.name}"))
+
+
+def _warmup_host():
+    hosts = [host for host in settings.ALLOWED_HOSTS if host not in ('*',) and not host.startswith('.')]
+    return hosts[0] if hosts else 'localhost'
+
+
+STEPS = [
+    ('database', _open_database_connections),
+    ('cache', _open_cache_connections),
+    ('urls', _build_url_resolver),
+    ('serializers', _build_serializers),
+    ('password_validators', _load_password_validators),
+    ('password_hasher', _prime_password_hasher),
+    ('requests', _run_requests),
+]
+
+
+def warm_up():
+    """
+    Run every warm-up step once in the current process.
+
+    Returns:
+        dict: Step name -> duration in milliseconds, or None if the step failed
+    """
+    if not getattr(settings, 'WARMUP_ENABLED', True):
+        return {}
+
+    skipped = set(getattr(settings, 'WARMUP_SKIP_STEPS', ()))
+    timings = {}
+    started = time.perf_counter()
+    for name, step in STEPS:
+        if name in skipped:
+            continue
+        step_started = time.perf_counter()
+        try:
+            step()
+            timings[name] = round((time.perf_counter() - step_started) * 1000, 1)
+        except Exception as e:
+            timings[name] = None
+            logger.warning(f"Warm-up step {name} failed: {e}")
+
+    total = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(f"Worker warm-up finished in {total} ms: {timings}")
+    return timings
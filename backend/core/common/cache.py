@@ -0,0 +1,317 @@
+"""
+Cache backends that report hits and misses to common.metrics.
+
+Use them in place of the Django backends they extend. The metric label is
+taken from the optional ``METRICS_NAME`` key of the CACHES entry:
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'common.cache.InstrumentedRedisCache',
+            'LOCATION': 'redis://127.0.0.1:6379/1',
+            'METRICS_NAME': 'default',
+        }
+    }
+
+TwoTierCache adds a bounded per-process LRU in front of Redis for
+read-mostly data (see its docstring).
+"""
+
+from collections import OrderedDict
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from .metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    """Count hits and misses of get() and get_many() (get_or_set() uses get())."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        params = args[-1] if args else kwargs.get('params', {})
+        self.metrics_name = params.get('METRICS_NAME', 'default')
+
+    metrics_tier = 'redis'
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            record_cache_lookup(self.metrics_name, 0, 1, self.metrics_tier)
+            return default
+        record_cache_lookup(self.metrics_name, 1, 0, self.metrics_tier)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        record_cache_lookup(self.metrics_name, len(found), len(keys) - len(found), self.metrics_tier)
+        return found
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    pass
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    metrics_tier = 'local'
+
+
+class LocalLRU:
+    """
+    Bounded in-process LRU of pickled values with per-entry expiry.
+
+    Values are stored pickled, like LocMemCache, so callers can modify what
+    they get back. ``generation`` changes on every invalidation; a fill that
+    started before an invalidation is dropped, so a value read from Redis
+    just before another node changed it is never kept.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.generation = 0
+        self._data = OrderedDict()  # key -> (expires_at, pickled)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, pickled, timeout, generation=None):
+        if len(pickled) > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._remove(key)
+            self._data[key] = (time.monotonic() + timeout, pickled)
+            self._bytes += len(pickled)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+
+    def delete(self, key):
+        with self._lock:
+            self.generation += 1
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+
+class TwoTierCache(InstrumentedRedisCache):
+    """
+    Redis cache with a per-process LRU in front of it.
+
+    Reads are served from process memory when possible and from Redis
+    otherwise. Every write or delete also publishes the key on a Redis
+    pub/sub channel, and each process drops the key from its LRU when the
+    message arrives, so processes stay coherent to within the pub/sub
+    delivery delay. The LRU is only used while the subscription is
+    connected; it is emptied when the connection drops, since
+    invalidations may have been missed. LOCAL_TIMEOUT bounds how long a
+    value may stay in the LRU in any case.
+
+    Meant for read-mostly data such as user snapshots and MFA status, not
+    for counters or sessions, which change on most requests:
+
+        'hot': {
+            'BACKEND': 'common.cache.TwoTierCache',
+            'LOCATION': 'redis://127.0.0.1:6379/1',
+            'METRICS_NAME': 'hot',
+            'LOCAL_TIMEOUT': 30,
+            'LOCAL_MAX_ENTRIES': 10000,
+            'LOCAL_MAX_BYTES': 16 * 1024 * 1024,
+        }
+
+    Lookups are counted per tier: ``tier="local"`` for the LRU and
+    ``tier="redis"`` for lookups it could not answer.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self.local_timeout = params.get('LOCAL_TIMEOUT', 30)
+        self.local = LocalLRU(params.get('LOCAL_MAX_ENTRIES', 10000), params.get('LOCAL_MAX_BYTES', 16 * 1024 * 1024))
+        self.channel = params.get('INVALIDATION_CHANNEL') or f"{self.key_prefix or 'cache'}:invalidate:{self.metrics_name}"
+        self._subscribed = False
+        self._listener_pid = None
+        self._node = None
+        self._listener_lock = threading.Lock()
+
+    # Local tier
+
+    def _local_ready(self):
+        """Whether the LRU may be used; starts this process's listener on first use."""
+        if self._listener_pid != os.getpid():
+            with self._listener_lock:
+                if self._listener_pid != os.getpid():
+                    # New process (e.g. a forked worker): nothing inherited is trusted
+                    self._listener_pid = os.getpid()
+                    self._node = uuid.uuid4().hex
+                    self._subscribed = False
+                    self.local.clear()
+                    threading.Thread(target=self._listen, name=f"cache-invalidation-{self.metrics_name}",
+                                     daemon=True).start()
+        return self._subscribed
+
+    def _listen(self):
+        pid = os.getpid()
+        while self._listener_pid == pid:
+            try:
+                pubsub = self._cache.get_client(write=False).pubsub()
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    if message['type'] == 'subscribe':
+                        self.local.clear()
+                        self._subscribed = True
+                    elif message['type'] == 'message':
+                        self._invalidated(message['data'])
+            except Exception as e:
+                logger.warning(f"Cache invalidation channel {self.channel} lost, local tier disabled: {e}")
+            self._subscribed = False
+            self.local.clear()
+            time.sleep(1)
+
+    def _invalidated(self, data):
+        node, _, key = data.decode().partition(':')
+        if node == self._node:
+            return
+        if key == '*':
+            self.local.clear()
+        else:
+            self.local.delete(key)
+
+    def _publish(self, keys):
+        try:
+            client = self._cache.get_client(write=True)
+            for key in keys:
+                client.publish(self.channel, f"{self._node}:{key}")
+        except Exception as e:
+            # Other nodes keep the old value for at most LOCAL_TIMEOUT
+            logger.warning(f"Could not publish cache invalidation on {self.channel}: {e}")
+
+    def _changed(self, keys):
+        """Drop changed keys here and on every other node."""
+        for key in keys:
+            self.local.delete(key)
+        self._local_ready()
+        self._publish(keys)
+
+    def _local_timeout(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        return self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+
+    # Reads
+
+    def get(self, key, default=None, version=None):
+        if not self._local_ready():
+            return super().get(key, default, version)
+        made_key = self.make_key(key, version=version)
+        pickled = self.local.get(made_key)
+        if pickled is not None:
+            record_cache_lookup(self.metrics_name, 1, 0, 'local')
+            return pickle.loads(pickled)
+        record_cache_lookup(self.metrics_name, 0, 1, 'local')
+        generation = self.local.generation
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            return default
+        self.local.set(made_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self.local_timeout, generation)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not self._local_ready():
+            return super().get_many(keys, version)
+        found, missing = {}, []
+        for key in keys:
+            pickled = self.local.get(self.make_key(key, version=version))
+            if pickled is None:
+                missing.append(key)
+            else:
+                found[key] = pickle.loads(pickled)
+        record_cache_lookup(self.metrics_name, len(found), len(missing), 'local')
+        if missing:
+            generation = self.local.generation
+            fetched = super().get_many(missing, version)
+            for key, value in fetched.items():
+                made_key = self.make_key(key, version=version)
+                self.local.set(made_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self.local_timeout, generation)
+            found.update(fetched)
+        return found
+
+    def has_key(self, key, version=None):
+        if self._local_ready() and self.local.get(self.make_key(key, version=version)) is not None:
+            return True
+        return super().has_key(key, version)
+
+    # Writes
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        super().set(key, value, timeout, version)
+        made_key = self.make_key(key, version=version)
+        self._changed([made_key])
+        if self._subscribed and timeout != 0:
+            self.local.set(made_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._local_timeout(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = super().add(key, value, timeout, version)
+        if added:
+            self._changed([self.make_key(key, version=version)])
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = super().set_many(data, timeout, version)
+        self._changed([self.make_key(key, version=version) for key in data])
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        # Only the Redis expiry changes; the local copy keeps its own, shorter one
+        return super().touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        deleted = super().delete(key, version)
+        self._changed([self.make_key(key, version=version)])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        super().delete_many(keys, version)
+        self._changed([self.make_key(key, version=version) for key in keys])
+
+    def incr(self, key, delta=1, version=None):
+        value = super().incr(key, delta, version)
+        self._changed([self.make_key(key, version=version)])
+        return value
+
+    def clear(self):
+        super().clear()
+        # '*' tells the other nodes to clear; _changed() would only drop a key named '*' here
+        self.local.clear()
+        self._local_ready()
+        self._publish(['*'])
@@ -0,0 +1,87 @@
+"""
+Database settings helpers shared by the settings modules.
+
+Kept free of Django imports so settings files can use them.
+"""
+
+
+def pool_settings(config, enabled_default=False, conn_max_age=60):
+    """
+    Connection settings for DATABASES['default'], read from the environment.
+
+    With DB_POOL_ENABLED, each process keeps a psycopg_pool ConnectionPool
+    (Django's OPTIONS['pool']) instead of one persistent connection per
+    thread. Connections are health-checked on checkout, replaced after
+    DB_POOL_MAX_LIFETIME seconds, and a request waits at most DB_POOL_TIMEOUT
+    seconds for a free connection before failing.
+
+    Args:
+        config: decouple config callable of the settings module
+        enabled_default: Whether pooling is on when DB_POOL_ENABLED is unset
+        conn_max_age: CONN_MAX_AGE used when pooling is off
+
+    Returns:
+        dict: Keys to update DATABASES['default'] with ('OPTIONS' is merged
+        into the existing options by the caller)
+    """
+    if not config('DB_POOL_ENABLED', default=enabled_default, cast=bool):
+        return {
+            'CONN_MAX_AGE': conn_max_age,
+            'CONN_HEALTH_CHECKS': config('DB_HEALTH_CHECKS', default=True, cast=bool),
+            'OPTIONS': {},
+        }
+    return {
+        # Pooling replaces persistent connections; Django refuses both together
+        'CONN_MAX_AGE': 0,
+        # Run ConnectionPool.check_connection on every checkout
+        'CONN_HEALTH_CHECKS': config('DB_HEALTH_CHECKS', default=True, cast=bool),
+        'OPTIONS': {
+            'pool': {
+                'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+                'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+                'timeout': config('DB_POOL_TIMEOUT', default=10.0, cast=float),
+                'max_waiting': config('DB_POOL_MAX_WAITING', default=0, cast=int),
+                'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=1800.0, cast=float),
+                'max_idle': config('DB_POOL_MAX_IDLE', default=300.0, cast=float),
+                'reconnect_timeout': config('DB_POOL_RECONNECT_TIMEOUT', default=300.0, cast=float),
+            },
+        },
+    }
+
+
+def apply_pool_settings(database, config, **kwargs):
+    """Update one DATABASES entry in place with pool_settings()."""
+    updates = pool_settings(config, **kwargs)
+    options = updates.pop('OPTIONS')
+    database.update(updates)
+    database['OPTIONS'] = {**database.get('OPTIONS', {}), **options}
+    return database
+
+
+def replica_databases(config, primary, **pool_kwargs):
+    """
+    DATABASES entries for the read replicas listed in DATABASE_REPLICA_URLS.
+
+    Replicas are named replica_1, replica_2, ... in the order given, share
+    the primary's connection settings and are mirrors of the primary in
+    tests.
+
+    Args:
+        config: decouple config callable of the settings module
+        primary: DATABASES['default'] of the settings module
+        **pool_kwargs: Passed to apply_pool_settings()
+
+    Returns:
+        dict: Alias -> DATABASES entry
+    """
+    import dj_database_url
+
+    urls = [url.strip() for url in config('DATABASE_REPLICA_URLS', default='').split(',') if url.strip()]
+    replicas = {}
+    for number, url in enumerate(urls, start=1):
+        database = dj_database_url.parse(url)
+        database['OPTIONS'] = dict(primary.get('OPTIONS', {}))
+        apply_pool_settings(database, config, **pool_kwargs)
+        database['TEST'] = {'MIRROR': 'default'}
+        replicas[f"replica_{number}"] = database
+    return replicas
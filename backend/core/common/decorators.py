@@ -7,6 +7,8 @@ from typing import Callable, Any
 from rest_framework.response import Response
 from rest_framework import status
 from django.core.exceptions import ValidationError, PermissionDenied
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
 from django.contrib.auth import get_user_model
 import logging
 
@@ -104,4 +106,33 @@ def rate_limit_key_generator(group: str = 'default'):
             # For now, just pass through
             return view_func(self, request, *args, **kwargs)
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+def conditional_get(etag_func: Callable) -> Callable:
+    """
+    Decorator to answer GETs of a view method with 304 Not Modified when the
+    client already has the current version.
+
+    etag_func(request) returns the version of the response, or None to skip
+    the check. It runs before the view, so it must not need the data the view
+    would load. 200 responses get the ETag and are marked private and
+    no-cache: browsers keep them and revalidate with If-None-Match.
+    """
+    def decorator(view_func: Callable) -> Callable:
+        @wraps(view_func)
+        def wrapper(self, request, *args, **kwargs):
+            version = etag_func(request)
+            if version is None:
+                return view_func(self, request, *args, **kwargs)
+            etag = quote_etag(version)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view_func(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response.headers.setdefault('ETag', etag)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+            return response
+        return wrapper
+    return decorator
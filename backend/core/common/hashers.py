@@ -0,0 +1,49 @@
+"""
+Password hashers that report hashing time to common.metrics.
+
+Each class keeps the algorithm name of the Django hasher it extends, so
+existing password hashes stay valid when PASSWORD_HASHERS is switched to
+these classes.
+"""
+
+import time
+from django.contrib.auth import hashers
+from .metrics import PASSWORD_HASH_DURATION
+
+
+class InstrumentedHasherMixin:
+    """Time encode() and verify() (verify() covers every login)."""
+
+    def encode(self, password, salt, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().encode(password, salt, *args, **kwargs)
+        finally:
+            PASSWORD_HASH_DURATION.labels(self.algorithm, 'encode').observe(time.perf_counter() - started)
+
+    def verify(self, password, encoded):
+        started = time.perf_counter()
+        try:
+            return super().verify(password, encoded)
+        finally:
+            PASSWORD_HASH_DURATION.labels(self.algorithm, 'verify').observe(time.perf_counter() - started)
+
+
+class PBKDF2PasswordHasher(InstrumentedHasherMixin, hashers.PBKDF2PasswordHasher):
+    pass
+
+
+class PBKDF2SHA1PasswordHasher(InstrumentedHasherMixin, hashers.PBKDF2SHA1PasswordHasher):
+    pass
+
+
+class Argon2PasswordHasher(InstrumentedHasherMixin, hashers.Argon2PasswordHasher):
+    pass
+
+
+class BCryptSHA256PasswordHasher(InstrumentedHasherMixin, hashers.BCryptSHA256PasswordHasher):
+    pass
+
+
+class ScryptPasswordHasher(InstrumentedHasherMixin, hashers.ScryptPasswordHasher):
+    pass
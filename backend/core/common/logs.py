@@ -0,0 +1,162 @@
+"""
+Non-blocking, structured logging.
+
+QueuedHandler puts records on a bounded in-process queue and returns; a
+listener thread takes them off and passes them to the real handler (a
+RotatingFileHandler, a StreamHandler, ...). A slow disk or a blocked pipe
+therefore never adds latency to a request. When the queue is full, records
+are dropped and counted in gradvy_log_records_dropped_total rather than
+blocking the caller.
+
+JSONFormatter writes one JSON object per line, serialized with orjson when
+it is installed. Values passed with ``extra=`` become top-level fields.
+
+    'handlers': {
+        'file': {
+            '()': 'common.logs.QueuedHandler',
+            'target': 'logging.handlers.RotatingFileHandler',
+            'filename': '/var/log/gradvy/gradvy.log',
+            'maxBytes': 100 * 1024 * 1024,
+            'backupCount': 10,
+            'formatter': 'json',
+        },
+    },
+
+Keyword arguments other than ``target`` and ``queue_size`` are passed to the
+target handler. The level and formatter configured for the QueuedHandler
+apply to the target. Configure it with ``'()'`` rather than ``'class'``:
+Python 3.12+ gives ``'class'`` QueueHandlers a special meaning in dictConfig.
+"""
+
+from datetime import datetime, timezone
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from django.utils.module_loading import import_string
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+# Attributes every LogRecord has; anything else came from extra=
+RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def _dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class JSONFormatter(logging.Formatter):
+    """Format a record as a single-line JSON object."""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        if record.stack_info:
+            data['stack'] = self.formatStack(record.stack_info)
+        return _dumps(data)
+
+
+class QueuedHandler(logging.handlers.QueueHandler):
+    """
+    Hand records to ``target`` on a listener thread.
+
+    Args:
+        target: Dotted path of the handler class that does the writing
+        queue_size: Records held before new ones are dropped
+        **kwargs: Arguments for the target handler
+    """
+
+    def __init__(self, target='logging.StreamHandler', queue_size=10000, **kwargs):
+        self.queue_size = queue_size
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.target = import_string(target)(**kwargs)
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Only merge the arguments here, so they cannot change before the
+        # listener runs; JSON encoding and writing happen on its thread
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Render the traceback now rather than keeping its frames alive
+            record.exc_text = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._record_drop()
+
+    def _record_drop(self):
+        from .metrics import LOG_RECORDS_DROPPED
+
+        self.dropped += 1
+        LOG_RECORDS_DROPPED.labels(self.name or 'unnamed').inc()
+        if self.dropped == 1 or self.dropped % 1000 == 0:
+            # Not through logging: the queue this would go to is full
+            sys.stderr.write(f"Log queue of handler {self.name!r} full, {self.dropped} records dropped so far\n")
+
+    def _ensure_listener(self):
+        # Forked worker processes inherit the handler but not the thread
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # The inherited queue may have been locked at fork time
+                self.queue = queue.Queue(maxsize=self.queue_size)
+            self._listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        """Write out queued records and stop the listener thread (logging.shutdown() calls this)."""
+        with self._start_lock:
+            listener, self._listener = self._listener, None
+            if listener is None or self._pid != os.getpid():
+                return
+            try:
+                listener.stop()
+            except queue.Full:
+                # No room for the stop marker; the daemon thread ends with the process
+                pass
+            self._pid = None
+
+    def close(self):
+        self.stop()
+        self.target.close()
+        super().close()
@@ -0,0 +1,256 @@
+"""
+Prometheus metrics for request latency, database, connection pool, cache and
+password hashing.
+
+Metrics are recorded by MetricsMiddleware, the instrumented cache backends in
+common/cache.py and the instrumented password hashers in common/hashers.py,
+and served in OpenMetrics format by metrics_view. When the
+PROMETHEUS_MULTIPROC_DIR environment variable is set (see gunicorn.conf.py),
+every worker writes to memory-mapped files in that directory and the view
+aggregates all of them, so any worker can answer a scrape.
+"""
+
+from contextlib import ExitStack
+from functools import lru_cache
+import os
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+from prometheus_client.openmetrics.exposition import CONTENT_TYPE_LATEST, generate_latest
+
+
+REQUEST_LATENCY = Histogram(
+    'gradvy_http_request_duration_seconds',
+    'Time spent handling a request, by route',
+    ['route', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+DB_QUERIES = Histogram(
+    'gradvy_http_request_db_queries',
+    'Database queries executed per request, by route',
+    ['route'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+DB_DURATION = Histogram(
+    'gradvy_http_request_db_duration_seconds',
+    'Time spent in database queries per request, by route',
+    ['route'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+CACHE_REQUESTS = Counter(
+    'gradvy_cache_requests',
+    'Cache lookups, by cache, tier (local or redis) and result (hit or miss)',
+    ['cache', 'tier', 'result'],
+)
+PASSWORD_HASH_DURATION = Histogram(
+    'gradvy_password_hash_duration_seconds',
+    'Time spent hashing or verifying passwords',
+    ['algorithm', 'operation'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+THROTTLE_DECISIONS = Counter(
+    'gradvy_throttle_decisions',
+    'Throttle checks, by scope, store (redis or local) and result (allowed or throttled)',
+    ['scope', 'backend', 'result'],
+)
+LOG_RECORDS_DROPPED = Counter(
+    'gradvy_log_records_dropped',
+    'Log records dropped because the logging queue was full, by handler',
+    ['handler'],
+)
+
+# Connection pool saturation (psycopg_pool, see common/db.py). Gauges are
+# summed over the live workers; counters over all of them.
+DB_POOL_CONNECTIONS = Gauge(
+    'gradvy_db_pool_connections',
+    'Connections held by the pool, by state (open or idle)',
+    ['alias', 'state'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_WAITING = Gauge(
+    'gradvy_db_pool_requests_waiting',
+    'Requests currently waiting for a pooled connection',
+    ['alias'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_QUEUED = Counter(
+    'gradvy_db_pool_requests_queued',
+    'Connection requests that had to wait because the pool was empty',
+    ['alias'],
+)
+DB_POOL_WAIT = Counter(
+    'gradvy_db_pool_wait_seconds',
+    'Time spent waiting for a pooled connection',
+    ['alias'],
+)
+DB_POOL_ERRORS = Counter(
+    'gradvy_db_pool_request_errors',
+    'Connection requests that failed (timed out or rejected with a full queue)',
+    ['alias'],
+)
+DB_POOL_CONNECTS = Counter(
+    'gradvy_db_pool_connects',
+    'New server connections opened by the pool',
+    ['alias'],
+)
+DB_POOL_CONNECT_DURATION = Counter(
+    'gradvy_db_pool_connect_seconds',
+    'Time spent opening new server connections',
+    ['alias'],
+)
+DB_POOL_CONNECTIONS_LOST = Counter(
+    'gradvy_db_pool_connections_lost',
+    'Pooled connections found broken by the health check',
+    ['alias'],
+)
+
+# Read replicas (common/replicas.py)
+DB_REPLICA_LAG = Gauge(
+    'gradvy_db_replica_lag_seconds',
+    'Replication lag of each read replica at its last check',
+    ['alias'],
+    multiprocess_mode='livemax',
+)
+DB_REPLICA_HEALTHY = Gauge(
+    'gradvy_db_replica_healthy',
+    'Whether the replica received reads after its last check (1) or was skipped (0)',
+    ['alias'],
+    multiprocess_mode='livemin',
+)
+DB_REQUEST_READS = Counter(
+    'gradvy_db_request_reads',
+    'Requests by where their reads went (replica, primary, primary_pinned or primary_fallback)',
+    ['target'],
+)
+
+# How often each process copies its pool statistics into the metrics
+POOL_STATS_INTERVAL = 5.0
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+_pool_stats_recorded_at = 0.0
+
+
+@lru_cache(maxsize=None)
+def _cache_counter(cache_name: str, tier: str, result: str):
+    # labels() takes a lock and builds a key on every call; local cache hits are cheaper than that
+    return CACHE_REQUESTS.labels(cache_name, tier, result)
+
+
+def record_cache_lookup(cache_name: str, hits: int, misses: int, tier: str = 'redis') -> None:
+    """Count cache hits and misses for one lookup."""
+    if hits:
+        _cache_counter(cache_name, tier, 'hit').inc(hits)
+    if misses:
+        _cache_counter(cache_name, tier, 'miss').inc(misses)
+
+
+def record_pool_stats(force: bool = False) -> None:
+    """
+    Copy the statistics of every database connection pool into the metrics.
+
+    Runs at most once per POOL_STATS_INTERVAL unless forced. pop_stats()
+    resets the pool's counters, so each call adds only what happened since
+    the previous one.
+    """
+    global _pool_stats_recorded_at
+    now = time.monotonic()
+    if not force and now - _pool_stats_recorded_at < POOL_STATS_INTERVAL:
+        return
+    _pool_stats_recorded_at = now
+
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None:
+            continue
+        stats = pool.pop_stats()
+        DB_POOL_CONNECTIONS.labels(alias, 'open').set(stats.get('pool_size', 0))
+        DB_POOL_CONNECTIONS.labels(alias, 'idle').set(stats.get('pool_available', 0))
+        DB_POOL_WAITING.labels(alias).set(stats.get('requests_waiting', 0))
+        DB_POOL_QUEUED.labels(alias).inc(stats.get('requests_queued', 0))
+        DB_POOL_WAIT.labels(alias).inc(stats.get('requests_wait_ms', 0) / 1000)
+        DB_POOL_ERRORS.labels(alias).inc(stats.get('requests_errors', 0))
+        DB_POOL_CONNECTS.labels(alias).inc(stats.get('connections_num', 0))
+        DB_POOL_CONNECT_DURATION.labels(alias).inc(stats.get('connections_ms', 0) / 1000)
+        DB_POOL_CONNECTIONS_LOST.labels(alias).inc(stats.get('connections_lost', 0))
+
+
+class _QueryTimer:
+    """connection.execute_wrapper callback that counts and times queries."""
+
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """
+    Record latency, status and database usage for every request.
+
+    Routes are labelled with their URL pattern (e.g. ``api/auth/mfa/status/``)
+    rather than the path, so label cardinality stays bounded. Place this
+    first in MIDDLEWARE so the latency covers the whole middleware stack.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        status = 500
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(timer))
+                response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            match = getattr(request, 'resolver_match', None)
+            route = match.route if match is not None and match.route else UNMATCHED_ROUTE
+            REQUEST_LATENCY.labels(route, request.method, str(status)).observe(time.perf_counter() - started)
+            DB_QUERIES.labels(route).observe(timer.count)
+            DB_DURATION.labels(route).observe(timer.duration)
+            record_pool_stats()
+
+
+def metrics_view(request):
+    """
+    Serve all metrics in OpenMetrics text format.
+
+    If METRICS_AUTH_TOKEN is set, the scraper must send it as a bearer token.
+    Without a token the endpoint is only served when DEBUG is on.
+    """
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', '')
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponseForbidden()
+    else:
+        supplied = request.META.get('HTTP_AUTHORIZATION', '')
+        if not constant_time_compare(supplied, f"Bearer {token}"):
+            return HttpResponseForbidden()
+
+    record_pool_stats(force=True)
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
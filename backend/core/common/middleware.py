@@ -0,0 +1,80 @@
+"""
+Browser-only middleware that token-authenticated API requests skip.
+
+Sessions, CSRF checks, session authentication, OTP verification and flash
+messages serve the admin and the two_factor pages. Requests to the JSON API
+authenticate with a bearer token instead, and DRF views are CSRF exempt, so
+for them this middleware only costs time: a session object, a CSRF cookie
+lookup, a lazy user wrapped twice and a message store on every request.
+
+The classes below are drop-in replacements for the Django and django-otp
+middleware of the same name. They pass a request straight on when its path
+starts with one of settings.TOKEN_API_PATH_PREFIXES and it either carries an
+``Authorization: Bearer`` header or has no session cookie, i.e. when nothing
+in the request could be authenticated by the session. All other requests,
+including session-authenticated calls to the API, get the full behaviour.
+
+On a skipped request ``request.user`` is only set once DRF has
+authenticated it; views outside DRF must not rely on it.
+"""
+
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.middleware import csrf
+from django_otp import middleware as otp_middleware
+
+
+def is_token_api_request(request):
+    """
+    Whether the request goes to the token-authenticated API without a session.
+
+    Args:
+        request: Django HttpRequest
+
+    Returns:
+        bool: True if browser-only middleware can skip the request
+    """
+    lean = getattr(request, '_token_api_request', None)
+    if lean is None:
+        prefixes = tuple(getattr(settings, 'TOKEN_API_PATH_PREFIXES', ('/api/',)))
+        lean = bool(prefixes) and request.path_info.startswith(prefixes) and (
+            request.META.get('HTTP_AUTHORIZATION', '').startswith('Bearer ')
+            or settings.SESSION_COOKIE_NAME not in request.COOKIES
+        )
+        request._token_api_request = lean
+    return lean
+
+
+class BrowserOnlyMixin:
+    """Skip the wrapped middleware for token API requests."""
+
+    def __call__(self, request):
+        if is_token_api_request(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(BrowserOnlyMixin, sessions_middleware.SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(BrowserOnlyMixin, csrf.CsrfViewMiddleware):
+    # process_view is called by the handler, outside __call__
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_token_api_request(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class AuthenticationMiddleware(BrowserOnlyMixin, auth_middleware.AuthenticationMiddleware):
+    pass
+
+
+class OTPMiddleware(BrowserOnlyMixin, otp_middleware.OTPMiddleware):
+    pass
+
+
+class MessageMiddleware(BrowserOnlyMixin, messages_middleware.MessageMiddleware):
+    pass
@@ -2,7 +2,8 @@
 Reusable mixins for views and other components.
 """
 
-from typing import Dict, Any
+from typing import Any, Dict, Iterable, Optional
+import copy
 from rest_framework.response import Response
 from rest_framework import status
 from django.utils.decorators import method_decorator
@@ -87,4 +88,91 @@ class IPAddressMixin:
         else:
             ip = request.META.get('REMOTE_ADDR', '')
         
-        return ip
\ No newline at end of file
+        return ip
+
+
+class DirtyFieldsMixin:
+    """
+    Mixin for models that tracks which concrete fields changed since load.
+    
+    A snapshot of field values is taken when an instance is loaded from the
+    database and after every save. ``save()`` without ``update_fields`` then
+    writes only the changed columns (plus ``auto_now`` fields), and skips the
+    UPDATE entirely when nothing changed. Until save() returns, including in
+    pre_save/post_save receivers, get_dirty_fields() reports the changes being
+    saved. dict and list values (JSONField) are deep-copied into the
+    snapshot, so mutating them in place also marks the field dirty.
+    """
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_fields()
+        return instance
+    
+    def _snapshot_fields(self, fields: Optional[Iterable[str]] = None) -> None:
+        """Record current values as the clean state, for all or only the given fields."""
+        deferred = self.get_deferred_fields()
+        snapshot = self.__dict__.setdefault('_loaded_values', {})
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                continue
+            if fields is not None and field.name not in fields and field.attname not in fields:
+                continue
+            value = getattr(self, field.attname)
+            snapshot[field.attname] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+    
+    @classmethod
+    def auto_now_fields(cls) -> list:
+        """Names of the ``auto_now`` fields, to add to an explicit update_fields."""
+        return [field.name for field in cls._meta.concrete_fields if getattr(field, 'auto_now', False)]
+    
+    @property
+    def is_tracking_changes(self) -> bool:
+        """Whether a snapshot exists (the instance was loaded or saved)."""
+        return '_loaded_values' in self.__dict__
+    
+    def get_dirty_fields(self) -> Dict[str, Any]:
+        """
+        Return the fields that changed since the last snapshot.
+        
+        Returns:
+            Dict[str, Any]: Field name -> value at snapshot time. Empty if the
+            instance has no snapshot yet (e.g. it was never saved).
+        """
+        snapshot = self.__dict__.get('_loaded_values')
+        if not snapshot:
+            return {}
+        dirty = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in snapshot and getattr(self, field.attname) != snapshot[field.attname]:
+                dirty[field.name] = snapshot[field.attname]
+        return dirty
+    
+    @property
+    def is_dirty(self) -> bool:
+        """Whether any tracked field changed since the last snapshot."""
+        return bool(self.get_dirty_fields())
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if (
+            not args
+            and update_fields is None
+            and not kwargs.get('force_insert')
+            and not self._state.adding
+            and self.is_tracking_changes
+        ):
+            dirty = set(self.get_dirty_fields())
+            if self._meta.pk.name not in dirty:
+                if dirty:
+                    dirty.update(self.auto_now_fields())
+                # An empty update_fields makes Model.save() a no-op
+                kwargs['update_fields'] = dirty
+        
+        super().save(*args, **kwargs)
+        self._snapshot_fields(kwargs.get('update_fields'))
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot_fields(fields)
@@ -0,0 +1,33 @@
+"""
+DRF parser built on orjson.
+
+ORJSONParser returns the same data as DRF's JSONParser. Bodies orjson
+cannot read (invalid JSON, non-UTF-8 charsets, NaN literals with
+STRICT_JSON off) are handed to JSONParser, so errors keep DRF's "JSON
+parse error - ..." messages. So are bodies with a run of 20 or more
+digits: orjson turns integers above 64 bits into floats.
+"""
+
+import io
+import re
+import orjson
+from rest_framework.parsers import JSONParser
+from .renderers import ORJSONRenderer
+
+LONG_NUMBER = re.compile(rb'\d{20}')
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser that parses with orjson."""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        body = stream.read()
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if encoding.lower().replace('_', '-') in ('utf-8', 'utf8') and not LONG_NUMBER.search(body):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        return super().parse(io.BytesIO(body), media_type, parser_context)
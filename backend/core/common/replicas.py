@@ -0,0 +1,257 @@
+"""
+Read replicas with read-your-writes consistency.
+
+PrimaryReplicaRouter sends the reads of safe requests (GET, HEAD, OPTIONS)
+to one of settings.DATABASE_REPLICAS and everything else to the primary.
+Within a request, reads go back to the primary as soon as it has written.
+ReplicaRoutingMiddleware also pins a client that wrote to the primary for
+DATABASE_REPLICA_PIN_SECONDS through a cache marker, so its next requests
+see its own writes (e.g. GET /me/ right after a profile PATCH).
+
+Replica lag is checked at most every DATABASE_REPLICA_CHECK_INTERVAL_SECONDS
+per process. Replicas that lag more than DATABASE_REPLICA_MAX_LAG_SECONDS,
+or cannot be reached, get no reads until a later check finds them healthy;
+with none left, reads fall back to the primary.
+
+Outside requests (Celery tasks, management commands, warm-up) everything
+uses the primary. Wrap code that must see the latest data in use_primary().
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import random
+import threading
+import time
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from .metrics import DB_REPLICA_HEALTHY, DB_REPLICA_LAG, DB_REQUEST_READS
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+PIN_KEY = 'db:pin:{}'
+
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+class _RequestRouting:
+    """Database routing state of the current request."""
+
+    __slots__ = ('use_replica', 'replica', 'wrote', 'user_ids', 'target')
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.replica = None
+        self.wrote = False
+        self.user_ids = set()
+        # Where the request's first read went, for metrics
+        self.target = None
+
+
+_routing = ContextVar('gradvy_db_routing', default=None)
+_primary_only = ContextVar('gradvy_db_primary_only', default=False)
+
+
+@contextmanager
+def use_primary():
+    """Send all reads in the block (or decorated function) to the primary."""
+    token = _primary_only.set(True)
+    try:
+        yield
+    finally:
+        _primary_only.reset(token)
+
+
+def measure_lag(alias):
+    """
+    Replication lag of one replica.
+
+    Args:
+        alias: Database alias of the replica
+
+    Returns:
+        float: Seconds the replica is behind the primary (0 when caught up)
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+class ReplicaMonitor:
+    """Keeps the list of replicas healthy enough to serve reads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked_at = None
+        self.healthy = []
+
+    def healthy_replicas(self):
+        """Replicas within the lag limit, re-checked once the interval has passed."""
+        interval = getattr(settings, 'DATABASE_REPLICA_CHECK_INTERVAL_SECONDS', 5.0)
+        if self.checked_at is None or time.monotonic() - self.checked_at >= interval:
+            # One thread checks; the others keep using the previous result
+            if self.lock.acquire(blocking=False):
+                try:
+                    self.refresh()
+                finally:
+                    self.lock.release()
+        return self.healthy
+
+    def refresh(self):
+        """Measure the lag of every replica and update the healthy list."""
+        max_lag = getattr(settings, 'DATABASE_REPLICA_MAX_LAG_SECONDS', 5.0)
+        healthy = []
+        for alias in getattr(settings, 'DATABASE_REPLICAS', []):
+            try:
+                lag = measure_lag(alias)
+            except DatabaseError as e:
+                logger.warning(f"Replica {alias} unavailable, reading from the primary: {e}")
+                DB_REPLICA_HEALTHY.labels(alias).set(0)
+                continue
+            DB_REPLICA_LAG.labels(alias).set(lag)
+            DB_REPLICA_HEALTHY.labels(alias).set(1 if lag <= max_lag else 0)
+            if lag <= max_lag:
+                healthy.append(alias)
+            else:
+                logger.warning(f"Replica {alias} is {lag:.1f}s behind, reading from the primary")
+        self.healthy = healthy
+        self.checked_at = time.monotonic()
+
+
+replica_monitor = ReplicaMonitor()
+
+
+def _user_id_of(instance):
+    """User whose data a written model instance belongs to, if any."""
+    if instance is None:
+        return None
+    if instance._meta.label == settings.AUTH_USER_MODEL:
+        return instance.pk
+    return getattr(instance, 'user_id', None)
+
+
+class PrimaryReplicaRouter:
+    """Route reads of safe requests to a replica and all writes to the primary."""
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None:
+            return None
+        if (not state.use_replica or state.wrote or _primary_only.get()
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            state.target = state.target or 'primary'
+            return DEFAULT_DB_ALIAS
+        if state.replica is None:
+            # One replica per request, so all its reads see the same snapshot
+            healthy = replica_monitor.healthy_replicas()
+            if not healthy:
+                state.use_replica = False
+                state.target = state.target or 'primary_fallback'
+                return DEFAULT_DB_ALIAS
+            state.replica = random.choice(healthy)
+            state.target = state.target or 'replica'
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+            user_id = _user_id_of(hints.get('instance'))
+            if user_id is not None:
+                state.user_ids.add(user_id)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *getattr(settings, 'DATABASE_REPLICAS', [])}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema through replication
+        if db in getattr(settings, 'DATABASE_REPLICAS', []):
+            return False
+        return None
+
+
+def _request_user_id(request):
+    """
+    User id claim of the request's bearer token, without verifying it.
+
+    The token is only used to pick a database; authentication verifies it
+    later. A forged token can at most send its reads to the primary.
+    """
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not header.startswith('Bearer '):
+        return None
+    claim = settings.SIMPLE_JWT.get('USER_ID_CLAIM', 'user_id')
+    try:
+        return jwt.decode(header[7:], options={'verify_signature': False}).get(claim)
+    except jwt.PyJWTError:
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Set up read routing for each request and pin clients that wrote.
+
+    Clients are identified by the user id in their access token, or by
+    their session cookie. Not used when no replicas are configured.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'DATABASE_REPLICAS', None):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user_id = _request_user_id(request)
+        session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        clients = []
+        if user_id is not None:
+            clients.append(f"user:{user_id}")
+        if session_key:
+            clients.append(f"session:{session_key}")
+
+        state = _RequestRouting(use_replica=request.method in SAFE_METHODS)
+        if state.use_replica and clients:
+            try:
+                pinned = bool(cache.get_many([PIN_KEY.format(client) for client in clients]))
+            except Exception as e:
+                # Without the cache we cannot tell, so read from the primary
+                logger.warning(f"Could not read primary pins, reading from the primary: {e}")
+                pinned = True
+            if pinned:
+                state.use_replica = False
+                state.target = 'primary_pinned'
+
+        token = _routing.set(state)
+        try:
+            return self.get_response(request)
+        finally:
+            _routing.reset(token)
+            if state.wrote:
+                self._pin(clients + [f"user:{pk}" for pk in state.user_ids])
+            if state.target:
+                DB_REQUEST_READS.labels(state.target).inc()
+
+    def _pin(self, clients):
+        seconds = getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 10)
+        try:
+            cache.set_many({PIN_KEY.format(client): 1 for client in set(clients)}, timeout=seconds)
+        except Exception as e:
+            # Without the marker the client may briefly read stale data; never fail the request
+            logger.warning(f"Could not pin clients to the primary database: {e}")
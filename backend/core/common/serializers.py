@@ -0,0 +1,117 @@
+"""
+Output-only serializers compiled from DRF serializer definitions.
+
+Building ``SomeSerializer(instance).data`` re-creates the serializer's
+fields on every call (for a ModelSerializer, by introspecting the model),
+then walks them generically. CompiledSerializer does that work once: it
+inspects the fields of the DRF serializer on first use and generates a
+Python function that builds the output dict directly, calling the same
+field ``to_representation`` and ``get_<field>`` methods the serializer
+would. The output equals ``.data``.
+
+Fields are compiled as follows:
+
+* SerializerMethodField - a direct call of the method
+* fields whose source is one concrete model field (or, with
+  ``mapping=True``, one dict key) - an attribute (or key) read plus the
+  field's ``to_representation``; ``str``/``int`` for plain char and integer
+  fields
+* anything else (nested serializers, related fields, dotted or callable
+  sources) - the field's own ``get_attribute``/``to_representation``, as in
+  Serializer.to_representation
+
+Methods run on a serializer instance without context, so only compile
+serializers whose output does not depend on ``self.context``. With
+FAST_SERIALIZERS_ENABLED off, calls go through the DRF serializer.
+"""
+
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.fields import Field, SkipField
+from rest_framework.relations import PKOnlyObject
+
+# Field classes whose to_representation is exactly this builtin
+BUILTIN_CONVERTERS = {
+    serializers.CharField: str,
+    serializers.EmailField: str,
+    serializers.IntegerField: int,
+}
+
+
+class CompiledSerializer:
+    """
+    Fast ``to_representation`` for a DRF serializer class.
+
+    Args:
+        serializer_class: Serializer to compile
+        mapping: True if instances are dicts rather than objects
+    """
+
+    def __init__(self, serializer_class, mapping=False):
+        self.serializer_class = serializer_class
+        self.mapping = mapping
+        self.source = None
+        self._function = None
+
+    def __call__(self, instance):
+        """
+        Serialize one instance.
+
+        Args:
+            instance: Model instance (or dict, with mapping=True)
+
+        Returns:
+            dict: Same data as ``serializer_class(instance).data``
+        """
+        if not getattr(settings, 'FAST_SERIALIZERS_ENABLED', True):
+            return self.serializer_class(instance).data
+        function = self._function or self._compile()
+        return function(instance)
+
+    def _compile(self):
+        prototype = self.serializer_class()
+        model = getattr(getattr(self.serializer_class, 'Meta', None), 'model', None)
+        model_fields = set()
+        if model is not None:
+            for model_field in model._meta.concrete_fields:
+                model_fields.update((model_field.name, model_field.attname))
+
+        namespace = {'SkipField': SkipField, 'PKOnlyObject': PKOnlyObject}
+        lines = ['def to_representation(instance):', '    ret = {}']
+        for index, field in enumerate(prototype._readable_fields):
+            key = repr(field.field_name)
+            if isinstance(field, serializers.SerializerMethodField):
+                namespace[f'method_{index}'] = getattr(prototype, field.method_name)
+                lines.append(f'    ret[{key}] = method_{index}(instance)')
+                continue
+
+            simple = (
+                len(field.source_attrs) == 1
+                and type(field).get_attribute is Field.get_attribute
+                and not isinstance(field, (serializers.BaseSerializer, serializers.RelatedField))
+                and (self.mapping or field.source_attrs[0] in model_fields)
+            )
+            if simple:
+                namespace[f'convert_{index}'] = BUILTIN_CONVERTERS.get(type(field), field.to_representation)
+                attr = field.source_attrs[0]
+                read = f'instance[{attr!r}]' if self.mapping else f'instance.{attr}'
+                lines.append(f'    value = {read}')
+                lines.append(f'    ret[{key}] = None if value is None else convert_{index}(value)')
+                continue
+
+            namespace[f'field_{index}'] = field
+            lines.extend([
+                '    try:',
+                f'        value = field_{index}.get_attribute(instance)',
+                '    except SkipField:',
+                '        pass',
+                '    else:',
+                '        check = value.pk if isinstance(value, PKOnlyObject) else value',
+                f'        ret[{key}] = None if check is None else field_{index}.to_representation(value)',
+            ])
+        lines.append('    return ret')
+
+        self.source = '\n'.join(lines) + '\n'
+        exec(compile(self.source, f'<compiled {self.serializer_class.__name__}>', 'exec'), namespace)
+        self._function = namespace['to_representation']
+        return self._function
@@ -0,0 +1,167 @@
+"""
+DRF throttles backed by a GCRA rate limiter in Redis.
+
+DRF's own throttles keep a list of request timestamps per client in the
+cache and read, trim and write it back on every request. These classes
+keep one number per client instead, the "theoretical arrival time" of the
+generic cell rate algorithm (GCRA), and check and update it in a single
+Lua script call. A rate of N/period allows bursts of N requests and then
+one request every period/N.
+
+The cache named by THROTTLE_CACHE_ALIAS must be a Redis cache. When it is
+not (development, tests), or when Redis is unreachable, each process
+limits requests on its own with the same algorithm; after a Redis error
+the process stays on local state for THROTTLE_REDIS_RETRY_SECONDS.
+
+Views opt into a dedicated limit by setting ``throttle_scope``; the rate
+comes from DEFAULT_THROTTLE_RATES. Scoped views are not counted against
+the general ``anon``/``user`` limits.
+"""
+
+import logging
+import math
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework import throttling
+from .metrics import THROTTLE_DECISIONS
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: bucket; ARGV[1]: emission interval (ms); ARGV[2]: period (ms).
+# Returns 0 if the request is allowed, otherwise the milliseconds to wait.
+GCRA_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - period
+if allow_at > now then
+    return math.ceil(allow_at - now)
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(new_tat - now))
+return 0
+"""
+
+# Local buckets kept per process before expired ones are pruned
+LOCAL_MAX_BUCKETS = 10000
+
+
+class RateLimiter:
+    """GCRA limiter: one Lua call per check in Redis, local state as fallback."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = {}  # key -> theoretical arrival time (ms)
+        self._script = None
+        self._redis_down_until = 0.0
+
+    def hit(self, key, num_requests, duration):
+        """
+        Count one request against a bucket.
+
+        Args:
+            key: Bucket key (already prefixed for the cache)
+            num_requests: Requests allowed per duration
+            duration: Period in seconds
+
+        Returns:
+            tuple: (wait in seconds, 0 if allowed; backend used, 'redis' or 'local')
+        """
+        interval = duration * 1000 / num_requests
+        period = duration * 1000
+        client = self._redis_client(key)
+        if client is not None:
+            try:
+                wait_ms = self._get_script(client)(keys=[key], args=[interval, period], client=client)
+                return int(wait_ms) / 1000, 'redis'
+            except Exception as e:
+                retry = getattr(settings, 'THROTTLE_REDIS_RETRY_SECONDS', 5)
+                self._redis_down_until = time.monotonic() + retry
+                logger.warning(f"Throttle store unavailable, limiting per process for {retry}s: {e}")
+        return self._hit_local(key, interval, period) / 1000, 'local'
+
+    def _redis_client(self, key):
+        if time.monotonic() < self._redis_down_until:
+            return None
+        cache = caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+        if not isinstance(cache, RedisCache):
+            return None
+        return cache._cache.get_client(key, write=True)
+
+    def _get_script(self, client):
+        if self._script is None:
+            # Runs EVALSHA with whichever client it is given, loading the script on NOSCRIPT
+            self._script = client.register_script(GCRA_SCRIPT)
+        return self._script
+
+    def _hit_local(self, key, interval, period):
+        now = time.time() * 1000
+        with self._lock:
+            tat = max(self._local.get(key, now), now)
+            allow_at = tat + interval - period
+            if allow_at > now:
+                return math.ceil(allow_at - now)
+            self._local[key] = tat + interval
+            if len(self._local) > LOCAL_MAX_BUCKETS:
+                self._local = {k: v for k, v in self._local.items() if v > now}
+        return 0
+
+    def reset(self):
+        """Forget all local state (tests)."""
+        with self._lock:
+            self._local.clear()
+        self._redis_down_until = 0.0
+
+
+rate_limiter = RateLimiter()
+
+
+class GCRARateThrottle(throttling.SimpleRateThrottle):
+    """SimpleRateThrottle that counts requests with rate_limiter."""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        cache = caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+        self._wait, backend = rate_limiter.hit(cache.make_key(self.key), self.num_requests, self.duration)
+        allowed = self._wait == 0
+        THROTTLE_DECISIONS.labels(self.scope, backend, 'allowed' if allowed else 'throttled').inc()
+        return allowed or self.throttle_failure()
+
+    def wait(self):
+        return self._wait
+
+
+class AnonRateThrottle(throttling.AnonRateThrottle, GCRARateThrottle):
+    """Limit anonymous requests to views without their own throttle_scope."""
+
+    def allow_request(self, request, view):
+        if getattr(view, 'throttle_scope', None):
+            return True
+        return super().allow_request(request, view)
+
+
+class UserRateThrottle(throttling.UserRateThrottle, GCRARateThrottle):
+    """Limit authenticated requests to views without their own throttle_scope."""
+
+    def allow_request(self, request, view):
+        if getattr(view, 'throttle_scope', None):
+            return True
+        return super().allow_request(request, view)
+
+
+class ScopedRateThrottle(throttling.ScopedRateThrottle, GCRARateThrottle):
+    """Limit requests to views with a throttle_scope by that scope's rate."""
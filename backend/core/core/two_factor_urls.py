@@ -0,0 +1,6 @@
+"""two_factor's URLconf, loaded lazily by core.urls on first use."""
+
+from two_factor.urls import urlpatterns as tf_urls
+
+# two_factor exposes (patterns, app_name) for include(); unpack it for URLResolver
+urlpatterns, app_name = tf_urls
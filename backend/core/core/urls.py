@@ -1,13 +1,26 @@
 from django.contrib import admin
 from django.urls import path, include
+from django.urls.resolvers import RoutePattern, URLResolver
 from django.conf import settings
 from django.conf.urls.static import static
-from two_factor.urls import urlpatterns as tf_urls
+from common.metrics import metrics_view
+
+
+def lazy_include(route, urlconf_name, namespace):
+    """
+    Like include(), but the URLconf module is only imported the first time a
+    request or reverse() reaches it, not when this module is loaded.
+    """
+    return URLResolver(RoutePattern(route, is_endpoint=False), urlconf_name, app_name=namespace, namespace=namespace)
+
 
 urlpatterns = [
+    path('metrics', metrics_view, name='metrics'),
     path('admin/', admin.site.urls),
-    path('', include(tf_urls)),
     path('api/auth/', include('apps.auth.api.urls')),
+    # Template-based two_factor views pull in phonenumbers and form wizards;
+    # listed last so API requests are matched before they are imported
+    lazy_include('', 'core.two_factor_urls', 'two_factor'),
 ]
 
 if settings.DEBUG:
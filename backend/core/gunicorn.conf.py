@@ -0,0 +1,38 @@
+"""
+Gunicorn configuration for production.
+
+    cd backend/core && gunicorn core.wsgi -c gunicorn.conf.py
+
+Workers record Prometheus metrics into PROMETHEUS_MULTIPROC_DIR so that
+/metrics reports totals for all workers, not just the one that answers the
+scrape. The directory is emptied on startup, and each dead worker's files are
+marked so its live gauges are dropped.
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'gradvy_prometheus'))
+
+
+def on_starting(server):
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    # Runs after the worker has loaded the app and before it accepts requests
+    from apps.auth.warmup import warm_up
+    warm_up()
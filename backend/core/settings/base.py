@@ -50,20 +50,26 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 # Middleware
 MIDDLEWARE = [
+    'common.metrics.MetricsMiddleware',  # first, so latency covers the whole stack
+    'common.replicas.ReplicaRoutingMiddleware',  # only active with DATABASE_REPLICAS
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'common.middleware.SessionMiddleware',  # common.middleware.*: skipped for token API requests
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django_otp.middleware.OTPMiddleware',
+    'common.middleware.CsrfViewMiddleware',
+    'common.middleware.AuthenticationMiddleware',
+    'common.middleware.OTPMiddleware',
     'axes.middleware.AxesMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'common.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
 
+# Paths whose bearer-token (or cookie-less) requests skip session, CSRF,
+# OTP and message middleware; /admin/ and the two_factor pages keep them
+TOKEN_API_PATH_PREFIXES = ['/api/']
+
 # Templates
 TEMPLATES = [
     {
@@ -83,6 +89,15 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'core.wsgi.application'
 
+# Password hashing - Django's default hashers, timed for the password hash metrics
+PASSWORD_HASHERS = [
+    'common.hashers.PBKDF2PasswordHasher',
+    'common.hashers.PBKDF2SHA1PasswordHasher',
+    'common.hashers.Argon2PasswordHasher',
+    'common.hashers.BCryptSHA256PasswordHasher',
+    'common.hashers.ScryptPasswordHasher',
+]
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -128,22 +143,33 @@ AUTH_USER_MODEL = 'gradvy_auth.User'
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.auth.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'common.renderers.ORJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'common.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'common.throttling.AnonRateThrottle',
+        'common.throttling.UserRateThrottle',
+        'common.throttling.ScopedRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '20/min',
         'user': '120/min',
+        # Views with a throttle_scope (see common/throttling.py)
+        'login': '10/min',
+        'mfa_verify': '10/min',
+        'register': '5/min',
+        'password_reset': '5/min',
     },
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
@@ -188,6 +214,10 @@ AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
 ]
 
+# User.email is unique through the Lower('email') constraint, which the
+# USERNAME_FIELD check does not recognise; emails are stored lowercased
+SILENCED_SYSTEM_CHECKS = ['auth.W004']
+
 # OTP settings
 OTP_TOTP_ISSUER = 'Gradvy'
 OTP_LOGIN_URL = '/auth/login/'
@@ -197,6 +227,10 @@ TWO_FACTOR_SMS_GATEWAY = None
 TWO_FACTOR_CALL_GATEWAY = None
 
 # Logging configuration
+# File logging goes through a queue and a listener thread (common/logs.py);
+# records beyond LOG_QUEUE_SIZE per handler are dropped, not waited for
+LOG_QUEUE_SIZE = config('LOG_QUEUE_SIZE', default=10000, cast=int)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -209,6 +243,9 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'common.logs.JSONFormatter',
+        },
     },
     'handlers': {
         'console': {
@@ -216,9 +253,13 @@ LOGGING = {
             'formatter': 'simple',
         },
         'file': {
-            'class': 'logging.FileHandler',
+            '()': 'common.logs.QueuedHandler',
+            'target': 'logging.handlers.RotatingFileHandler',
             'filename': BASE_DIR / 'logs' / 'gradvy.log',
-            'formatter': 'verbose',
+            'maxBytes': 1024 * 1024 * 50,  # 50MB
+            'backupCount': 5,
+            'queue_size': LOG_QUEUE_SIZE,
+            'formatter': 'json',
         },
     },
     'root': {
@@ -243,4 +284,104 @@ LOGGING = {
 UNCONFIRMED_TOTP_RETENTION_HOURS = 24
 USED_BACKUP_CODE_RETENTION_DAYS = 90
 # Whether to cleanup MFA data immediately when disabled (True) or delay it (False)
-MFA_CLEANUP_ON_DISABLE_IMMEDIATE = True
\ No newline at end of file
+MFA_CLEANUP_ON_DISABLE_IMMEDIATE = True
+
+# Chunk size for purge jobs (expired reset tokens, used backup codes)
+AUTH_PURGE_BATCH_SIZE = 5000
+
+# Transactional outbox for user lifecycle events (apps/auth/services/outbox_service.py)
+OUTBOX_DRAIN_INTERVAL_SECONDS = config('OUTBOX_DRAIN_INTERVAL_SECONDS', default=5, cast=int)
+OUTBOX_BATCH_SIZE = 100  # events claimed per drain transaction
+OUTBOX_MAX_BATCHES_PER_RUN = 10
+OUTBOX_MAX_ATTEMPTS = 10  # failed events are left in the table for inspection after this
+OUTBOX_RETRY_MAX_SECONDS = 600
+OUTBOX_RETENTION_DAYS = 7
+
+# Buffered audit log (apps/auth/services/audit_service.py)
+AUDIT_LOG_ENABLED = config('AUDIT_LOG_ENABLED', default=True, cast=bool)
+AUDIT_LOG_ASYNC = True  # False writes each event on the calling thread (tests)
+AUDIT_BUFFER_SIZE = 10000  # events held in memory per process; extra events are dropped
+AUDIT_FLUSH_BATCH_SIZE = 500
+AUDIT_FLUSH_INTERVAL_SECONDS = 1.0
+AUDIT_PARTITION_MONTHS_AHEAD = 2
+AUDIT_RETENTION_MONTHS = config('AUDIT_RETENTION_MONTHS', default=12, cast=int)
+AUDIT_QUERY_DEFAULT_DAYS = 7  # time window searched by the audit API when no 'since' is given
+
+# Prometheus metrics (common/metrics.py), served at /metrics
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_AUTH_TOKEN = config('METRICS_AUTH_TOKEN', default='')  # bearer token for /metrics; unset serves it only with DEBUG
+
+# Upper bound for app loading plus the first request, checked by `manage.py profile_startup`
+STARTUP_BUDGET_MS = config('STARTUP_BUDGET_MS', default=1000, cast=int)
+
+# Worker warm-up before accepting traffic (apps/auth/warmup.py, run by gunicorn.conf.py)
+WARMUP_ENABLED = config('WARMUP_ENABLED', default=True, cast=bool)
+WARMUP_SKIP_STEPS = []  # e.g. ['password_hasher'] to skip the full hash on boot
+
+# Read replicas (common/replicas.py); DATABASE_REPLICA_URLS adds them to DATABASES
+DATABASE_ROUTERS = ['common.replicas.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []  # aliases in DATABASES; set by the settings module that defines DATABASES
+DATABASE_REPLICA_PIN_SECONDS = config('DATABASE_REPLICA_PIN_SECONDS', default=10, cast=int)  # keep above the max lag
+DATABASE_REPLICA_MAX_LAG_SECONDS = config('DATABASE_REPLICA_MAX_LAG_SECONDS', default=5.0, cast=float)
+DATABASE_REPLICA_CHECK_INTERVAL_SECONDS = 5.0
+
+# Cached user snapshots and MFA status (apps/auth/services/cache_service.py)
+AUTH_HOT_CACHE_ALIAS = 'hot'  # falls back to 'default' when CACHES has no such alias
+AUTH_HOT_CACHE_TIMEOUT = 300
+AUTH_VERSION_TIMEOUT = 86400  # lifetime of the ETag version tags of /me/ and MFA status
+
+# Avatars (apps/auth/services/avatar_service.py)
+AVATAR_MAX_BYTES = config('AVATAR_MAX_BYTES', default=5 * 1024 * 1024, cast=int)  # larger uploads get a 413
+AVATAR_MAX_PIXELS = 25_000_000  # width x height, checked from the header before anything is decoded
+AVATAR_THUMBNAIL_SIZES = [64, 128, 256]  # square WebP thumbnails, one URL each in /me/
+AVATAR_UNUSED_RETENTION_HOURS = 24  # minimum age before an image no profile uses is deleted
+
+# Throttling (common/throttling.py): shared limits need a Redis cache
+THROTTLE_CACHE_ALIAS = 'default'
+THROTTLE_REDIS_RETRY_SECONDS = 5  # per-process limits after a Redis error
+
+# Serve user and MFA status payloads through compiled serializers (common/serializers.py)
+FAST_SERIALIZERS_ENABLED = config('FAST_SERIALIZERS_ENABLED', default=True, cast=bool)
+
+# Periodic maintenance tasks (run by celery beat)
+CELERY_BEAT_SCHEDULE = {
+    'clean-mfa-data': {
+        'task': 'apps.auth.tasks.tasks.clean_mfa_data',
+        'schedule': timedelta(hours=24),
+    },
+    'purge-expired-password-reset-tokens': {
+        'task': 'apps.auth.tasks.tasks.purge_expired_password_reset_tokens',
+        'schedule': timedelta(hours=1),
+    },
+    'drain-outbox': {
+        'task': 'apps.auth.tasks.tasks.drain_outbox',
+        'schedule': timedelta(seconds=OUTBOX_DRAIN_INTERVAL_SECONDS),
+    },
+    'purge-processed-outbox-events': {
+        'task': 'apps.auth.tasks.tasks.purge_processed_outbox_events',
+        'schedule': timedelta(hours=24),
+    },
+    'maintain-audit-partitions': {
+        'task': 'apps.auth.tasks.tasks.maintain_audit_partitions',
+        'schedule': timedelta(hours=24),
+    },
+    'purge-unused-avatars': {
+        'task': 'apps.auth.tasks.tasks.purge_unused_avatars',
+        'schedule': timedelta(hours=24),
+    },
+}
+
+# Transactional email delivery (apps/auth/services/email_service.py)
+EMAIL_POOL_SIZE = config('EMAIL_POOL_SIZE', default=2, cast=int)  # open SMTP connections per worker process
+EMAIL_CONNECTION_MAX_MESSAGES = 100  # recycle a pooled connection after this many messages
+EMAIL_CONNECTION_MAX_AGE = 300  # seconds before a pooled connection is recycled
+EMAIL_BATCH_SIZE = 50  # messages per delivery task
+EMAIL_RETRY_BACKOFF_SECONDS = 30
+EMAIL_RETRY_BACKOFF_MAX_SECONDS = 3600
+
+# Password Reset Settings
+PASSWORD_RESET_TOKEN_LIFETIME_HOURS = 1
+# Repeated reset requests for the same email within this window enqueue only one job
+PASSWORD_RESET_REQUEST_DEDUP_SECONDS = config('PASSWORD_RESET_REQUEST_DEDUP_SECONDS', default=300, cast=int)
+# Link sent in the reset email; {token} is replaced with the reset token
+PASSWORD_RESET_URL = config('PASSWORD_RESET_URL', default='http://localhost:3000/reset-password?token={token}')
\ No newline at end of file
@@ -70,12 +70,16 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 # Django REST Framework - Development settings
 REST_FRAMEWORK.update({
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'common.renderers.ORJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',  # Adds browsable API for development
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/min',  # More lenient for development
         'user': '500/min',
+        'login': '30/min',
+        'mfa_verify': '30/min',
+        'register': '20/min',
+        'password_reset': '20/min',
     },
 })
 
@@ -6,6 +6,8 @@ These settings are optimized for production deployment with security and perform
 
 from .base import *
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
+from common.db import apply_pool_settings, replica_databases
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = False
@@ -35,6 +37,10 @@ CELERY_WORKER_MAX_TASKS_PER_CHILD = 50
 CELERY_TASK_SOFT_TIME_LIMIT = 300  # 5 minutes
 CELERY_TASK_TIME_LIMIT = 600  # 10 minutes
 
+# /metrics exposes per-route, cache and throttle internals: scrapers must authenticate
+if not METRICS_AUTH_TOKEN:
+    raise ImproperlyConfigured("METRICS_AUTH_TOKEN must be set in production")
+
 # Security settings for production
 SECURE_SSL_REDIRECT = True
 SECURE_HSTS_SECONDS = 31536000  # 1 year
@@ -71,16 +77,21 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@gradvy.com')
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=10, cast=int)  # never let a stuck SMTP server hang a worker
 
 # Django REST Framework - Production settings
 REST_FRAMEWORK.update({
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'common.renderers.ORJSONRenderer',
         # Browsable API disabled in production for security
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '10/min',  # Strict rate limiting in production
         'user': '60/min',
+        'login': '5/min',
+        'mfa_verify': '5/min',
+        'register': '3/min',
+        'password_reset': '3/min',
     },
 })
 
@@ -98,14 +109,23 @@ AXES_ENABLE_ADMIN = False  # Don't show axes in admin for security
 # Cache configuration for production (Redis)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'BACKEND': 'common.cache.InstrumentedRedisCache',
         'LOCATION': config('CACHE_URL', default='redis://127.0.0.1:6379/1'),
-        'OPTIONS': {
-            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
-        },
+        'METRICS_NAME': 'default',
         'KEY_PREFIX': 'gradvy',
         'TIMEOUT': 300,
-    }
+    },
+    # Read-mostly data (user snapshots, MFA status): per-process LRU in front of Redis
+    'hot': {
+        'BACKEND': 'common.cache.TwoTierCache',
+        'LOCATION': config('CACHE_URL', default='redis://127.0.0.1:6379/1'),
+        'METRICS_NAME': 'hot',
+        'KEY_PREFIX': 'gradvy',
+        'TIMEOUT': 300,
+        'LOCAL_TIMEOUT': config('HOT_CACHE_LOCAL_TIMEOUT', default=30, cast=int),
+        'LOCAL_MAX_ENTRIES': config('HOT_CACHE_LOCAL_MAX_ENTRIES', default=10000, cast=int),
+        'LOCAL_MAX_BYTES': config('HOT_CACHE_LOCAL_MAX_BYTES', default=16 * 1024 * 1024, cast=int),
+    },
 }
 
 # Session configuration for production
@@ -123,7 +143,8 @@ SESSION_COOKIE_AGE = 3600  # 1 hour
 # Static files configuration for production
 STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
 
-# Production logging configuration
+# Production logging configuration: JSON lines, written by listener threads
+# (common/logs.py) so requests never wait on stdout or the disk
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -133,26 +154,32 @@ LOGGING = {
             'style': '{',
         },
         'json': {
-            'format': '{"time": "%(asctime)s", "level": "%(levelname)s", "module": "%(module)s", "message": "%(message)s"}',
+            '()': 'common.logs.JSONFormatter',
         },
     },
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
+            '()': 'common.logs.QueuedHandler',
+            'target': 'logging.StreamHandler',
+            'queue_size': LOG_QUEUE_SIZE,
             'formatter': 'json',
         },
         'file': {
-            'class': 'logging.handlers.RotatingFileHandler',
+            '()': 'common.logs.QueuedHandler',
+            'target': 'logging.handlers.RotatingFileHandler',
             'filename': '/var/log/gradvy/gradvy.log',
             'maxBytes': 1024 * 1024 * 100,  # 100MB
             'backupCount': 10,
+            'queue_size': LOG_QUEUE_SIZE,
             'formatter': 'json',
         },
         'error_file': {
-            'class': 'logging.handlers.RotatingFileHandler',
+            '()': 'common.logs.QueuedHandler',
+            'target': 'logging.handlers.RotatingFileHandler',
             'filename': '/var/log/gradvy/error.log',
             'maxBytes': 1024 * 1024 * 100,  # 100MB
             'backupCount': 10,
+            'queue_size': LOG_QUEUE_SIZE,
             'formatter': 'json',
             'level': 'ERROR',
         },
@@ -184,14 +211,14 @@ LOGGING = {
 X_FRAME_OPTIONS = 'DENY'
 SECURE_REFERRER_POLICY = 'strict-origin-when-cross-origin'
 
-# Database connection pooling for production
-DATABASES['default'].update({
-    'CONN_MAX_AGE': 60,
-    'OPTIONS': {
-        'MAX_CONNS': 20,
-        'MIN_CONNS': 5,
-    }
-})
+# Database connection pooling for production (psycopg_pool, see common/db.py)
+# Each gunicorn worker holds its own pool: size DB_POOL_MAX_SIZE * workers
+# to stay below the server's max_connections
+apply_pool_settings(DATABASES['default'], config, enabled_default=True)
+
+# Read replicas from DATABASE_REPLICA_URLS (comma-separated), see common/replicas.py
+DATABASES.update(replica_databases(config, DATABASES['default'], enabled_default=True))
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
 
 # Monitoring and health checks
 INSTALLED_APPS += [
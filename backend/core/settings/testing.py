@@ -43,6 +43,9 @@ CELERY_TASK_EAGER_PROPAGATES = True
 CELERY_BROKER_URL = 'memory://'
 CELERY_RESULT_BACKEND = 'cache+memory://'
 
+# Write audit events synchronously so tests can assert on them
+AUDIT_LOG_ASYNC = False
+
 # Cache configuration for testing (dummy cache)
 CACHES = {
     'default': {
@@ -75,11 +78,15 @@ CORS_ALLOW_ALL_ORIGINS = True
 REST_FRAMEWORK.update({
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.auth.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '1000/min',  # No throttling in tests
         'user': '1000/min',
+        'login': '1000/min',
+        'mfa_verify': '1000/min',
+        'register': '1000/min',
+        'password_reset': '1000/min',
     },
     'TEST_REQUEST_DEFAULT_FORMAT': 'json',
 })
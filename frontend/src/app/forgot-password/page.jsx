@@ -39,16 +39,9 @@ const ForgotPasswordPage = () => {
 
   const onSubmit = async (data) => {
     try {
-      const result = await requestReset(data.email).unwrap();
+      await requestReset(data.email).unwrap();
       setIsSubmitted(true);
       
-      // Log token for development testing
-      if (result.token) {
-        console.log('Password Reset Token (for development):', result.token);
-        console.log('Token expires at:', result.expires_at);
-        console.log('Use this token at: /reset-password?token=' + result.token);
-      }
-      
       toast.success('Password reset instructions sent!');
     } catch (error) {
       console.error('Password reset error:', error);
@@ -75,7 +68,7 @@ const ForgotPasswordPage = () => {
             </h1>
             
             <p className="text-gray-600 mb-6">
-              We've sent password reset instructions to:
+              If an account exists, we've sent password reset instructions to:
             </p>
             
             <p className="text-lg font-semibold text-gray-900 mb-6">
@@ -84,8 +77,8 @@ const ForgotPasswordPage = () => {
             
             <div className="bg-blue-50 border border-blue-200 rounded-lg p-4 mb-6">
               <p className="text-sm text-blue-800">
-                <strong>Development Note:</strong> Check the browser console for the reset token. 
-                In production, you would receive an email with a reset link.
+                <strong>Development Note:</strong> The reset email is delivered by the Celery worker. 
+                With the console email backend, the reset link is printed in the worker output.
               </p>
             </div>
             
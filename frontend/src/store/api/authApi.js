@@ -235,7 +235,9 @@ export const authApi = createApi({
     }),
 
     getMFAStatus: builder.query({
-      query: () => 'mfa/status/',
+      // 'no-cache': the browser revalidates its copy with If-None-Match and
+      // gets a bodyless 304 when the status has not changed
+      query: () => ({ url: 'mfa/status/', cache: 'no-cache' }),
       providesTags: ['MFA'],
     }),
 
@@ -254,7 +256,8 @@ export const authApi = createApi({
 
     // User profile endpoints
     getProfile: builder.query({
-      query: () => 'me/',
+      // Revalidated with If-None-Match, like getMFAStatus
+      query: () => ({ url: 'me/', cache: 'no-cache' }),
       async onQueryStarted(arg, { dispatch, queryFulfilled }) {
         try {
           const { data } = await queryFulfilled;